@@ -1,10 +1,11 @@
 from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
 import secrets
-from .config import correct_username, correct_password
+from .config import correct_username, correct_password, METRICS_TOKEN
 from .core.rate_limiter import limiter
 
 security = HTTPBasic()
+bearer = HTTPBearer(auto_error=False)
 
 @limiter.limit("2/minute")
 def get_admin_user(
@@ -28,4 +29,23 @@ def get_admin_user(
             headers={"WWW-Authenticate": "Basic"},
         )
     
-    return {"username": credentials.username}
\ No newline at end of file
+    return {"username": credentials.username}
+
+
+# Not behind the 2/minute admin login limit, Prometheus scrapes every few seconds. The token
+# is a long random string rather than a password, so there is nothing to guess at that rate.
+def get_metrics_scraper(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer)
+):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode("utf8"),
+        METRICS_TOKEN.encode("utf8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -7,4 +7,54 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 correct_username = os.getenv("ADMIN_USERNAME")
-correct_password = os.getenv("ADMIN_PASSWORD")
\ No newline at end of file
+correct_password = os.getenv("ADMIN_PASSWORD")
+
+# prepared statements asyncpg keeps per connection (0 disables, e.g. behind pgbouncer in transaction mode)
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+
+# Connection pool of the request engine, per worker process. A request that finds all
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections busy waits up to DB_POOL_TIMEOUT seconds.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Postgres statement_timeout per request, in milliseconds (0 = no limit). Analytics queries
+# scan the whole table and get longer, everything else is an index lookup.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "3000"))
+ANALYTICS_STATEMENT_TIMEOUT_MS = int(os.getenv("ANALYTICS_STATEMENT_TIMEOUT_MS", "10000"))
+
+# "snapshot" answers /analytics from an in-memory snapshot of the table (one per process),
+# "sql" computes everything in the database on every request
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "snapshot")
+
+# Cache for the read-only routers (reference lists, analytics, company and location pages).
+# Entries are dropped when this process sees the dataset change, the TTL bounds how long
+# another replica's approvals can take to show up.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+
+# Background jobs (admin bulk loads) run on this many worker threads per process, one keeps
+# loads of the same source from racing each other. The last JOB_HISTORY jobs can be looked up.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "50"))
+
+# Where the rate limit counters live. "memory://" counts per worker process, so with N workers
+# or replicas every limit is N times looser. "sqlite:////dev/shm/ratelimit.db" shares them
+# between the workers of a host, "resp://redis:6379/0" between hosts, see core/rate_limit_storage.py
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+# sliding-window-counter: no burst of twice the limit around a window boundary, two counters per key
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+
+# Bearer token Prometheus scrapes /metrics with. Unset, /metrics answers 404.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Statements slower than this are logged with their plan for /admin/slow-queries (0 turns the
+# log off). The plan is captured by running the statement again under EXPLAIN ANALYZE, with
+# the timeout below, see core/slow_queries.py.
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
@@ -0,0 +1,171 @@
+# Company and location name normalization. The namealias table (plus the names already in
+# ReportedSalary) is compiled into one dict per kind keyed on the folded spelling, so
+# normalizing a name is a fold and a dict lookup. Folding ignores case, accents, invisible
+# characters and runs of whitespace, "  québec " finds the alias "Quebec". A trigram index
+# over the canonical names backs the fuzzy suggestions shown to admins; those are never
+# applied on their own, a near miss becomes an alias once an admin confirms it.
+import re
+import unicodedata
+from collections import Counter
+from sqlalchemy import case, update
+from sqlmodel import func, select
+from sqlalchemy.engine import Connection
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.name_alias import NameAlias, NameKind
+from ..models.salary import ReportedSalary
+
+# suggestions below this trigram similarity (shared / all distinct trigrams) aren't worth showing
+MIN_SIMILARITY = 0.3
+
+INVISIBLE = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+WHITESPACE = re.compile(r"\s+")
+
+COLUMNS = {NameKind.COMPANY: ReportedSalary.company, NameKind.LOCATION: ReportedSalary.location}
+
+
+def clean(name: str) -> str:
+    """The name as it should be stored when there's no alias for it: trimmed, single spaced"""
+    return WHITESPACE.sub(" ", INVISIBLE.sub("", name)).strip()
+
+
+def fold(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", clean(name).casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def trigrams(folded: str):
+    # padded like pg_trgm, so short names and word starts still share trigrams
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AliasNormalizer:
+    def __init__(self, aliases, names):
+        """
+        aliases are (kind, alias, canonical) rows, names (kind, name, count) of the names in use.
+        A folded spelling goes to its alias if there is one, otherwise to the most used spelling.
+        """
+        self.names = {kind: {} for kind in NameKind}
+        for kind, name, count in sorted(names, key=lambda row: row[2]):
+            self.names[kind][fold(name)] = clean(name)
+        for kind, alias, canonical in aliases:
+            self.names[kind][fold(alias)] = canonical
+        # an alias target is spelled the way the alias table spells it
+        for kind, alias, canonical in aliases:
+            self.names[kind][fold(canonical)] = canonical
+
+        # trigram -> indices into canonical[kind]
+        self.canonical = {kind: sorted(set(names.values())) for kind, names in self.names.items()}
+        self.trigrams = {kind: [trigrams(fold(name)) for name in self.canonical[kind]] for kind in NameKind}
+        self.postings = {kind: {} for kind in NameKind}
+        for kind, grams in self.trigrams.items():
+            for index, name_grams in enumerate(grams):
+                for gram in name_grams:
+                    self.postings[kind].setdefault(gram, []).append(index)
+
+    @staticmethod
+    def statements():
+        aliases = select(NameAlias.kind, NameAlias.alias, NameAlias.canonical)
+        names = [
+            select(column, func.count()).where(column.is_not(None)).group_by(column)
+            for column in COLUMNS.values()
+        ]
+        return aliases, names
+
+    @classmethod
+    def _from_results(cls, aliases, names):
+        return cls(
+            [(NameKind(kind), alias, canonical) for kind, alias, canonical in aliases],
+            [(kind, name, count) for kind, rows in zip(COLUMNS, names) for name, count in rows]
+        )
+
+    @classmethod
+    async def load(cls, session: AsyncSession):
+        aliases, names = cls.statements()
+        return cls._from_results(
+            (await session.exec(aliases)).all(),
+            [(await session.exec(statement)).all() for statement in names]
+        )
+
+    @classmethod
+    def load_sync(cls, connection: Connection):
+        """For the loaders, which run on the sync engine"""
+        aliases, names = cls.statements()
+        return cls._from_results(
+            connection.execute(aliases).all(),
+            [connection.execute(statement).all() for statement in names]
+        )
+
+    def normalize(self, kind: NameKind, name: str | None) -> str | None:
+        if name is None:
+            return None
+        return self.names[kind].get(fold(name)) or clean(name)
+
+    def normalize_series(self, kind: NameKind, names):
+        """normalize() over a pandas Series, each distinct spelling is looked up once"""
+        lookup = {name: self.normalize(kind, name) for name in names.dropna().unique()}
+        return names.map(lookup, na_action="ignore")
+
+    def normalize_column(self, kind: NameKind, column, names):
+        """
+        column as a SQL expression normalizing the given names, for INSERT ... SELECT statements
+        that copy a known set of names (e.g. a batch of approved submissions)
+        """
+        targets = {name: self.normalize(kind, name) for name in names if name is not None}
+        targets = {name: target for name, target in targets.items() if target != name}
+        if not targets:
+            return column
+        return case(targets, value=column, else_=column)
+
+    def suggest(self, kind: NameKind, name: str, limit: int = 5):
+        """Canonical names that look like name, as (name, similarity) best first"""
+        grams = trigrams(fold(name))
+        shared = Counter(index for gram in grams for index in self.postings[kind].get(gram, ()))
+        scored = []
+        for index, count in shared.items():
+            similarity = count / (len(grams) + len(self.trigrams[kind][index]) - count)
+            if similarity >= MIN_SIMILARITY:
+                scored.append((self.canonical[kind][index], round(similarity, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+# The compiled normalizer, rebuilt lazily after clear() (an alias change or a dataset change,
+# which can add names). Same generation guard as location_hierarchy.
+_normalizer: AliasNormalizer | None = None
+_generation = 0
+
+
+async def get_normalizer(session: AsyncSession) -> AliasNormalizer:
+    global _normalizer
+    normalizer = _normalizer
+    if normalizer is None:
+        generation = _generation
+        normalizer = await AliasNormalizer.load(session)
+        if generation == _generation:
+            _normalizer = normalizer
+    return normalizer
+
+
+def clear():
+    global _normalizer, _generation
+    _generation += 1
+    _normalizer = None
+
+
+async def rename_to_canonical(session: AsyncSession, normalizer: AliasNormalizer) -> int:
+    """
+    Rewrite the ReportedSalary names that normalizer maps elsewhere, e.g. after an alias was
+    added for a spelling already in use. Returns the number of rows changed, uncommitted.
+    """
+    renamed = 0
+    for kind, column in COLUMNS.items():
+        targets = {}
+        for name in (await session.exec(select(column).where(column.is_not(None)).distinct())).all():
+            target = normalizer.normalize(kind, name)
+            if target != name:
+                targets.setdefault(target, []).append(name)
+        for target, names in targets.items():
+            result = await session.exec(update(ReportedSalary).where(column.in_(names)).values({column.key: target}))
+            renamed += result.rowcount
+    return renamed
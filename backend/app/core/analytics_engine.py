@@ -0,0 +1,28 @@
+# Picks the analytics implementation for a request, see ANALYTICS_ENGINE in config.py.
+# Both engines expose the same coroutine methods and return the same plain dicts and lists.
+#
+# The dependency is chosen once, at import: the snapshot engine never touches the database
+# per request, so it must not check out a connection, run pre_ping or set the analytics
+# statement timeout either. Only the SQL engine depends on get_analytics_session.
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..config import ANALYTICS_ENGINE
+from ..database import get_analytics_session, get_session
+from .analytics_snapshot import SnapshotAnalytics, get_snapshot
+from .analytics_sql import SqlAnalytics
+
+
+async def get_sql_analytics(session: AsyncSession = Depends(get_analytics_session)):
+    return SqlAnalytics(session)
+
+
+async def get_snapshot_analytics():
+    return SnapshotAnalytics(await get_snapshot())
+
+
+# the snapshot is per process, use the SQL engine when approvals can happen on other replicas
+get_analytics = get_sql_analytics if ANALYTICS_ENGINE == "sql" else get_snapshot_analytics
+
+# for routes that run queries of their own next to get_analytics: on the SQL engine the same
+# session (FastAPI caches a dependency per request), with the snapshot the regular one
+get_profile_session = get_analytics_session if ANALYTICS_ENGINE == "sql" else get_session
@@ -0,0 +1,419 @@
+# In-memory columnar snapshot of the ReportedSalary table used by the analytics router.
+# Numeric columns are kept as typed NumPy arrays and the text columns are dictionary
+# encoded (one integer code per row + a sorted array of labels), so every analytics
+# endpoint becomes a handful of vectorized group-bys instead of a round-trip to Postgres.
+import threading
+import numpy as np
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
+from ..database import engine
+from ..models.salary import ReportedSalary
+
+# code used for NULL / empty values in the dictionary encoded columns and for a missing term
+MISSING = -1
+
+ENCODED_COLUMNS = ("company", "location", "university", "role")
+
+
+def _encode(values):
+    # treat empty strings the same as NULL so they never show up as a group
+    values = np.array([value if value else None for value in values], dtype=object)
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), np.asarray(labels, dtype=object)
+
+
+class AnalyticsSnapshot:
+    def __init__(self, rows):
+        self.size = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * 8
+        salary, bonus, year, term, company, location, university, role = columns
+
+        self.salary = np.asarray(salary, dtype=np.float64)
+        self.bonus = np.asarray([np.nan if b is None else b for b in bonus], dtype=np.float64)
+        self.year = np.asarray(year, dtype=np.int32)
+        self.term = np.asarray([MISSING if t is None else t for t in term], dtype=np.int16)
+
+        self.codes = {}
+        self.labels = {}
+        for name, values in zip(ENCODED_COLUMNS, (company, location, university, role)):
+            self.codes[name], self.labels[name] = _encode(values)
+
+        self.sorted_salary = np.sort(self.salary)
+
+    @classmethod
+    def load(cls, session: Session):
+        rows = session.exec(
+            select(
+                ReportedSalary.salary,
+                ReportedSalary.bonus,
+                ReportedSalary.year,
+                ReportedSalary.term,
+                ReportedSalary.company,
+                ReportedSalary.location,
+                ReportedSalary.university,
+                ReportedSalary.role
+            )
+        ).all()
+        return cls(rows)
+
+    def distinct_count(self, column: str) -> int:
+        return len(self.labels[column])
+
+    def mask(self, company=None, location=None, role=None, year_from=None, year_to=None):
+        """Boolean row mask for the optional equality (or, given a tuple, IN) and year range filters"""
+        mask = np.ones(self.size, dtype=bool)
+        for column, value in (("company", company), ("location", location), ("role", role)):
+            if isinstance(value, tuple):
+                mask &= np.isin(self.codes[column], self.lookup_codes(column, value))
+            elif value is not None:
+                codes = self.lookup_codes(column, [value])
+                mask &= self.codes[column] == (codes[0] if len(codes) else MISSING - 1)
+        if year_from is not None:
+            mask &= self.year >= year_from
+        if year_to is not None:
+            mask &= self.year <= year_to
+        return mask
+
+    def lookup_codes(self, column: str, values):
+        """Codes of the given values in a dictionary encoded column, unknown values are skipped"""
+        labels = self.labels[column]
+        values = np.asarray(list(values), dtype=object)
+        codes = np.searchsorted(labels, values) if len(labels) else np.zeros(len(values), dtype=np.int64)
+        found = codes < len(labels)
+        found[found] = labels[codes[found]] == values[found]
+        return codes[found]
+
+    def group_by(self, column: str, mask=None, quantiles=()):
+        """Aggregate salaries per value of a dictionary encoded column"""
+        return self.group_codes(self.codes[column], self.labels[column], mask, quantiles)
+
+    def group_by_year(self, mask=None, quantiles=(), split_by: str | None = None, split_codes=None):
+        """
+        Aggregate salaries per year, or per (value of split_by, year) when split_by is given.
+        Split results carry a "series" array next to the year labels and are ordered by
+        series and then year. split_codes restricts the split to those codes.
+        """
+        years, codes = np.unique(self.year, return_inverse=True)
+        codes = codes.astype(np.int32)
+        if split_by is None:
+            return self.group_codes(codes, years, mask, quantiles)
+
+        series_codes = self.codes[split_by]
+        series_labels = self.labels[split_by]
+        selected = series_codes != MISSING
+        if split_codes is not None:
+            selected &= np.isin(series_codes, split_codes)
+        # one combined code per (series, year) pair, so the whole split is a single group-by
+        combined = np.where(selected, series_codes * len(years) + codes, MISSING).astype(np.int32)
+        stats = self.group_codes(combined, np.arange(len(series_labels) * len(years)), mask, quantiles)
+        pairs = stats["labels"]
+        stats["labels"] = years[pairs % len(years)]
+        stats["series"] = series_labels[pairs // len(years)]
+        return stats
+
+    def group_by_term(self, mask=None, quantiles=()):
+        terms, codes = np.unique(self.term, return_inverse=True)
+        codes = codes.astype(np.int32)
+        # terms are sorted so a missing term can only ever be the first label
+        if len(terms) and terms[0] == MISSING:
+            codes -= 1
+            terms = terms[1:]
+        return self.group_codes(codes, terms, mask, quantiles)
+
+    def group_codes(self, codes, labels, mask=None, quantiles=()):
+        """
+        Count, mean, min, max and (linearly interpolated) quantiles of the salary for every
+        group in one pass. Groups without rows are dropped from the result.
+        """
+        valid = codes != MISSING
+        if mask is not None:
+            valid &= mask
+        group_codes = codes[valid]
+        values = self.salary[valid]
+
+        # sort by group and then salary so each group is a contiguous, ordered slice
+        order = np.lexsort((values, group_codes))
+        group_codes = group_codes[order]
+        values = values[order]
+
+        counts = np.bincount(group_codes, minlength=len(labels))
+        sums = np.bincount(group_codes, weights=values, minlength=len(labels))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+
+        present = counts > 0
+        counts, sums, starts, ends = counts[present], sums[present], starts[present], ends[present]
+
+        stats = {
+            "labels": np.asarray(labels)[present],
+            "count": counts,
+            "mean": sums / counts if len(counts) else sums,
+            "min": values[starts],
+            "max": values[ends - 1],
+            "quantiles": {}
+        }
+        for q in quantiles:
+            position = starts + q * (counts - 1)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, ends - 1)
+            stats["quantiles"][q] = values[lower] + (position - lower) * (values[upper] - values[lower])
+        return stats
+
+
+def top_groups(stats, order_by: str, min_count: int = 1, limit: int | None = None):
+    """Indices into a group_by result ordered by the given statistic, highest first"""
+    eligible = np.flatnonzero(stats["count"] >= min_count)
+    # labels are sorted, so a stable sort breaks ties alphabetically like the SQL engine does
+    ranked = eligible[np.argsort(-stats[order_by][eligible], kind="stable")]
+    return ranked[:limit] if limit is not None else ranked
+
+
+def _top_one(stats, order_by: str, min_count: int = 1):
+    ranked = top_groups(stats, order_by, min_count, limit=1)
+    return ranked[0] if len(ranked) else None
+
+
+# reports from this year onwards count as "recent" in the market insights
+RECENT_YEAR = 2023
+
+
+class SnapshotAnalytics:
+    """Answers the analytics endpoints from an AnalyticsSnapshot, same shapes as SqlAnalytics"""
+
+    def __init__(self, snapshot: AnalyticsSnapshot):
+        self.snapshot = snapshot
+
+    async def overview(self):
+        snapshot = self.snapshot
+        companies = snapshot.group_by("company")
+        top_paying = _top_one(companies, "mean", min_count=3)
+        most_reported = _top_one(companies, "count")
+
+        return {
+            "total_reports": snapshot.size,
+            "avg_salary": round(float(snapshot.salary.mean()), 2) if snapshot.size else 0.0,
+            "median_salary": round(float(np.median(snapshot.sorted_salary)), 2) if snapshot.size else 0.0,
+            "top_paying_company": companies["labels"][top_paying] if top_paying is not None else "N/A",
+            "top_paying_company_avg": round(float(companies["mean"][top_paying]), 2) if top_paying is not None else 0.0,
+            "most_reported_company": companies["labels"][most_reported] if most_reported is not None else "N/A",
+            "most_reported_company_count": int(companies["count"][most_reported]) if most_reported is not None else 0,
+            "total_companies": snapshot.distinct_count("company"),
+            "total_universities": snapshot.distinct_count("university"),
+            "total_locations": snapshot.distinct_count("location")
+        }
+
+    async def salary_trends(self, split_by: str | None = None, series=None, series_limit: int = 10):
+        snapshot = self.snapshot
+        split_codes = None
+        if split_by is not None:
+            if series:
+                split_codes = snapshot.lookup_codes(split_by, series)
+            else:
+                split_codes = top_groups(snapshot.group_by(split_by), "count", limit=series_limit)
+
+        yearly = snapshot.group_by_year(quantiles=(0.25, 0.5, 0.75), split_by=split_by, split_codes=split_codes)
+        quantiles = yearly["quantiles"]
+        series_labels = yearly.get("series", [None] * len(yearly["labels"]))
+        return [
+            {
+                "year": int(year),
+                "series": series_label,
+                "avg_salary": round(float(avg_salary), 2),
+                "median_salary": round(float(median_salary), 2),
+                "p25_salary": round(float(p25_salary), 2),
+                "p75_salary": round(float(p75_salary), 2),
+                "count": int(count)
+            }
+            for year, series_label, avg_salary, median_salary, p25_salary, p75_salary, count in zip(
+                yearly["labels"], series_labels, yearly["mean"],
+                quantiles[0.5], quantiles[0.25], quantiles[0.75], yearly["count"]
+            )
+        ]
+
+    async def top_groups(self, column: str, min_reports: int, limit: int):
+        # NULL and empty values are never encoded as a group
+        group_stats = self.snapshot.group_by(column)
+        return [
+            {
+                column: group_stats["labels"][i],
+                "avg_salary": round(float(group_stats["mean"][i]), 2),
+                "total_reports": int(group_stats["count"][i]),
+                "salary_range_min": round(float(group_stats["min"][i]), 2),
+                "salary_range_max": round(float(group_stats["max"][i]), 2)
+            }
+            for i in top_groups(group_stats, "mean", min_count=min_reports, limit=limit)
+        ]
+
+    async def salary_histogram(self, edges, **filters):
+        """Counts per bucket [edges[i], edges[i + 1]) plus an open ended [edges[-1], inf) bucket"""
+        salaries = self.snapshot.salary[self.snapshot.mask(**filters)]
+        counts, _ = np.histogram(salaries, bins=np.append(np.asarray(edges, dtype=np.float64), np.inf))
+        return [int(count) for count in counts], len(salaries)
+
+    async def company_comparison(self, company_list, quantile_points=()):
+        snapshot = self.snapshot
+        codes = snapshot.lookup_codes("company", company_list)
+        mask = np.isin(snapshot.codes["company"], codes)
+        stats = snapshot.group_by("company", mask, quantiles=(0.5, *quantile_points))
+
+        result = {}
+        for i, company in enumerate(stats["labels"]):
+            result[company] = {
+                "avg_salary": round(float(stats["mean"][i]), 2),
+                "median_salary": round(float(stats["quantiles"][0.5][i]), 2),
+                "min_salary": round(float(stats["min"][i]), 2),
+                "max_salary": round(float(stats["max"][i]), 2),
+                "total_reports": int(stats["count"][i])
+            }
+            if quantile_points:
+                result[company]["salary_quantiles"] = [
+                    round(float(stats["quantiles"][q][i]), 2) for q in quantile_points
+                ]
+
+        return result
+
+    async def company_histograms(self, company_list, edges):
+        """Per company counts over shared buckets, see salary_histogram"""
+        snapshot = self.snapshot
+        codes = snapshot.lookup_codes("company", company_list)
+        labels = snapshot.labels["company"]
+        bins = np.append(np.asarray(edges, dtype=np.float64), np.inf)
+
+        result = {}
+        for code in codes:
+            salaries = snapshot.salary[snapshot.codes["company"] == code]
+            counts, _ = np.histogram(salaries, bins=bins)
+            result[labels[code]] = [int(count) for count in counts]
+        return result
+
+    async def yearly_counts(self):
+        yearly = self.snapshot.group_by_year()
+        return [(int(year), int(count)) for year, count in zip(yearly["labels"], yearly["count"])]
+
+    async def salary_by_term(self):
+        term_data = self.snapshot.group_by_term()
+        return [
+            {"term": int(term), "avg_salary": round(float(avg_salary), 2), "total_reports": int(count)}
+            for term, avg_salary, count in zip(term_data["labels"], term_data["mean"], term_data["count"])
+        ]
+
+    async def market_insights(self):
+        snapshot = self.snapshot
+        total_reports = snapshot.size
+
+        if total_reports:
+            # linear interpolation, the same as percentile_cont in the SQL engine
+            percentile_25, percentile_75, percentile_90 = np.quantile(snapshot.sorted_salary, [0.25, 0.75, 0.9])
+        else:
+            percentile_25 = percentile_75 = percentile_90 = 0.0
+
+        recent = snapshot.year >= RECENT_YEAR
+        recent_avg = float(snapshot.salary[recent].mean()) if recent.any() else 0.0
+        older_avg = float(snapshot.salary[~recent].mean()) if (~recent).any() else 0.0
+
+        roles = snapshot.group_by("role")
+        most_common_role = _top_one(roles, "count")
+        locations = snapshot.group_by("location")
+        top_location = _top_one(locations, "count")
+
+        return {
+            "total_reports": total_reports,
+            "salary_percentiles": {
+                "25th": round(float(percentile_25), 2),
+                "75th": round(float(percentile_75), 2),
+                "90th": round(float(percentile_90), 2)
+            },
+            "recent_vs_older": {
+                "recent_avg": round(recent_avg, 2),
+                "older_avg": round(older_avg, 2),
+                "improvement": round(((recent_avg - older_avg) / older_avg * 100), 1) if older_avg > 0 else 0.0
+            },
+            "most_common_role": {
+                "role": roles["labels"][most_common_role] if most_common_role is not None else "N/A",
+                "count": int(roles["count"][most_common_role]) if most_common_role is not None else 0
+            },
+            "top_location_by_opportunities": {
+                "location": locations["labels"][top_location] if top_location is not None else "N/A",
+                "count": int(locations["count"][top_location]) if top_location is not None else 0
+            }
+        }
+
+    async def profile(self, column: str, values, top_columns=()):
+        """Entity page stats for the rows where column is one of values, see SqlAnalytics.profile"""
+        snapshot = self.snapshot
+        mask = np.isin(snapshot.codes[column], snapshot.lookup_codes(column, values))
+        salaries = np.sort(snapshot.salary[mask])
+        if not len(salaries):
+            return None
+
+        p25_salary, median_salary, p75_salary = np.quantile(salaries, [0.25, 0.5, 0.75])
+        years = snapshot.group_by_year(mask, quantiles=(0.25, 0.5, 0.75))
+        terms = snapshot.group_by_term(mask)
+
+        result = {
+            "total_reports": len(salaries),
+            "avg_salary": round(float(salaries.mean()), 2),
+            "median_salary": round(float(median_salary), 2),
+            "p25_salary": round(float(p25_salary), 2),
+            "p75_salary": round(float(p75_salary), 2),
+            "min_salary": round(float(salaries[0]), 2),
+            "max_salary": round(float(salaries[-1]), 2),
+            "years": [
+                {
+                    "year": int(year),
+                    "avg_salary": round(float(avg_salary), 2),
+                    "median_salary": round(float(median), 2),
+                    "p25_salary": round(float(p25), 2),
+                    "p75_salary": round(float(p75), 2),
+                    "count": int(count)
+                }
+                for year, avg_salary, median, p25, p75, count in zip(
+                    years["labels"], years["mean"], years["quantiles"][0.5],
+                    years["quantiles"][0.25], years["quantiles"][0.75], years["count"]
+                )
+            ],
+            "terms": [
+                {"term": int(term), "avg_salary": round(float(avg_salary), 2), "total_reports": int(count)}
+                for term, avg_salary, count in zip(terms["labels"], terms["mean"], terms["count"])
+            ]
+        }
+        for top_column in top_columns:
+            stats = snapshot.group_by(top_column, mask)
+            top = _top_one(stats, "count")
+            result[f"top_{top_column}"] = stats["labels"][top] if top is not None else None
+        return result
+
+
+# The current snapshot. Readers grab the reference once per request, and a rebuild swaps
+# in a fully constructed snapshot, so a request never sees a half-built one. Builds read the
+# whole table through the sync engine, async callers run them in the threadpool.
+_snapshot: AnalyticsSnapshot | None = None
+_lock = threading.Lock()
+
+
+def rebuild_snapshot() -> AnalyticsSnapshot:
+    with _lock:
+        return _build_locked()
+
+
+async def get_snapshot() -> AnalyticsSnapshot:
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+    return await run_in_threadpool(_get_or_build)
+
+
+def _get_or_build() -> AnalyticsSnapshot:
+    with _lock:
+        # another request may have built it while we were waiting for the lock
+        if _snapshot is None:
+            return _build_locked()
+        return _snapshot
+
+
+def _build_locked() -> AnalyticsSnapshot:
+    global _snapshot
+    with Session(engine) as session:
+        _snapshot = AnalyticsSnapshot.load(session)
+    return _snapshot
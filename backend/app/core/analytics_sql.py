@@ -0,0 +1,436 @@
+# Analytics computed directly in the database. Used instead of the in-memory snapshot when
+# ANALYTICS_ENGINE=sql, e.g. when several replicas serve traffic and a per-process snapshot
+# would go stale after an approval on another replica. Every method returns the same shapes
+# as SnapshotAnalytics.
+from sqlalchemy import String, case, cast, literal, null, true, union_all
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.salary import ReportedSalary
+from .sql_stats import bucket_index, percentile_cont, rank_columns
+
+# reports from this year onwards count as "recent" in the market insights
+RECENT_YEAR = 2023
+
+
+def filter_clauses(company=None, location=None, role=None, year_from=None, year_to=None):
+    """WHERE clauses for the optional equality (or, given a tuple, IN) and year range filters"""
+    clauses = []
+    for column, value in ((ReportedSalary.company, company), (ReportedSalary.location, location), (ReportedSalary.role, role)):
+        if isinstance(value, tuple):
+            clauses.append(column.in_(value))
+        elif value is not None:
+            clauses.append(column == value)
+    if year_from is not None:
+        clauses.append(ReportedSalary.year >= year_from)
+    if year_to is not None:
+        clauses.append(ReportedSalary.year <= year_to)
+    return clauses
+
+
+class SqlAnalytics:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def overview(self):
+        base = select(
+            ReportedSalary.id,
+            ReportedSalary.salary,
+            ReportedSalary.company,
+            ReportedSalary.university,
+            ReportedSalary.location,
+            *rank_columns(self.session, ReportedSalary.salary)
+        ).cte("base")
+
+        totals = select(
+            func.count().label("total_reports"),
+            func.avg(base.c.salary).label("avg_salary"),
+            percentile_cont(self.session, 0.5, base).label("median_salary"),
+            func.count(func.distinct(func.nullif(base.c.company, ""))).label("total_companies"),
+            func.count(func.distinct(func.nullif(base.c.university, ""))).label("total_universities"),
+            func.count(func.distinct(func.nullif(base.c.location, ""))).label("total_locations")
+        ).cte("totals")
+
+        company_stats = select(
+            base.c.company,
+            func.avg(base.c.salary).label("avg_salary"),
+            func.count(base.c.id).label("reports")
+        ).group_by(base.c.company).cte("company_stats")
+
+        top_paying = (
+            select(company_stats.c.company, company_stats.c.avg_salary)
+            .where(company_stats.c.reports >= 3)
+            .order_by(company_stats.c.avg_salary.desc(), company_stats.c.company)
+            .limit(1)
+            .cte("top_paying")
+        )
+        most_reported = (
+            select(company_stats.c.company, company_stats.c.reports)
+            .order_by(company_stats.c.reports.desc(), company_stats.c.company)
+            .limit(1)
+            .cte("most_reported")
+        )
+
+        row = (await self.session.exec(
+            select(
+                totals,
+                top_paying.c.company.label("top_paying_company"),
+                top_paying.c.avg_salary.label("top_paying_company_avg"),
+                most_reported.c.company.label("most_reported_company"),
+                most_reported.c.reports.label("most_reported_company_count")
+            )
+            .select_from(totals)
+            .outerjoin(top_paying, true())
+            .outerjoin(most_reported, true())
+        )).one()
+
+        return {
+            "total_reports": row.total_reports,
+            "avg_salary": round(row.avg_salary or 0.0, 2),
+            "median_salary": round(row.median_salary or 0.0, 2),
+            "top_paying_company": row.top_paying_company or "N/A",
+            "top_paying_company_avg": round(row.top_paying_company_avg or 0.0, 2),
+            "most_reported_company": row.most_reported_company or "N/A",
+            "most_reported_company_count": row.most_reported_company_count or 0,
+            "total_companies": row.total_companies,
+            "total_universities": row.total_universities,
+            "total_locations": row.total_locations
+        }
+
+    async def salary_trends(self, split_by: str | None = None, series=None, series_limit: int = 10):
+        group = getattr(ReportedSalary, split_by) if split_by else None
+        partition = [ReportedSalary.year] if group is None else [group, ReportedSalary.year]
+        query = select(
+            *partition,
+            ReportedSalary.salary,
+            *rank_columns(self.session, ReportedSalary.salary, partition_by=partition)
+        )
+        if group is not None:
+            query = query.where(group.is_not(None)).where(group != "")
+            if series:
+                query = query.where(group.in_(series))
+            else:
+                top_series = (
+                    select(group)
+                    .where(group.is_not(None))
+                    .where(group != "")
+                    .group_by(group)
+                    .order_by(func.count(ReportedSalary.id).desc(), group)
+                    .limit(series_limit)
+                )
+                query = query.where(group.in_(top_series.scalar_subquery()))
+        base = query.cte("base")
+
+        keys = [base.c[column.key] for column in partition]
+        rows = (await self.session.exec(
+            select(
+                *keys,
+                func.avg(base.c.salary).label("avg_salary"),
+                func.count().label("count"),
+                percentile_cont(self.session, 0.5, base).label("median_salary"),
+                percentile_cont(self.session, 0.25, base).label("p25_salary"),
+                percentile_cont(self.session, 0.75, base).label("p75_salary")
+            )
+            .group_by(*keys)
+            .order_by(*keys)
+        )).all()
+
+        return [
+            {
+                "year": row.year,
+                "series": row[0] if group is not None else None,
+                "avg_salary": round(row.avg_salary, 2),
+                "median_salary": round(row.median_salary, 2),
+                "p25_salary": round(row.p25_salary, 2),
+                "p75_salary": round(row.p75_salary, 2),
+                "count": row.count
+            }
+            for row in rows
+        ]
+
+    async def top_groups(self, column: str, min_reports: int, limit: int):
+        group = getattr(ReportedSalary, column)
+        query = select(
+            group,
+            func.avg(ReportedSalary.salary),
+            func.count(ReportedSalary.id),
+            func.min(ReportedSalary.salary),
+            func.max(ReportedSalary.salary)
+        ).where(group.is_not(None)).where(group != "")
+
+        group_stats = (await self.session.exec(
+            query
+            .group_by(group)
+            .having(func.count(ReportedSalary.id) >= min_reports)
+            .order_by(func.avg(ReportedSalary.salary).desc(), group)
+            .limit(limit)
+        )).all()
+
+        return [
+            {
+                column: label,
+                "avg_salary": round(avg_salary, 2),
+                "total_reports": count,
+                "salary_range_min": round(min_salary, 2),
+                "salary_range_max": round(max_salary, 2)
+            }
+            for label, avg_salary, count, min_salary, max_salary in group_stats
+        ]
+
+    async def salary_histogram(self, edges, **filters):
+        """Counts per bucket [edges[i], edges[i + 1]) plus an open ended [edges[-1], inf) bucket"""
+        buckets = (
+            select(bucket_index(self.session, ReportedSalary.salary, edges).label("bucket"))
+            .where(*filter_clauses(**filters))
+            .cte("buckets")
+        )
+        rows = (await self.session.exec(
+            select(buckets.c.bucket, func.count()).group_by(buckets.c.bucket)
+        )).all()
+
+        counts = [0] * len(edges)
+        for index, count in rows:
+            if index >= 0:
+                counts[index] = count
+        return counts, sum(count for _, count in rows)
+
+    async def company_comparison(self, company_list, quantile_points=()):
+        base = (
+            select(
+                ReportedSalary.company,
+                ReportedSalary.salary,
+                *rank_columns(self.session, ReportedSalary.salary, partition_by=[ReportedSalary.company])
+            )
+            .where(ReportedSalary.company.in_(company_list))
+            .cte("base")
+        )
+        rows = (await self.session.exec(
+            select(
+                base.c.company,
+                func.avg(base.c.salary).label("avg_salary"),
+                percentile_cont(self.session, 0.5, base).label("median_salary"),
+                func.min(base.c.salary).label("min_salary"),
+                func.max(base.c.salary).label("max_salary"),
+                func.count().label("total_reports"),
+                *[percentile_cont(self.session, q, base) for q in quantile_points]
+            )
+            .group_by(base.c.company)
+            .order_by(base.c.company)
+        )).all()
+
+        result = {}
+        for row in rows:
+            result[row.company] = {
+                "avg_salary": round(row.avg_salary, 2),
+                "median_salary": round(row.median_salary, 2),
+                "min_salary": round(row.min_salary, 2),
+                "max_salary": round(row.max_salary, 2),
+                "total_reports": row.total_reports
+            }
+            if quantile_points:
+                result[row.company]["salary_quantiles"] = [round(value, 2) for value in row[6:]]
+
+        return result
+
+    async def company_histograms(self, company_list, edges):
+        """Per company counts over shared buckets, see salary_histogram"""
+        buckets = (
+            select(
+                ReportedSalary.company,
+                bucket_index(self.session, ReportedSalary.salary, edges).label("bucket")
+            )
+            .where(ReportedSalary.company.in_(company_list))
+            .cte("buckets")
+        )
+        rows = (await self.session.exec(
+            select(buckets.c.company, buckets.c.bucket, func.count())
+            .group_by(buckets.c.company, buckets.c.bucket)
+        )).all()
+
+        result = {}
+        for company, index, count in rows:
+            counts = result.setdefault(company, [0] * len(edges))
+            if index >= 0:
+                counts[index] = count
+        return result
+
+    async def yearly_counts(self):
+        return (await self.session.exec(
+            select(
+                ReportedSalary.year,
+                func.count(ReportedSalary.id)
+            )
+            .group_by(ReportedSalary.year)
+            .order_by(ReportedSalary.year)
+        )).all()
+
+    async def salary_by_term(self):
+        term_data = (await self.session.exec(
+            select(
+                ReportedSalary.term,
+                func.avg(ReportedSalary.salary),
+                func.count(ReportedSalary.id)
+            )
+            .where(ReportedSalary.term.is_not(None))
+            .group_by(ReportedSalary.term)
+            .order_by(ReportedSalary.term)
+        )).all()
+
+        return [
+            {"term": term, "avg_salary": round(avg_salary, 2), "total_reports": count}
+            for term, avg_salary, count in term_data
+        ]
+
+    async def market_insights(self):
+        base = select(
+            ReportedSalary.id,
+            ReportedSalary.salary,
+            ReportedSalary.year,
+            ReportedSalary.role,
+            ReportedSalary.location,
+            *rank_columns(self.session, ReportedSalary.salary)
+        ).cte("base")
+
+        recent = base.c.year >= RECENT_YEAR
+        totals = select(
+            func.count().label("total_reports"),
+            percentile_cont(self.session, 0.25, base).label("p25"),
+            percentile_cont(self.session, 0.75, base).label("p75"),
+            percentile_cont(self.session, 0.9, base).label("p90"),
+            func.avg(case((recent, base.c.salary))).label("recent_avg"),
+            func.avg(case((~recent, base.c.salary))).label("older_avg")
+        ).cte("totals")
+
+        top_role = (
+            select(base.c.role, func.count(base.c.id).label("reports"))
+            .group_by(base.c.role)
+            .order_by(func.count(base.c.id).desc(), base.c.role)
+            .limit(1)
+            .cte("top_role")
+        )
+        top_location = (
+            select(base.c.location, func.count(base.c.id).label("reports"))
+            .where(base.c.location.is_not(None))
+            .where(base.c.location != "")
+            .group_by(base.c.location)
+            .order_by(func.count(base.c.id).desc(), base.c.location)
+            .limit(1)
+            .cte("top_location")
+        )
+
+        row = (await self.session.exec(
+            select(
+                totals,
+                top_role.c.role,
+                top_role.c.reports.label("role_reports"),
+                top_location.c.location,
+                top_location.c.reports.label("location_reports")
+            )
+            .select_from(totals)
+            .outerjoin(top_role, true())
+            .outerjoin(top_location, true())
+        )).one()
+
+        recent_avg = row.recent_avg or 0.0
+        older_avg = row.older_avg or 0.0
+        return {
+            "total_reports": row.total_reports,
+            "salary_percentiles": {
+                "25th": round(row.p25 or 0.0, 2),
+                "75th": round(row.p75 or 0.0, 2),
+                "90th": round(row.p90 or 0.0, 2)
+            },
+            "recent_vs_older": {
+                "recent_avg": round(recent_avg, 2),
+                "older_avg": round(older_avg, 2),
+                "improvement": round(((recent_avg - older_avg) / older_avg * 100), 1) if older_avg > 0 else 0.0
+            },
+            "most_common_role": {
+                "role": row.role or "N/A",
+                "count": row.role_reports or 0
+            },
+            "top_location_by_opportunities": {
+                "location": row.location or "N/A",
+                "count": row.location_reports or 0
+            }
+        }
+
+    async def profile(self, column: str, values, top_columns=()):
+        """
+        Everything an entity page shows for the rows where column is one of values: overall
+        stats and percentiles, a year series, a term breakdown and the most reported value of
+        each of top_columns. One UNION ALL statement over a shared CTE. None when no rows match.
+        """
+        base = (
+            select(
+                ReportedSalary.salary,
+                ReportedSalary.year,
+                ReportedSalary.term,
+                *[getattr(ReportedSalary, top_column) for top_column in top_columns],
+                *rank_columns(self.session, ReportedSalary.salary),
+                *rank_columns(self.session, ReportedSalary.salary, partition_by=[ReportedSalary.year], name="salary_by_year")
+            )
+            .where(getattr(ReportedSalary, column).in_(values))
+            .cte("base")
+        )
+
+        def branch(kind, key=None, ranks=None):
+            percentiles = [
+                (percentile_cont(self.session, q, base, ranks=ranks) if ranks else null()).label(name)
+                for q, name in ((0.25, "p25_salary"), (0.5, "median_salary"), (0.75, "p75_salary"))
+            ]
+            query = select(
+                literal(kind).label("kind"),
+                (cast(key, String) if key is not None else null()).label("key"),
+                func.count().label("count"),
+                func.avg(base.c.salary).label("avg_salary"),
+                func.min(base.c.salary).label("min_salary"),
+                func.max(base.c.salary).label("max_salary"),
+                *percentiles
+            )
+            return query.group_by(key) if key is not None else query
+
+        rows = (await self.session.exec(union_all(
+            branch("all", ranks="salary"),
+            branch("year", base.c.year, ranks="salary_by_year"),
+            branch("term", base.c.term),
+            *[branch(top_column, base.c[top_column]) for top_column in top_columns]
+        ))).all()
+
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[0], []).append(row)
+        overall = groups["all"][0]
+        if not overall.count:
+            return None
+
+        result = {
+            "total_reports": overall.count,
+            "avg_salary": round(overall.avg_salary, 2),
+            "median_salary": round(overall.median_salary, 2),
+            "p25_salary": round(overall.p25_salary, 2),
+            "p75_salary": round(overall.p75_salary, 2),
+            "min_salary": round(overall.min_salary, 2),
+            "max_salary": round(overall.max_salary, 2),
+            "years": [
+                {
+                    "year": int(row.key),
+                    "avg_salary": round(row.avg_salary, 2),
+                    "median_salary": round(row.median_salary, 2),
+                    "p25_salary": round(row.p25_salary, 2),
+                    "p75_salary": round(row.p75_salary, 2),
+                    "count": row.count
+                }
+                for row in sorted(groups.get("year", []), key=lambda row: int(row.key))
+            ],
+            "terms": [
+                {"term": int(row.key), "avg_salary": round(row.avg_salary, 2), "total_reports": row.count}
+                for row in sorted(groups.get("term", []), key=lambda row: int(row.key) if row.key is not None else 0)
+                if row.key is not None
+            ]
+        }
+        for top_column in top_columns:
+            # most reports first, ties alphabetically like every other top-N
+            candidates = [row for row in groups.get(top_column, []) if row.key]
+            top = min(candidates, key=lambda row: (-row.count, row.key), default=None)
+            result[f"top_{top_column}"] = top.key if top else None
+        return result
@@ -0,0 +1,24 @@
+# Everything that has to happen after ReportedSalary changes (an approval, a bulk load).
+# Write paths call mark_dataset_changed() once their transaction has committed, passing the
+# salary when a single one was added so the search index can be updated instead of rebuilt.
+from fastapi.concurrency import run_in_threadpool
+from ..config import ANALYTICS_ENGINE
+from . import aliases, location_hierarchy, salary_counts, search_index
+from ..models.salary import ReportedSalary
+from .response_cache import bump_dataset_version
+from .analytics_snapshot import rebuild_snapshot
+
+
+async def mark_dataset_changed(added: ReportedSalary | None = None):
+    salary_counts.clear()
+    location_hierarchy.clear()
+    aliases.clear()
+    if added is not None:
+        search_index.record(added)
+    else:
+        search_index.clear()
+    if ANALYTICS_ENGINE == "snapshot":
+        # swap in a fresh analytics snapshot that includes the new rows
+        await run_in_threadpool(rebuild_snapshot)
+    # last, so nothing computed from the old data can be cached under the new version
+    bump_dataset_version()
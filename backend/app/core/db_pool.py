@@ -0,0 +1,80 @@
+# Connection pool telemetry for /admin/pool-stats. SQLAlchemy reports the pool's current
+# occupancy but not how long requests waited for a connection, so the session dependency
+# times its checkout and records it here.
+import threading
+import time
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class CheckoutStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+
+checkout_stats = CheckoutStats()
+
+
+async def checkout_connection(session):
+    """Check out the session's connection now, timing the wait on the pool"""
+    started = time.perf_counter()
+    try:
+        connection = await session.connection()
+    except PoolTimeoutError:
+        checkout_stats.record_timeout()
+        raise
+    checkout_stats.record(time.perf_counter() - started)
+    return connection
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    # QueuePool and its async variant, the SQLite stand-in may use a pool without these
+    if hasattr(pool, "checkedout"):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # negative while the pool itself isn't full yet
+            "overflow": max(pool.overflow(), 0)
+        })
+    return status
+
+
+# Postgres cancels a statement that runs past statement_timeout with SQLSTATE 57014
+QUERY_CANCELED = "57014"
+
+
+async def database_timeout_handler(request, exc):
+    """503 instead of a 500 when the pool is exhausted or a statement hit its timeout"""
+    if isinstance(exc, PoolTimeoutError):
+        detail = "Database is busy, try again shortly"
+    elif (getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)) == QUERY_CANCELED:
+        detail = "Query took too long"
+    else:
+        raise exc
+    return JSONResponse(status_code=503, content={"detail": detail}, headers={"Retry-After": "5"})
@@ -0,0 +1,154 @@
+# Background jobs for admin operations that take longer than a request should (bulk loads).
+# A job runs on a worker thread of its own executor, so pandas and the sync engine never hold
+# up the event loop or the threadpool request handlers use, and the request that started it
+# returns the job id right away. The job reports progress and checks for cancellation through
+# the Job it is handed, a load does both after every committed chunk.
+#
+# Threads rather than processes: the work is pandas and database round trips, which release
+# the GIL, and a thread shares the process's engine, caches and the cancel flag.
+# Jobs only live in the process that runs them, with several workers or replicas the status
+# of a job is known to the one that started it.
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel
+from ..config import JOB_HISTORY, JOB_WORKERS
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that was cancelled, by Job.check_cancelled()"""
+
+
+class JobInfo(BaseModel):
+    id: str
+    name: str
+    status: JobStatus
+    progress: int
+    result: int | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class Job:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = JobStatus.QUEUED
+        # units of work done, rows read for a load
+        self.progress = 0
+        # what the work returned, a job may also set it along the way so a cancelled or
+        # failed job still tells what it got done (rows written for a load)
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+
+    def report(self, progress: int, result=None):
+        """Called by the work between steps, raises JobCancelled once the job was cancelled"""
+        self.progress = progress
+        if result is not None:
+            self.result = result
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def cancel(self) -> bool:
+        """Ask the job to stop at its next step, False if it has already finished"""
+        if self.status in FINISHED:
+            return False
+        self._cancelled.set()
+        return True
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            id=self.id, name=self.name, status=self.status, progress=self.progress, result=self.result,
+            error=self.error, created_at=self.created_at, started_at=self.started_at, finished_at=self.finished_at
+        )
+
+
+class JobRunner:
+    def __init__(self, workers: int, history: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._history = history
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        # the asyncio tasks waiting on running jobs, kept so they aren't garbage collected
+        self._tasks = set()
+
+    def submit(self, name: str, work, on_finished=None) -> Job:
+        """
+        Run work(job) on a worker thread. on_finished(job) is awaited on the event loop once
+        the work has stopped, whether it succeeded, failed or was cancelled, and before the
+        job shows as finished (a load marks the dataset changed there).
+        """
+        job = Job(name)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status not in FINISHED:
+                break
+            self._jobs.popitem(last=False)
+        task = asyncio.get_running_loop().create_task(self._run(job, work, on_finished))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, work, on_finished):
+        status, error = JobStatus.SUCCEEDED, None
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self._work, job, work)
+            job.result = result
+        except JobCancelled:
+            status = JobStatus.CANCELLED
+        except Exception as exc:
+            status, error = JobStatus.FAILED, f"{type(exc).__name__}: {exc}"
+        if on_finished is not None:
+            try:
+                await on_finished(job)
+            except Exception as exc:
+                status, error = JobStatus.FAILED, error or f"{type(exc).__name__}: {exc}"
+        job.status, job.error, job.finished_at = status, error, datetime.utcnow()
+        if error:
+            print(f"Job {job.name} ({job.id}) failed: {error}")
+
+    @staticmethod
+    def _work(job: Job, work):
+        # cancelled while it was queued
+        job.check_cancelled()
+        job.status, job.started_at = JobStatus.RUNNING, datetime.utcnow()
+        return work(job)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Newest first"""
+        return list(reversed(self._jobs.values()))
+
+    def shutdown(self):
+        for job in self._jobs.values():
+            job.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+jobs = JobRunner(JOB_WORKERS, JOB_HISTORY)
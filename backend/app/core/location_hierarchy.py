@@ -0,0 +1,89 @@
+# Rollups for locations. Reported locations look like "Toronto, ON", "Bay Area, CA", "Canada"
+# (country only) or "Remote", so each one is parsed once into city -> province -> country and
+# the members of every province and country are kept, a rollup is then a dict lookup and an
+# IN (...) over the location index instead of a LIKE '%, ON' scan. "Remote" has no province or
+# country and is never rolled into one, rolling it up returns just the remote reports.
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.salary import ReportedSalary
+
+LEVELS = ("city", "province", "country")
+
+CANADIAN_PROVINCES = {"AB", "BC", "MB", "NB", "NL", "NS", "NT", "NU", "ON", "PE", "QC", "SK", "YT"}
+US_STATES = {
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DC", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA",
+    "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM",
+    "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA",
+    "WV", "WI", "WY"
+}
+COUNTRIES = {"Canada": CANADIAN_PROVINCES, "United States": US_STATES}
+
+
+def parse_location(location: str):
+    """The {level: value} path of a reported location, None for the levels it doesn't have"""
+    path = {"city": location, "province": None, "country": None}
+    name = location.strip()
+    if name in COUNTRIES:
+        path["country"] = name
+        return path
+    _, _, suffix = name.rpartition(",")
+    province = suffix.strip().upper()
+    for country, provinces in COUNTRIES.items():
+        if province in provinces and suffix != name:
+            path["province"] = province
+            path["country"] = country
+    return path
+
+
+class LocationHierarchy:
+    def __init__(self, locations):
+        self.paths = {location: parse_location(location) for location in locations if location}
+        self.members = {}
+        for location, path in sorted(self.paths.items()):
+            for level in ("province", "country"):
+                if path[level] is not None:
+                    self.members.setdefault((level, path[level]), []).append(location)
+
+    @classmethod
+    async def load(cls, session: AsyncSession):
+        return cls((await session.exec(select(ReportedSalary.location).distinct())).all())
+
+    def resolve(self, name: str, level: str = "city"):
+        """
+        The (label, locations) a profile at this level covers. name is either a reported
+        location, whose province or country is used, or a province code / country itself.
+        Locations without that level (e.g. "Remote") stay on their own. None if unknown.
+        """
+        path = self.paths.get(name)
+        if path is not None:
+            key = path[level]
+            if key is None or level == "city":
+                return name, [name]
+        else:
+            key = name.strip().upper() if level == "province" else name.strip()
+        members = self.members.get((level, key))
+        return (key, members) if members else None
+
+
+# The current hierarchy, rebuilt lazily after mark_dataset_changed() clears it. Two requests
+# racing to build it both read the (small) distinct location list, and a build that started
+# before a clear() is used for its own request but not kept.
+_hierarchy: LocationHierarchy | None = None
+_generation = 0
+
+
+async def get_hierarchy(session: AsyncSession) -> LocationHierarchy:
+    global _hierarchy
+    hierarchy = _hierarchy
+    if hierarchy is None:
+        generation = _generation
+        hierarchy = await LocationHierarchy.load(session)
+        if generation == _generation:
+            _hierarchy = hierarchy
+    return hierarchy
+
+
+def clear():
+    global _hierarchy, _generation
+    _generation += 1
+    _hierarchy = None
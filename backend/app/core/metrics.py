@@ -0,0 +1,193 @@
+# Request and database metrics in the Prometheus text format, served at /metrics. No client
+# library: a handful of counters and histograms behind a lock, rendered on scrape.
+#
+# MetricsMiddleware (middleware.py) times every request and labels it with the route's path
+# template ("/company/{company}/profile", not the URL, so the label set stays bounded). The
+# cursor execute hooks installed on both engines by database.py count statements and the time
+# spent in them, process wide and for the request they ran in, so a route whose statements
+# per request grow with its input (an N+1) shows up in http_request_db_statements.
+#
+# Metrics are per process: with several workers or replicas Prometheus scrapes each of them
+# and sum() adds them up.
+import bisect
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# requests the router found no route for, one label for all of them
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # per bucket, not cumulative, the rendering adds them up
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+
+
+class QueryStats:
+    """Statements run on behalf of one request, filled in by the engine hooks"""
+
+    __slots__ = ("statements", "seconds", "scope")
+
+    def __init__(self, scope):
+        self.statements = 0
+        self.seconds = 0.0
+        self.scope = scope
+
+
+# set by the middleware for the duration of a request. Handlers' sync dependencies run in
+# the threadpool with a copy of the context, which still points at the same QueryStats.
+_request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()      # (method, route, status)
+        self.latency = {}              # (method, route) -> Histogram
+        self.statements = {}           # (method, route) -> Histogram
+        self.db_seconds = Counter()    # (method, route)
+        self.in_flight = Counter()     # method
+        self.queries = Counter()       # engine
+        self.query_seconds = Counter()  # engine
+
+    def request_started(self, scope) -> QueryStats:
+        with self._lock:
+            self.in_flight[scope["method"]] += 1
+        queries = QueryStats(scope)
+        _request_queries.set(queries)
+        return queries
+
+    def request_finished(self, method: str, route: str, status: int, elapsed: float, queries: QueryStats):
+        _request_queries.set(None)
+        key = (method, route)
+        with self._lock:
+            self.in_flight[method] -= 1
+            self.requests[(method, route, status)] += 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+            self.latency[key].observe(elapsed)
+            self.statements[key].observe(queries.statements)
+            self.db_seconds[key] += queries.seconds
+
+    def record_query(self, engine: str, elapsed: float):
+        with self._lock:
+            self.queries[engine] += 1
+            self.query_seconds[engine] += elapsed
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.statements += 1
+            queries.seconds += elapsed
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name: str, kind: str, description: str, label_names, samples):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, value in samples:
+                lines.append(f"{name}{{{_labels(label_names, values)}}} {_number(value)}")
+
+        def histogram(name: str, description: str, label_names, histograms):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for values, histogram in histograms:
+                labels = _labels(label_names, values)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{_number(float(bound))}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {_number(float(histogram.sum))}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        with self._lock:
+            family(
+                "http_requests_total", "counter", "Requests by route and status code.",
+                ("method", "route", "status"), sorted(self.requests.items())
+            )
+            family(
+                "http_requests_in_flight", "gauge", "Requests being handled right now.",
+                ("method",), sorted(((method,), count) for method, count in self.in_flight.items())
+            )
+            histogram(
+                "http_request_duration_seconds", "Time from receiving a request to sending the last of its response.",
+                ("method", "route"), sorted(self.latency.items())
+            )
+            histogram(
+                "http_request_db_statements", "SQL statements executed per request.",
+                ("method", "route"), sorted(self.statements.items())
+            )
+            family(
+                "http_request_db_seconds_total", "counter", "Time spent executing SQL statements, by route.",
+                ("method", "route"), sorted(self.db_seconds.items())
+            )
+            family(
+                "db_statements_total", "counter", "SQL statements executed, requests, jobs and startup alike.",
+                ("engine",), sorted(((engine,), count) for engine, count in self.queries.items())
+            )
+            family(
+                "db_statement_seconds_total", "counter", "Time spent executing SQL statements.",
+                ("engine",), sorted(((engine,), seconds) for engine, seconds in self.query_seconds.items())
+            )
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def route_of(scope) -> str:
+    # the router puts the matched route in the scope, which is shared all the way down
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+def current_route() -> str | None:
+    """The route template of the request the caller runs for, None outside of requests"""
+    queries = _request_queries.get()
+    return route_of(queries.scope) if queries is not None else None
+
+
+def instrument_engine(engine, name: str):
+    """
+    Count the statements of a (sync) engine, for an AsyncEngine pass its sync_engine. name is
+    the engine label of the db_* metrics.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # on the execution context rather than the connection, a statement that raises
+        # never reaches after_cursor_execute and would leave its start time behind
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.record_query(name, time.perf_counter() - context._metrics_started)
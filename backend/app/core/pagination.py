@@ -0,0 +1,102 @@
+# Keyset (cursor) pagination. Rows are ordered on a key of columns ending in the id (newest
+# year first for ReportedSalary lists, oldest submission first for the moderation queue), and
+# a cursor remembers the key of the row a page ended on, so fetching page 1000 costs the same
+# index range scan as fetching page 1.
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+from sqlmodel import asc, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.pending_salary import PendingSalary
+from ..models.salary import ReportedSalary
+
+# the key columns by their name in the cursor
+SALARY_KEY = {"y": ReportedSalary.year, "i": ReportedSalary.id}
+PENDING_KEY = {"s": PendingSalary.submitted_at, "i": PendingSalary.id}
+
+
+class SalaryPage(BaseModel):
+    data: list[ReportedSalary]
+    total: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+class PendingPage(BaseModel):
+    data: list[PendingSalary]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def encode_cursor(row, key: dict, direction: str) -> str:
+    values = {name: getattr(row, column.key) for name, column in key.items()}
+    values = {name: value.isoformat() if isinstance(value, datetime) else value for name, value in values.items()}
+    payload = json.dumps({"d": direction, **values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: dict):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        direction = payload["d"]
+        values = [
+            datetime.fromisoformat(payload[name]) if column.type.python_type is datetime
+            else column.type.python_type(payload[name])
+            for name, column in key.items()
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if direction not in ("next", "prev"):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return direction, values
+
+
+async def paginate(session: AsyncSession, query, key: dict, limit: int, cursor: str | None = None, descending: bool = True):
+    """
+    Run a select() query one page at a time, ordered on the key columns. Returns the rows of
+    the page and the cursors for the pages before and after it (None at either end).
+    """
+    columns = list(key.values())
+    row_key = tuple_(*columns)
+    direction = "next"
+    if cursor:
+        direction, values = decode_cursor(cursor, key)
+        # a next page continues in display order, a previous page goes against it
+        if (direction == "next") == descending:
+            query = query.where(row_key < tuple_(*values))
+        else:
+            query = query.where(row_key > tuple_(*values))
+
+    if (direction == "next") == descending:
+        query = query.order_by(*(desc(column) for column in columns))
+    else:
+        query = query.order_by(*(asc(column) for column in columns))
+
+    # one extra row tells us whether there is anything beyond this page
+    rows = (await session.exec(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        # walked backwards from the cursor, flip the page back into display order
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+    has_next = has_more if direction == "next" else True
+    has_prev = bool(cursor) if direction == "next" else has_more
+    next_cursor = encode_cursor(rows[-1], key, "next") if has_next else None
+    prev_cursor = encode_cursor(rows[0], key, "prev") if has_prev else None
+    return rows, next_cursor, prev_cursor
+
+
+async def paginate_salaries(session: AsyncSession, query, limit: int, cursor: str | None = None):
+    """A select(ReportedSalary) query one page at a time, newest year first"""
+    return await paginate(session, query, SALARY_KEY, limit, cursor)
+
+
+async def paginate_pending(session: AsyncSession, query, limit: int, cursor: str | None = None):
+    """A select(PendingSalary) query one page at a time, oldest submission first"""
+    return await paginate(session, query, PENDING_KEY, limit, cursor, descending=False)
@@ -0,0 +1,314 @@
+# Rate limit storages shared between processes, for more than one uvicorn worker or replica.
+# Importing this module registers them with the limits library slowapi runs on, the limiter
+# picks one by RATE_LIMIT_STORAGE_URI (see core/rate_limiter.py):
+#
+#   sqlite:////path/to/ratelimit.db  a SQLite file, for the workers of one host. Put it under
+#                                    /dev/shm and it never touches the disk.
+#   resp://host:6379/0               anything speaking the Redis protocol (Redis, Valkey, ...)
+#
+# Both keep the sliding window counter: a counter per key for the current and the previous
+# window, the previous one weighted by how much of it still overlaps the sliding window. A
+# check reads two counters and writes one, whatever the limit.
+import math
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+# how often (in counter writes) the SQLite storage deletes expired counters
+SQLITE_PURGE_EVERY = 1000
+
+
+def _sliding_window(previous_count: int, current_count: int, expiry: int, now: float):
+    """(previous count, previous ttl, current count, current ttl) the way the limits storages report them"""
+    previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+    current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+    return previous_count, previous_ttl, current_count, current_ttl
+
+
+def _weighted_count(previous_count: int, previous_ttl: float, current_count: int, expiry: int) -> float:
+    return previous_count * previous_ttl / expiry + current_count
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Counters in a SQLite file in WAL mode. A sliding window check is one BEGIN IMMEDIATE
+    transaction, so checks from every process on the host are serialized by SQLite's lock.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # sqlite:////abs/path -> /abs/path, sqlite:///rel/path -> rel/path
+        self.path = uri.split("://", 1)[1][1:]
+        self.timeout = float(options.get("timeout", 5))
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # autocommit, transactions are opened explicitly where they are needed
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters "
+                "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _incr(self, key: str, expiry: float, amount: int, now: float) -> int:
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            self._connection.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+        # an expired counter starts over, the expiry is only set when a counter is created
+        return self._connection.execute(
+            "INSERT INTO counters VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "count = CASE WHEN expires_at > ? THEN count + excluded.count ELSE excluded.count END, "
+            "expires_at = CASE WHEN expires_at > ? THEN expires_at ELSE excluded.expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now)
+        ).fetchone()[0]
+
+    def _counts(self, now: float, *keys: str):
+        rows = dict(self._connection.execute(
+            f"SELECT key, count FROM counters WHERE key IN ({', '.join('?' * len(keys))}) AND expires_at > ?",
+            (*keys, now)
+        ).fetchall())
+        return [rows.get(key, 0) for key in keys]
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._incr(key, expiry, amount, time.time())
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        row = self._connection.execute(
+            "UPDATE counters SET count = MAX(count - ?, 0) WHERE key = ? RETURNING count", (amount, key)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> int:
+        return self._counts(time.time(), key)[0]
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self) -> bool:
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._connection.execute("DELETE FROM counters").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+            previous_count, previous_ttl, current_count, _ = _sliding_window(
+                *self._counts(now, previous_key, current_key), expiry, now
+            )
+            acquired = math.floor(_weighted_count(previous_count, previous_ttl, current_count, expiry)) + amount <= limit
+            if acquired:
+                # a window's counter is read as the previous one for a whole window after it ends
+                self._incr(current_key, 2 * expiry, amount, now)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def get_sliding_window(self, key: str, expiry: int):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return _sliding_window(*self._counts(now, previous_key, current_key), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._connection.execute("DELETE FROM counters WHERE key IN (?, ?)", (previous_key, current_key))
+
+
+class RespError(Exception):
+    """An error reply from the server"""
+
+
+class RespConnection:
+    """A minimal blocking Redis protocol (RESP2) client, one per thread"""
+
+    def __init__(self, host: str, port: int, db: int, password: str | None, timeout: float):
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile("rb")
+        if password:
+            self.pipeline(("AUTH", password))
+        if db:
+            self.pipeline(("SELECT", db))
+
+    @staticmethod
+    def _encode(command) -> bytes:
+        parts = [f"*{len(command)}\r\n".encode()]
+        for argument in command:
+            argument = str(argument).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(argument), argument))
+        return b"".join(parts)
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, value = line[:1], line[1:-2]
+        if kind == b"+":
+            return value.decode()
+        if kind == b"-":
+            raise RespError(value.decode())
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            if int(value) < 0:
+                return None
+            data = self.reader.read(int(value) + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            return None if int(value) < 0 else [self._read() for _ in range(int(value))]
+        raise ConnectionError(f"Unexpected reply {line!r}")
+
+    def pipeline(self, *commands):
+        """Send every command in one write and return their replies"""
+        self.socket.sendall(b"".join(self._encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def _read_reply(self):
+        # read every reply before raising, so the connection stays in step with the server
+        try:
+            return self._read()
+        except RespError as error:
+            return error
+
+    def close(self):
+        self.socket.close()
+
+
+class RespStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Counters in a Redis protocol server. Only plain commands are used (no Lua), so anything
+    that implements GET/INCRBY/DECRBY/PEXPIREAT/PTTL/DEL/SCAN works, including the in-process
+    stand-in the rate limit benchmark runs against. A check is one round trip; the counter is
+    incremented and rolled back when that went over the limit, so concurrent checks can't
+    both take the last slot.
+    """
+
+    STORAGE_SCHEME = ["resp"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.password = parsed.password
+        self.timeout = float(options.get("timeout", 1))
+        self._local = threading.local()
+
+    @property
+    def base_exceptions(self):
+        return (OSError, RespError)
+
+    def _pipeline(self, *commands):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = RespConnection(
+                self.host, self.port, self.db, self.password, self.timeout
+            )
+        try:
+            return connection.pipeline(*commands)
+        except OSError:
+            # a broken connection is replaced on the next call
+            connection.close()
+            self._local.connection = None
+            raise
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        count, _ = self._pipeline(("INCRBY", key, amount), ("PEXPIRE", key, int(expiry * 1000)))
+        return count
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        return self._pipeline(("DECRBY", key, amount))[0]
+
+    def get(self, key: str) -> int:
+        return int(self._pipeline(("GET", key))[0] or 0)
+
+    def get_expiry(self, key: str) -> float:
+        ttl = self._pipeline(("PTTL", key))[0]
+        return time.time() + max(ttl, 0) / 1000
+
+    def check(self) -> bool:
+        try:
+            return self._pipeline(("PING",))[0] == "PONG"
+        except self.base_exceptions:
+            return False
+
+    def reset(self) -> int | None:
+        # only the limiter's keys, the server may be shared
+        cursor, deleted = "0", 0
+        while True:
+            cursor, keys = self._pipeline(("SCAN", cursor, "MATCH", "LIMITER/*", "COUNT", 1000))[0]
+            if keys:
+                deleted += self._pipeline(("DEL", *keys))[0]
+            if cursor == "0":
+                return deleted
+
+    def clear(self, key: str) -> None:
+        self._pipeline(("DEL", key))
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        # a window's counter is read as the previous one for a whole window after it ends
+        expires_at = (int(now / expiry) + 2) * expiry * 1000
+        previous_count, current_count, _ = self._pipeline(
+            ("GET", previous_key), ("INCRBY", current_key, amount), ("PEXPIREAT", current_key, expires_at)
+        )
+        previous_count, previous_ttl, current_count, _ = _sliding_window(int(previous_count or 0), current_count, expiry, now)
+        if math.floor(_weighted_count(previous_count, previous_ttl, current_count, expiry)) > limit:
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def get_sliding_window(self, key: str, expiry: int):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, current_count = self._pipeline(("GET", previous_key), ("GET", current_key))
+        return _sliding_window(int(previous_count or 0), int(current_count or 0), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._pipeline(("DEL", previous_key, current_key))
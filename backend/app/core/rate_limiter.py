@@ -2,5 +2,8 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
+from ..config import RATE_LIMIT_STORAGE_URI, RATE_LIMIT_STRATEGY
+# registers the sqlite:// and resp:// storages
+from . import rate_limit_storage
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI, strategy=RATE_LIMIT_STRATEGY)
@@ -0,0 +1,157 @@
+# In-process cache for the read-only routers. Everything they return is a function of the
+# route, its query parameters and the dataset, so responses are stored under
+# (dataset version, path, query) and mark_dataset_changed() bumps the version: every entry
+# from before the change stops matching at once and ages out of the LRU, there is no scan
+# or explicit invalidation. Routers opt in with APIRouter(route_class=cached_route(...)).
+#
+# Every cached response also carries a strong ETag (a digest of its body, computed once per
+# entry) and the router's Cache-Control, so a client revalidating with If-None-Match gets a
+# bodyless 304 straight from the cache.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from ..config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+
+# Cache-Control per kind of router. Browsers reuse a response for max-age seconds, then keep
+# showing it for up to stale-while-revalidate more while a conditional request refreshes it.
+# reference lists, analytics, and the company/location pages and salary lists
+REFERENCE_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=86400"
+ANALYTICS_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=3600"
+PAGE_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=600"
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def dataset_version() -> int:
+    return _version
+
+
+def bump_dataset_version() -> int:
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+class ResponseCache:
+    """LRU of response bodies with a TTL, capped both in entries and in total bytes"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def set(self, key, body: bytes, media_type: str | None, etag: str):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body, media_type, etag)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        body = self._entries.pop(key)[1]
+        self._bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "dataset_version": dataset_version(),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS)
+
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, a W/ prefix added by a proxy still matches
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def query_key(request: Request) -> tuple:
+    """
+    The query parameters as they are parsed: decoded and sorted by name, so "?b=1&a=2" and
+    "?a=2&b=1" (or %20 and +) share an entry. The sort is stable, repeated parameters keep
+    their relative order, which the response depends on (series=A&series=B). Values are kept
+    as sent, names are matched case-sensitively and "shopify" may well be a 404 where
+    "Shopify" isn't.
+    """
+    return tuple(sorted(request.query_params.multi_items(), key=lambda item: item[0]))
+
+
+def cached_route(cache_control: str):
+    """An APIRoute class that serves GETs from response_cache and sends cache_control with them"""
+
+    class CachedRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+
+            async def cached_handler(request: Request) -> Response:
+                if request.method != "GET":
+                    return await handler(request)
+                key = (dataset_version(), request.url.path, query_key(request))
+                cached = response_cache.get(key)
+                if cached is None:
+                    response = await handler(request)
+                    # only successful responses are stored or get an ETag
+                    if response.status_code != 200 or not hasattr(response, "body"):
+                        return response
+                    cached = (response.body, response.media_type, compute_etag(response.body))
+                    response_cache.set(key, *cached)
+
+                body, media_type, etag = cached
+                headers = {"ETag": etag, "Cache-Control": cache_control}
+                if etag_matches(request, etag):
+                    return Response(status_code=304, headers=headers)
+                return Response(content=body, media_type=media_type, headers=headers)
+
+            return cached_handler
+
+    return CachedRoute
@@ -0,0 +1,42 @@
+# Cached row counts for the paginated salary lists. Counting the whole table (or a large
+# company) on every page is the expensive part of paginating, and the numbers only change
+# when the dataset does, so they are kept until mark_dataset_changed() clears them.
+import threading
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.salary import ReportedSalary
+from .analytics_sql import filter_clauses
+
+# one entry per filter combination, e.g. one per company page that was viewed
+MAX_CACHED_COUNTS = 10_000
+
+_counts = {}
+_lock = threading.Lock()
+# bumped by clear(), a count that started before a clear() is returned but not kept
+_generation = 0
+
+
+async def count_salaries(session: AsyncSession, **filters) -> int:
+    key = tuple(sorted((name, value) for name, value in filters.items() if value is not None))
+    count = _counts.get(key)
+    if count is not None:
+        return count
+
+    generation = _generation
+    count = (await session.exec(
+        select(func.count()).select_from(ReportedSalary).where(*filter_clauses(**filters))
+    )).one()
+    with _lock:
+        if generation != _generation:
+            return count
+        if len(_counts) >= MAX_CACHED_COUNTS:
+            _counts.clear()
+        _counts[key] = count
+    return count
+
+
+def clear():
+    global _generation
+    with _lock:
+        _generation += 1
+        _counts.clear()
@@ -0,0 +1,161 @@
+# In-memory typeahead over companies, locations, universities and roles. Every name is kept
+# under its folded spelling and under each later word of it ("whitney" finds "Pratt and
+# Whitney") in one sorted list, so a prefix is a bisect to the first match and a walk until
+# the prefix stops matching. When there aren't enough prefix matches (a typo), names sharing
+# trigrams with the query fill the remaining slots. Matches are ranked by report count.
+#
+# The index is built lazily from the database and cleared by mark_dataset_changed(). An
+# approval doesn't throw it away: record() bumps the counts of the approved salary's names,
+# inserting any the index hasn't seen yet.
+import bisect
+from collections import Counter
+from enum import Enum
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.salary import ReportedSalary
+from ..models.university import Universities
+from ..models.roles import Role
+from .aliases import MIN_SIMILARITY, fold, trigrams
+
+
+class SuggestionType(str, Enum):
+    COMPANY = "company"
+    LOCATION = "location"
+    UNIVERSITY = "university"
+    ROLE = "role"
+
+
+REPORTED_COLUMNS = {
+    SuggestionType.COMPANY: ReportedSalary.company,
+    SuggestionType.LOCATION: ReportedSalary.location,
+    SuggestionType.UNIVERSITY: ReportedSalary.university,
+    SuggestionType.ROLE: ReportedSalary.role,
+}
+# names that can be suggested before anyone reported a salary for them
+REFERENCE_COLUMNS = {
+    SuggestionType.UNIVERSITY: Universities.name,
+    SuggestionType.ROLE: Role.role_name,
+}
+
+# between names with as many reports, a prefix match that starts the name goes before one that starts a later word
+NAME_PREFIX, WORD_PREFIX = range(2)
+
+
+class SearchIndex:
+    def __init__(self, entries=()):
+        """entries are (type, name, count) rows, a name given more than once has its counts added"""
+        self.counts = Counter()
+        # (folded key, rank, type, name), the key being the whole name (NAME_PREFIX) or the name
+        # from a later word on (WORD_PREFIX)
+        self.keys = []
+        self.trigrams = {}
+        self.postings = {}
+        for kind, name, count in entries:
+            self._add(kind, name, count)
+        self.keys.sort()
+
+    def _add(self, kind: SuggestionType, name: str, count: int, keep_sorted: bool = False):
+        entry = (kind, name)
+        known = entry in self.counts
+        self.counts[entry] += count
+        if known:
+            return
+        folded = fold(name)
+        words = folded.split(" ")
+        for start in range(len(words)):
+            key = (" ".join(words[start:]), WORD_PREFIX if start else NAME_PREFIX, kind, name)
+            if keep_sorted:
+                bisect.insort(self.keys, key)
+            else:
+                self.keys.append(key)
+        self.trigrams[entry] = trigrams(folded)
+        for gram in self.trigrams[entry]:
+            self.postings.setdefault(gram, []).append(entry)
+
+    @classmethod
+    async def load(cls, session: AsyncSession):
+        entries = []
+        for kind, column in REPORTED_COLUMNS.items():
+            rows = (await session.exec(select(column, func.count()).where(column.is_not(None)).group_by(column))).all()
+            entries.extend((kind, name, count) for name, count in rows)
+        for kind, column in REFERENCE_COLUMNS.items():
+            entries.extend((kind, name, 0) for name in (await session.exec(select(column).distinct())).all() if name)
+        return cls(entries)
+
+    def record(self, salary: ReportedSalary):
+        """Count one more report for the names of salary"""
+        for kind, column in REPORTED_COLUMNS.items():
+            name = getattr(salary, column.key)
+            if name:
+                self._add(kind, name, 1, keep_sorted=True)
+
+    def _prefix_matches(self, prefix: str, types):
+        matches = {}
+        position = bisect.bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and self.keys[position][0].startswith(prefix):
+            _, rank, kind, name = self.keys[position]
+            position += 1
+            if kind not in types:
+                continue
+            matches[(kind, name)] = min(rank, matches.get((kind, name), rank))
+        return matches
+
+    def _similar(self, query: str, types):
+        grams = trigrams(query)
+        shared = Counter(entry for gram in grams for entry in self.postings.get(gram, ()) if entry[0] in types)
+        similar = {}
+        for entry, count in shared.items():
+            similarity = count / (len(grams) + len(self.trigrams[entry]) - count)
+            if similarity >= MIN_SIMILARITY:
+                similar[entry] = similarity
+        return similar
+
+    def suggest(self, query: str, types=tuple(SuggestionType), limit: int = 8):
+        """The top matches for query as (type, name, count)"""
+        query = fold(query)
+        if not query:
+            return []
+        types = set(types)
+
+        prefix = self._prefix_matches(query, types)
+        ranked = sorted(prefix.items(), key=lambda item: (-self.counts[item[0]], item[1], item[0][1]))
+        suggestions = [entry for entry, _ in ranked[:limit]]
+        if len(suggestions) < limit:
+            similar = self._similar(query, types)
+            fuzzy = sorted(
+                (entry for entry in similar if entry not in prefix),
+                key=lambda entry: (-round(similar[entry], 1), -self.counts[entry], entry[1])
+            )
+            suggestions.extend(fuzzy[:limit - len(suggestions)])
+        return [(kind, name, self.counts[(kind, name)]) for kind, name in suggestions]
+
+
+# Same lazy build and generation guard as location_hierarchy, see the module comment for record()
+_index: SearchIndex | None = None
+_generation = 0
+
+
+async def get_index(session: AsyncSession) -> SearchIndex:
+    global _index
+    index = _index
+    if index is None:
+        generation = _generation
+        index = await SearchIndex.load(session)
+        if generation == _generation:
+            _index = index
+    return index
+
+
+def record(salary: ReportedSalary):
+    global _generation
+    if _index is None:
+        # a build in flight may have read the database before this salary was committed
+        _generation += 1
+    else:
+        _index.record(salary)
+
+
+def clear():
+    global _index, _generation
+    _generation += 1
+    _index = None
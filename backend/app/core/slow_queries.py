@@ -0,0 +1,244 @@
+# Slow query log for /admin/slow-queries. Every statement that takes longer than
+# SLOW_QUERY_THRESHOLD_MS is kept with its bound parameters and the route it ran for, and its
+# plan is captured in the background: EXPLAIN (ANALYZE, BUFFERS) on Postgres, EXPLAIN QUERY
+# PLAN on SQLite (the local stand-in has nothing like ANALYZE). The last SLOW_QUERY_LOG_SIZE
+# of them are kept in memory, per process.
+#
+# The EXPLAIN re-runs the statement with the same parameters on a connection of its own, in
+# a transaction that is rolled back and under SLOW_QUERY_EXPLAIN_TIMEOUT_MS. Only reads are
+# explained, ANALYZE would execute a write a second time. A statement that timed out is
+# logged too, its plan without ANALYZE (which would only time out again). To keep a hot slow
+# query from doubling its own load, one EXPLAIN runs at a time and the same statement is only
+# explained once per EXPLAIN_COOLDOWN seconds, entries skipped that way say so.
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from itertools import count
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from ..config import (
+    SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+)
+from .metrics import current_route
+
+EXPLAIN_COOLDOWN = 60
+# parameter values and statements are cut to this many characters (a long IN list)
+MAX_PARAMETER_LENGTH = 200
+MAX_STATEMENT_LENGTH = 10_000
+# execution option that keeps the log's own EXPLAINs out of it
+UNLOGGED = {"slow_query_log": False}
+
+
+class PlanStatus(str, Enum):
+    PENDING = "pending"
+    CAPTURED = "captured"
+    # not a read, or explaining is turned off
+    NOT_EXPLAINED = "not_explained"
+    # another EXPLAIN was running, or the statement was explained moments ago
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+class SlowQuery(BaseModel):
+    id: int
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: list[str] | dict[str, str] | None = None
+    # the route template of the request, None for jobs and startup
+    route: str | None = None
+    # the statement failed, e.g. cancelled by statement_timeout
+    error: str | None = None
+    plan_status: PlanStatus
+    plan: str | None = None
+    plan_error: str | None = None
+
+
+def _truncate(value: str, length: int) -> str:
+    return value if len(value) <= length else value[:length] + "..."
+
+
+def _loggable_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {str(name): _truncate(repr(value), MAX_PARAMETER_LENGTH) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_truncate(repr(value), MAX_PARAMETER_LENGTH) for value in parameters]
+    return None
+
+
+def _is_read(statement: str, context) -> bool:
+    if context.isinsert or context.isupdate or context.isdelete:
+        return False
+    words = statement.lstrip().upper()
+    # a CTE can hold an INSERT/UPDATE/DELETE, FOR UPDATE takes row locks
+    if words.startswith("WITH"):
+        return not any(keyword in words for keyword in ("INSERT ", "UPDATE ", "DELETE "))
+    return words.startswith("SELECT") and "FOR UPDATE" not in words
+
+
+def _explain_prefix(dialect: str, analyze: bool) -> str:
+    if dialect == "postgresql":
+        return "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    if dialect == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    return "EXPLAIN "
+
+
+def _plan_text(dialect: str, rows) -> str:
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return "\n".join(row[-1] for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: int, size: int, explain: bool, explain_timeout_ms: int):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_timeout_ms = explain_timeout_ms
+        self._entries: deque[SlowQuery] = deque(maxlen=size)
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._explaining = False
+        # statement -> when it was last explained
+        self._explained_at = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        # the asyncio tasks of running EXPLAINs, kept so they aren't garbage collected
+        self._tasks = set()
+
+    def watch(self, engine):
+        """Log the slow statements of engine, a sync Engine or an AsyncEngine"""
+        if self.threshold <= 0:
+            return
+        explain_engine = engine
+        if isinstance(engine, AsyncEngine):
+            engine = engine.sync_engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._slow_query_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - context._slow_query_started
+            if elapsed >= self.threshold and context.execution_options.get("slow_query_log", True):
+                self.record(explain_engine, context, statement, parameters, executemany, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            context = exception_context.execution_context
+            # None when connecting failed
+            started = getattr(context, "_slow_query_started", None)
+            if started is None or not context.execution_options.get("slow_query_log", True):
+                return
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.record(
+                    explain_engine, context, exception_context.statement, exception_context.parameters,
+                    context.executemany, elapsed,
+                    error=f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}"
+                )
+
+    def record(self, engine, context, statement: str, parameters, executemany: bool, elapsed: float, error: str | None = None):
+        explain = self.explain and not executemany and _is_read(statement, context)
+        entry = SlowQuery(
+            id=next(self._ids),
+            recorded_at=datetime.utcnow(),
+            duration_ms=round(elapsed * 1000, 3),
+            statement=_truncate(statement, MAX_STATEMENT_LENGTH),
+            # executemany parameters are a list of rows, the first says enough
+            parameters=_loggable_parameters(parameters[0] if executemany and parameters else parameters),
+            route=current_route(),
+            error=error,
+            plan_status=PlanStatus.PENDING if explain else PlanStatus.NOT_EXPLAINED,
+        )
+        with self._lock:
+            self._entries.append(entry)
+            if explain and not self._claim_explain(statement):
+                entry.plan_status = PlanStatus.SKIPPED
+        if entry.plan_status != PlanStatus.PENDING:
+            return
+
+        # no ANALYZE for a statement that failed, it would most likely fail again
+        sql = _explain_prefix(engine.dialect.name, analyze=error is None) + statement
+        if isinstance(engine, AsyncEngine):
+            # the hooks of the async engine run on the event loop
+            task = asyncio.get_running_loop().create_task(self._explain_async(entry, engine, sql, parameters))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._executor.submit(self._explain_sync, entry, engine, sql, parameters)
+
+    def _claim_explain(self, statement: str) -> bool:
+        """Called with the lock held, True if statement may be explained now"""
+        now = time.monotonic()
+        if self._explaining or now - self._explained_at.get(statement, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+            return False
+        if len(self._explained_at) > 1000:
+            self._explained_at = {
+                known: at for known, at in self._explained_at.items() if now - at < EXPLAIN_COOLDOWN
+            }
+        self._explaining = True
+        self._explained_at[statement] = now
+        return True
+
+    def _timeout_statement(self, dialect: str) -> str | None:
+        if dialect == "postgresql" and self.explain_timeout_ms:
+            return f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"
+        return None
+
+    def _explain_sync(self, entry: SlowQuery, engine, sql: str, parameters):
+        try:
+            with engine.connect() as connection:
+                connection.execution_options(**UNLOGGED)
+                with connection.begin() as transaction:
+                    timeout = self._timeout_statement(engine.dialect.name)
+                    if timeout:
+                        connection.exec_driver_sql(timeout)
+                    rows = connection.exec_driver_sql(sql, parameters).all()
+                    # ANALYZE ran the statement, nothing of it is kept
+                    transaction.rollback()
+            self._explained(entry, plan=_plan_text(engine.dialect.name, rows))
+        except Exception as exc:
+            self._explained(entry, error=f"{type(exc).__name__}: {exc}")
+
+    async def _explain_async(self, entry: SlowQuery, engine: AsyncEngine, sql: str, parameters):
+        try:
+            async with engine.connect() as connection:
+                await connection.execution_options(**UNLOGGED)
+                async with connection.begin() as transaction:
+                    timeout = self._timeout_statement(engine.dialect.name)
+                    if timeout:
+                        await connection.exec_driver_sql(timeout)
+                    rows = (await connection.exec_driver_sql(sql, parameters)).all()
+                    await transaction.rollback()
+            self._explained(entry, plan=_plan_text(engine.dialect.name, rows))
+        except Exception as exc:
+            self._explained(entry, error=f"{type(exc).__name__}: {exc}")
+
+    def _explained(self, entry: SlowQuery, plan: str | None = None, error: str | None = None):
+        with self._lock:
+            self._explaining = False
+            entry.plan, entry.plan_error = plan, error
+            entry.plan_status = PlanStatus.FAILED if error else PlanStatus.CAPTURED
+
+    def entries(self):
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> int:
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            return cleared
+
+
+slow_query_log = SlowQueryLog(
+    SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+)
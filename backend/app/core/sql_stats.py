@@ -0,0 +1,61 @@
+# Portable aggregate helpers. Postgres computes percentiles natively with
+# percentile_cont(...) WITHIN GROUP (ORDER BY ...); SQLite (the stand-in we test against)
+# has no ordered-set aggregates, so there the same linear interpolation is computed
+# from a row_number()/count() window over the source CTE. Histogram buckets work the same
+# way: width_bucket() on Postgres and an equivalent CASE elsewhere.
+from sqlalchemy import Float, Integer, case, cast, func
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+
+
+def supports_percentile_cont(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def rank_columns(session: Session, column, partition_by=(), name: str | None = None):
+    """
+    Extra columns a source CTE needs so percentile_cont() also works on SQLite.
+    Add them to the select the CTE is built from, next to the column itself. Pass a name
+    to keep several partitionings of the same column apart in one CTE.
+    """
+    if supports_percentile_cont(session):
+        return []
+    name = name or column.key
+    return [
+        (func.row_number().over(partition_by=partition_by, order_by=column) - 1).label(f"{name}_rank"),
+        func.count().over(partition_by=partition_by).label(f"{name}_rank_size")
+    ]
+
+
+def percentile_cont(session: Session, fraction: float, source, column: str = "salary", ranks: str | None = None):
+    """
+    percentile_cont(fraction) WITHIN GROUP (ORDER BY column) over a CTE built with rank_columns().
+    ranks is the name given to rank_columns(), if any.
+    """
+    value = source.c[column]
+    if supports_percentile_cont(session):
+        return func.percentile_cont(fraction).within_group(value)
+
+    ranks = ranks or column
+    rank = source.c[f"{ranks}_rank"]
+    size = source.c[f"{ranks}_rank_size"]
+    position = fraction * (size - 1)
+    # positions are never negative so truncating is the same as floor()
+    lower = cast(position, Integer)
+    lower_value = func.max(case((rank == lower, value)))
+    upper_value = func.coalesce(func.max(case((rank == lower + 1, value))), lower_value)
+    return lower_value + (func.max(position) - func.max(lower)) * (upper_value - lower_value)
+
+
+def bucket_index(session: Session, column, edges):
+    """
+    0-based index of the bucket [edges[i], edges[i + 1]) a value falls in, the last bucket is
+    open ended and values below edges[0] get -1. width_bucket() on Postgres, a CASE elsewhere.
+    """
+    if supports_percentile_cont(session):
+        thresholds = cast(postgresql.array([float(edge) for edge in edges]), postgresql.ARRAY(Float))
+        return func.width_bucket(column, thresholds) - 1
+    return case(
+        *[(column >= edge, index) for index, edge in reversed(list(enumerate(edges)))],
+        else_=-1
+    )
@@ -0,0 +1,64 @@
+# Email domain -> university. Every domain in Universities.domains goes into one dict, built
+# when the app starts, and a lookup walks the domain's parent domains until one is known, so
+# "student.mail.utoronto.ca" resolves through "utoronto.ca". Top level domains are never
+# matched on their own. The universities list only changes through the data loaders, which
+# run outside the API process; until they have, the (empty) resolver isn't kept.
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.university import Universities
+
+
+def normalize_domain(value: str) -> str:
+    """The domain of an email address or domain, lower case without a leading www."""
+    domain = value.rpartition("@")[2].strip().strip(".").lower()
+    return domain.removeprefix("www.")
+
+
+class DomainResolver:
+    def __init__(self, universities):
+        """universities are (name, domains) rows, the first university listing a domain keeps it"""
+        self.universities = {}
+        for name, domains in universities:
+            for domain in domains or ():
+                self.universities.setdefault(normalize_domain(domain), name)
+
+    @classmethod
+    async def load(cls, session: AsyncSession):
+        return cls((await session.exec(select(Universities.name, Universities.domains).order_by(Universities.id))).all())
+
+    @classmethod
+    def load_sync(cls, engine: Engine):
+        with Session(engine) as session:
+            return cls(session.exec(select(Universities.name, Universities.domains).order_by(Universities.id)).all())
+
+    def resolve(self, value: str):
+        """(matched domain, university name) for an email address or domain, None if unknown"""
+        labels = normalize_domain(value).split(".")
+        # stop before the last label, "ca" on its own isn't a university
+        for start in range(len(labels) - 1):
+            domain = ".".join(labels[start:])
+            university = self.universities.get(domain)
+            if university is not None:
+                return domain, university
+        return None
+
+
+_resolver: DomainResolver | None = None
+
+
+def prime(engine: Engine):
+    """Build the resolver at startup, so the first lookup doesn't pay for it"""
+    global _resolver
+    resolver = DomainResolver.load_sync(engine)
+    _resolver = resolver if resolver.universities else None
+
+
+async def get_resolver(session: AsyncSession) -> DomainResolver:
+    global _resolver
+    resolver = _resolver
+    if resolver is None:
+        resolver = await DomainResolver.load(session)
+        if resolver.universities:
+            _resolver = resolver
+    return resolver
@@ -1,19 +1,71 @@
 # Database configuration and setup
-from sqlmodel import SQLModel, create_engine, Session
-from .config import DATABASE_URL
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .config import (
+    DATABASE_URL, DB_PREPARED_STATEMENT_CACHE_SIZE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, ANALYTICS_STATEMENT_TIMEOUT_MS
+)
+from .core.db_pool import checkout_connection
+from .core.metrics import instrument_engine
+from .core.slow_queries import slow_query_log
 
-connect_args = {"check_same_thread": False}
+def pool_options(url, pool_size: int = DB_POOL_SIZE):
+    """QueuePool settings from config.py, SQLite (the local stand-in) keeps its default pool"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
 # create the engine to talk to the database
-engine = create_engine(DATABASE_URL, echo=False) #echo = false makes it not print out to the console
+# the sync engine is only used by the data loaders, migrations and analytics snapshot builds,
+# request handlers go through async_engine below. It only needs a couple of connections.
+engine = create_engine(DATABASE_URL, echo=False, **pool_options(DATABASE_URL, pool_size=2)) #echo = false makes it not print out to the console
 
-# create the database and tables wrapped in a function to prevent side effects
-# for example, if database.py is imported in another file, we don't want it to create the database 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+def async_database_url(url: str):
+    """The same database with an asyncio driver: asyncpg for Postgres, aiosqlite for SQLite"""
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        # asyncpg prepares every statement, keep the prepared statements of the hot queries per connection
+        return url.set(drivername="postgresql+asyncpg").update_query_dict(
+            {"prepared_statement_cache_size": str(DB_PREPARED_STATEMENT_CACHE_SIZE)}
+        )
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-        
+async_engine = create_async_engine(async_database_url(DATABASE_URL), echo=False, **pool_options(DATABASE_URL))
 
+# statement counts and timings for /metrics
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+# statements over SLOW_QUERY_THRESHOLD_MS go to /admin/slow-queries with their plan
+slow_query_log.watch(engine)
+slow_query_log.watch(async_engine)
+
+# expire_on_commit=False: handlers return rows after committing, which must not trigger a lazy reload
+async_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+def session_with_timeout(timeout_ms: int):
+    """
+    A get_session dependency whose statements are cancelled by Postgres after timeout_ms, so
+    a runaway query gives its connection back instead of holding it. SET LOCAL only lasts for
+    the current transaction, the setting never leaks to the next user of the connection.
+    """
+    async def get_session():
+        async with async_session() as session:
+            await checkout_connection(session)
+            if timeout_ms and async_engine.dialect.name == "postgresql":
+                await session.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+            yield session
+    return get_session
+
+get_session = session_with_timeout(DB_STATEMENT_TIMEOUT_MS)
+get_analytics_session = session_with_timeout(ANALYTICS_STATEMENT_TIMEOUT_MS)
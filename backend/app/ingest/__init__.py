@@ -0,0 +1,9 @@
+# Bulk ingest of salary data. Sources are cleaned as DataFrames and written in chunks, Postgres
+# COPY for the real database and executemany on the SQLite stand-in. Every chunk commits on its
+# own, which is what lets a load report progress and be cancelled between chunks (app/core/jobs.py),
+# so a load that fails half way leaves the chunks before it committed. Rows carry a content hash
+# (see hashing.py) and are upserted on it, which makes such a partial load safe to re-run: the
+# committed rows match their hashes and only what is missing or changed gets written.
+from .bulk import SALARY_COLUMNS, IngestResult, bulk_insert, ingest_salaries, insert_rows, prepare_salaries, rehash_salaries, upsert_salaries
+from .hashing import RowHasher, source_fingerprint
+from .waterloo import ingest_waterloo_sheet, parse_waterloo
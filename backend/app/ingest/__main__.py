@@ -0,0 +1,30 @@
+# python -m app.ingest <file.csv> [...] bulk loads cleaned CSVs (ReportedSalary columns) into the
+# database. Running API processes keep their analytics snapshot and caches until restarted.
+# Files are tracked by name, one that hasn't changed since it was last loaded is skipped.
+#
+# python -m app.ingest --waterloo [--default-year 2024] <sheet.csv> [...] loads raw exports of
+# the Waterloo co-op salary sheet instead, printing the reports and benefits that couldn't be parsed.
+import argparse
+import os
+from . import ingest_salaries, ingest_waterloo_sheet
+from .waterloo import UNPARSED_BENEFIT
+
+parser = argparse.ArgumentParser(prog="python -m app.ingest")
+parser.add_argument("paths", nargs="+")
+parser.add_argument("--waterloo", action="store_true", help="the files are raw Waterloo co-op salary sheets")
+parser.add_argument("--default-year", type=int, help="year of sheet rows that don't give one")
+args = parser.parse_args()
+
+for path in args.paths:
+    if args.waterloo:
+        result, failures = ingest_waterloo_sheet(path, args.default_year)
+        for failure in failures.itertuples():
+            print(f"{path}:{failure.sheet_row}: {failure.company}: {failure.reason}: {failure.report!r}")
+        benefits = (failures["reason"] == UNPARSED_BENEFIT).sum()
+        print(
+            f"{path}: {result.inserted} salaries added, {result.updated} updated, "
+            f"{len(failures) - benefits} reports skipped, {benefits} benefits without a bonus"
+        )
+    else:
+        result = ingest_salaries(path, source_name=os.path.basename(path))
+        print(f"{path}: {result.inserted} salaries added, {result.updated} updated")
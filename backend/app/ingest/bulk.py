@@ -0,0 +1,246 @@
+import io
+import os
+import pandas as pd
+from datetime import datetime
+from typing import Callable, NamedTuple
+from sqlalchemy import Table, bindparam, column, delete, func, insert, or_, select, table, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from ..database import engine
+from ..models.salary import ReportedSalary
+from ..models.ingested_source import IngestedSource
+from ..models.name_alias import NameKind
+from ..core.aliases import AliasNormalizer
+from .hashing import HASHED_COLUMNS, RowHasher, source_fingerprint
+
+# the ReportedSalary columns a source provides, id comes from the table's sequence
+SALARY_COLUMNS = ["company", "year", "salary", "university", "term", "location", "bonus", "role", "arrangement"]
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# applied before writing instead of patching the table afterwards
+DEFAULT_LOCATION = "Canada"
+DEFAULT_ROLE = "Unreported"
+
+# what the NaN-ish values of a spreadsheet look like once read as text
+MISSING_TEXT = {"", "nan", "NaN", "None"}
+
+# content hashes looked up per statement, under SQLite's bound parameter limit
+KNOWN_HASH_BATCH = 900
+
+
+class IngestResult(NamedTuple):
+    """Rows a load inserted, and rows it updated because their content hash was already stored"""
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+
+def prepare_salaries(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce a source DataFrame into SALARY_COLUMNS: numeric columns parsed, text stripped,
+    missing location/role defaulted and rows without a company, year or salary dropped.
+    """
+    df = df.reindex(columns=SALARY_COLUMNS)
+    for column in ("company", "university", "location", "role", "arrangement"):
+        text = df[column].astype("string").str.strip()
+        df[column] = text.mask(text.isin(MISSING_TEXT))
+    df["salary"] = pd.to_numeric(df["salary"], errors="coerce")
+    df["bonus"] = pd.to_numeric(df["bonus"], errors="coerce")
+    df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+    # stored as the sources give it, a missing term stays NULL like the original loaders left it
+    df["term"] = pd.to_numeric(df["term"], errors="coerce").astype("Int64")
+
+    df["location"] = df["location"].fillna(DEFAULT_LOCATION)
+    df["role"] = df["role"].fillna(DEFAULT_ROLE)
+    return df.dropna(subset=["company", "year", "salary"])
+
+
+def insert_rows(connection: Connection, table: Table, records, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """executemany INSERTs of a list of dicts, chunk_size rows per round-trip"""
+    for start in range(0, len(records), chunk_size):
+        connection.execute(insert(table), records[start:start + chunk_size])
+    return len(records)
+
+
+def _copy_chunk(connection: Connection, table: Table, chunk: pd.DataFrame):
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    columns = ", ".join(f'"{column}"' for column in chunk.columns)
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    finally:
+        cursor.close()
+
+
+def bulk_insert(connection: Connection, table: Table, df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Write a DataFrame whose columns are table columns, COPY on Postgres, executemany elsewhere"""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        if connection.dialect.name == "postgresql":
+            _copy_chunk(connection, table, chunk)
+        else:
+            records = chunk.astype(object).where(chunk.notna(), None).to_dict(orient="records")
+            insert_rows(connection, table, records, chunk_size)
+    return len(df)
+
+
+def _upsert(table: Table, statement, columns):
+    """ON CONFLICT (content_hash) update the row, but only when something actually changed"""
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.content_hash],
+        set_={name: excluded[name] for name in columns},
+        where=or_(*[table.c[name].is_distinct_from(excluded[name]) for name in columns])
+    )
+
+
+def _count_known(connection: Connection, hashes) -> int:
+    """How many of hashes are already stored"""
+    target = ReportedSalary.__table__
+    known = 0
+    for start in range(0, len(hashes), KNOWN_HASH_BATCH):
+        known += connection.execute(
+            select(func.count()).select_from(target)
+            .where(target.c.content_hash.in_(hashes[start:start + KNOWN_HASH_BATCH]))
+        ).scalar()
+    return known
+
+
+def upsert_salaries(connection: Connection, df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> IngestResult:
+    """
+    Write prepared salaries that carry a content_hash: new hashes are inserted, known hashes
+    updated if their other columns changed and left alone otherwise. Postgres COPYs into a
+    temporary table and merges it with one INSERT ... SELECT.
+    """
+    target = ReportedSalary.__table__
+    columns = [*SALARY_COLUMNS, "content_hash"]
+    df = df[columns]
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE reportedsalary_staging ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM reportedsalary WITH NO DATA"
+        ))
+        staging = table("reportedsalary_staging", *[column(name) for name in columns])
+        for start in range(0, len(df), chunk_size):
+            _copy_chunk(connection, staging, df.iloc[start:start + chunk_size])
+        known = connection.execute(
+            select(func.count()).select_from(staging.join(target, staging.c.content_hash == target.c.content_hash))
+        ).scalar()
+        statement = postgresql.insert(target).from_select(columns, select(*staging.c))
+        written = connection.execute(_upsert(target, statement, SALARY_COLUMNS)).rowcount
+        connection.execute(text("DROP TABLE reportedsalary_staging"))
+        # every new hash is inserted, the rest of what was written are updates
+        return IngestResult(inserted=len(df) - known, updated=written - (len(df) - known))
+
+    known = _count_known(connection, df["content_hash"].tolist())
+    written = 0
+    statement = _upsert(target, sqlite.insert(target), SALARY_COLUMNS)
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        records = chunk.astype(object).where(chunk.notna(), None).to_dict(orient="records")
+        written += connection.execute(statement, records).rowcount
+    return IngestResult(inserted=len(df) - known, updated=written - (len(df) - known))
+
+
+def rehash_salaries(connection: Connection, companies) -> int:
+    """
+    Recompute the content hashes of the ingested rows of companies, e.g. after an alias renamed
+    them: their hashes were computed from the old name and a re-ingest of their source would no
+    longer match them. Repeats are numbered in id order, the order their source listed them.
+    Returns the number of rows rehashed.
+    """
+    target = ReportedSalary.__table__
+    hashed = target.c.company.in_(list(companies)) & target.c.content_hash.is_not(None)
+    rows = pd.DataFrame(
+        connection.execute(
+            select(target.c.id, *[target.c[name] for name in HASHED_COLUMNS]).where(hashed).order_by(target.c.id)
+        ).all(),
+        columns=["id", *HASHED_COLUMNS]
+    )
+    if rows.empty:
+        return 0
+    rows["content_hash"] = RowHasher()(rows)
+    # cleared first, a new hash may still be held by another row of the same company
+    connection.execute(update(target).where(hashed).values(content_hash=None))
+    connection.execute(
+        update(target).where(target.c.id == bindparam("row_id")).values(content_hash=bindparam("hash")),
+        [{"row_id": int(row_id), "hash": value} for row_id, value in zip(rows["id"], rows["content_hash"])]
+    )
+    return len(rows)
+
+
+def _source_unchanged(connection: Connection, name: str, fingerprint: str) -> bool:
+    source = IngestedSource.__table__
+    stored = connection.execute(select(source.c.content_hash).where(source.c.name == name)).scalar()
+    return stored == fingerprint
+
+
+def _record_source(connection: Connection, name: str, fingerprint: str, row_count: int):
+    source = IngestedSource.__table__
+    connection.execute(delete(source).where(source.c.name == name))
+    connection.execute(insert(source).values(
+        name=name, content_hash=fingerprint, row_count=row_count, ingested_at=datetime.utcnow()
+    ))
+
+
+def _chunks(source, chunk_size: int, **read_csv_args):
+    if isinstance(source, pd.DataFrame):
+        return (source.iloc[start:start + chunk_size] for start in range(0, max(len(source), 1), chunk_size))
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        return pd.read_csv(source, chunksize=chunk_size, **read_csv_args)
+    # already chunked, e.g. generated
+    return source
+
+
+def ingest_salaries(source, source_name: str | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    force: bool = False, progress: Callable[[int, int], None] | None = None,
+                    **read_csv_args) -> IngestResult:
+    """
+    Load a DataFrame, a CSV path or an iterable of DataFrame chunks into ReportedSalary
+    chunk_size rows at a time, a CSV is read chunk by chunk so a large file is never fully
+    in memory. An iterable has no fingerprint, it can't be given a source_name.
+
+    Company and location names go through the alias normalizer (app/core/aliases.py).
+    Safe to re-run: rows are matched on their content hash, so only new or changed rows are
+    written. The hash doesn't include the source, a row another source already wrote is
+    updated rather than added (see hashing.py). With a source_name the source's fingerprint is also recorded, and a source that
+    hasn't changed since its last ingest is skipped without being read (unless force).
+
+    Every chunk commits on its own and then calls progress(rows read, rows written), which may
+    raise to stop the load (see app/core/jobs.py). A load that stops half way keeps the chunks
+    it committed and doesn't record the fingerprint, running it again finishes it.
+    Returns the rows inserted and updated, callers inside the API call mark_dataset_changed()
+    afterwards when something was written.
+    """
+    fingerprint = source_fingerprint(source) if source_name else None
+    hasher = RowHasher()
+    inserted = updated = 0
+    rows = 0
+    with engine.connect() as connection:
+        if source_name and not force and _source_unchanged(connection, source_name, fingerprint):
+            return IngestResult()
+        normalizer = AliasNormalizer.load_sync(connection)
+        connection.commit()
+        for chunk in _chunks(source, chunk_size, **read_csv_args):
+            prepared = prepare_salaries(chunk)
+            prepared["company"] = normalizer.normalize_series(NameKind.COMPANY, prepared["company"])
+            prepared["location"] = normalizer.normalize_series(NameKind.LOCATION, prepared["location"])
+            # hashed as stored, the way the rows already in the table were hashed
+            prepared["content_hash"] = hasher(prepared)
+            with connection.begin():
+                result = upsert_salaries(connection, prepared, chunk_size)
+            inserted += result.inserted
+            updated += result.updated
+            rows += len(prepared)
+            if progress:
+                progress(rows, inserted + updated)
+        if source_name:
+            with connection.begin():
+                _record_source(connection, source_name, fingerprint, rows)
+    return IngestResult(inserted, updated)
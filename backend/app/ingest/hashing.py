@@ -0,0 +1,82 @@
+# Fingerprints for idempotent ingest. Every salary row gets a content hash of its normalized
+# company/year/salary/term/university/role, and every source file a hash of its bytes, so a
+# re-run skips files it has seen and only writes the rows that are new or changed.
+#
+# A row is hashed as it is stored: the company after the alias mapping, names folded the way
+# the alias normalizer folds them and an unknown term (0 or missing) the same either way. That
+# way the hashes of rows already in the table (migration v0003, rehash_salaries() after an
+# alias renames them) match what a re-ingest of their source computes.
+#
+# The hash doesn't include the source. A row with the same hashed fields in two sources is
+# stored once: the source loaded later updates its location, bonus and arrangement through
+# ON CONFLICT (content_hash) instead of adding a second row. That is what loading
+# CleanWaterloo.csv and the raw sheet it was cleaned from (ingest/waterloo.py) needs, the
+# same reports in two forms, and rows hashed by v0003 have no source to namespace them with.
+# Two different students in different sources reporting exactly the same company, year,
+# salary, term, university and role therefore count once.
+import hashlib
+import pandas as pd
+from ..core.aliases import fold
+
+HASHED_COLUMNS = ["company", "year", "salary", "term", "university", "role"]
+
+
+def _normalized_text(column: pd.Series) -> pd.Series:
+    text = column.astype("string")
+    folded = {name: fold(name) for name in text.dropna().unique()}
+    return text.map(folded).astype("string").fillna("")
+
+
+def _normalized_number(column: pd.Series, decimals: int) -> pd.Series:
+    return column.astype("Float64").round(decimals).astype("string").fillna("")
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    The normalized text a row's content hash is computed from (before the occurrence suffix).
+    df has the names as they are stored, the company already through the alias normalizer.
+    """
+    term = df["term"].astype("Float64")
+    parts = [
+        _normalized_text(df["company"]),
+        _normalized_number(df["year"], 0),
+        _normalized_number(df["salary"], 2),
+        _normalized_number(term.mask((term == 0).fillna(False)), 0),
+        _normalized_text(df["university"]),
+        _normalized_text(df["role"])
+    ]
+    keys = parts[0]
+    for part in parts[1:]:
+        keys = keys + "\x1f" + part
+    return keys
+
+
+class RowHasher:
+    """
+    Content hashes for the chunks of one source. Two students can report exactly the same
+    salary, so the n-th repeat of a key within the source is hashed with n: the rows stay
+    distinct and still hash the same way on every run. Chunks must be fed in file order.
+    """
+
+    def __init__(self):
+        self.seen = pd.Series(dtype="int64")
+
+    def __call__(self, df: pd.DataFrame) -> pd.Series:
+        keys = row_keys(df)
+        occurrence = keys.groupby(keys).cumcount() + keys.map(self.seen).fillna(0).astype("int64")
+        self.seen = self.seen.add(keys.value_counts(), fill_value=0).astype("int64")
+        hashed = keys + "\x1f" + occurrence.astype("string")
+        return hashed.map(lambda key: hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+
+def source_fingerprint(source) -> str:
+    """Hash of a CSV file's bytes, or of a DataFrame's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, pd.DataFrame):
+        digest.update(pd.util.hash_pandas_object(source, index=False).values.tobytes())
+        digest.update(",".join(map(str, source.columns)).encode())
+    else:
+        with open(source, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,226 @@
+# Parser for the raw "Waterloo Co-op Salaries" spreadsheet (the community sheet CleanWaterloo.csv
+# was cleaned from by hand). Every cell of its salary column is free text holding one or more
+# reports, e.g. "40/hr, 48/hr (5th coop)" or "106k USD annual prorated (~$51/hr USD)". The cells
+# are split into reports and parsed column-wise with pandas string/regex operations, a report
+# that doesn't yield a usable rate ends up in the failures frame with the reason instead.
+import os
+import re
+import pandas as pd
+from ..core.aliases import INVISIBLE
+from .bulk import IngestResult, ingest_salaries
+
+UNIVERSITY = "University of Waterloo"
+
+# the sheet's header row sits below a title row
+SHEET_COLUMNS = {
+    "Company / Role": "company",
+    "Salary Information (CAD unless otherwise specified)": "salary_text",
+    "Benefits": "benefits_text",
+    "Year": "year_text",
+    "Position": "position"
+}
+
+# what the cleaned data was converted with: CAD per unit of each currency and hours per pay period
+EXCHANGE_RATES = {"CAD": 1.0, "USD": 1.38}
+HOURS_PER_UNIT = {"hour": 1, "week": 40, "month": 160, "year": 2080}
+# a co-op term is four months, benefits quoted per period are totalled over the term
+PERIODS_PER_TERM = {"hour": 640, "week": 16, "month": 4, "year": 1 / 3}
+
+UNIT_ALIASES = {
+    "h": "hour", "hr": "hour", "hrs": "hour", "hour": "hour", "hours": "hour",
+    "wk": "week", "week": "week", "weeks": "week",
+    "mo": "month", "month": "month", "months": "month",
+    "yr": "year", "year": "year", "annual": "year", "annually": "year"
+}
+CURRENCY_SYMBOLS = {"¥": "JPY", "€": "EUR", "£": "GBP"}
+
+# "2B" style academic terms, named by the term the co-op follows
+ACADEMIC_TERMS = {"1b": 1, "2a": 2, "2b": 3, "3a": 4, "3b": 5, "4a": 6}
+# a parenthesis after the company that names the position, "Carfax (Dev)" but not "Cisco (Ottawa Office)"
+ROLE_WORDS = r"\b(?:dev|developer|engineer(?:ing)?|analyst|design|data|science|marketing|qa|product|software|swe)\b"
+# "mid 30s/hr"
+DECADE_OFFSETS = {"low": 2, "mid": 5, "high": 8}
+
+AMOUNT = r"\d+(?:\.\d+)?"
+UNIT = r"hours?|hrs?|h|weeks?|wk|months?|mo|years?|yr|annual(?:ly)?"
+RATE = (
+    rf"[~$]*(?P<low>{AMOUNT})(?P<low_k>k)?"
+    rf"(?:\s*-\s*\$?(?P<high>{AMOUNT})(?P<high_k>k)?)?\+?\??"
+    rf"\s*(?P<currency>USD|CAD)?\s*(?:/|per\b)?\s*(?P<unit>{UNIT})\b"
+    rf"(?:\s*(?P<currency_after>USD|CAD)\b)?"
+)
+# a number with no unit at all, "30.75 (3rd coop)", only taken as an hourly rate below this
+BARE_RATE = rf"^\s*[~$]*(?P<bare>{AMOUNT})\s*(?:\(|$)"
+MAX_BARE_HOURLY = 200
+DECADE = r"\b(?P<qualifier>low|mid|high)\s+(?P<decade>\d)0s\b"
+# a one-off benefit amount ("$1000 signing bonus", "5k relocation", "2000 CAD stipend"): marked
+# as money by a $, a k or a currency and not quoted per some period the units don't cover
+# ("$25/day lunch"). A bare number is more likely a count, "4 days PTO".
+ONE_OFF = (
+    rf"(?:\$\s*~?|~?\$\s*|(?<![\d.])(?={AMOUNT}(?:k\b|\s*(?:USD|CAD)\b)))"
+    rf"(?P<amount>{AMOUNT})(?P<k>k)?\b(?:\s*(?:USD|CAD)\b)?"
+    r"(?!\s*(?:/|per\b|daily|weekly|monthly|yearly|an?\s+(?:hour|day|week|month|year)\b|%))"
+)
+# benefits text that didn't become a bonus, reported without failing its salary
+UNPARSED_BENEFIT = "unparsed benefit, no bonus"
+
+# commas between reports: not inside parentheses and not a thousands separator
+REPORT_SEPARATOR = r",(?![^()]*\))"
+THOUSANDS_SEPARATOR = r"(?<=\d),(?=\d{3}\b)"
+
+
+def read_sheet(source) -> pd.DataFrame:
+    """The raw sheet (a path or an already read DataFrame) with SHEET_COLUMNS names"""
+    if not isinstance(source, pd.DataFrame):
+        source = pd.read_csv(source, skiprows=1, dtype=str)
+    sheet = source.rename(columns=SHEET_COLUMNS).reindex(columns=list(SHEET_COLUMNS.values()))
+    # 1-based among the data rows, what failures are reported against
+    sheet["sheet_row"] = source.index + 1
+    return sheet
+
+
+def _clean_text(column: pd.Series) -> pd.Series:
+    text = column.astype("string").str.replace(INVISIBLE, "", regex=True)
+    return text.str.replace(r"\s+", " ", regex=True).str.strip().str.strip('"').replace("", pd.NA)
+
+
+def _split_reports(sheet: pd.DataFrame) -> pd.DataFrame:
+    """One row per comma separated report of a salary cell, parenthesised reports unwrapped"""
+    text = _clean_text(sheet["salary_text"]).str.replace(THOUSANDS_SEPARATOR, "", regex=True)
+    reports = sheet.assign(report=text.str.split(REPORT_SEPARATOR, regex=True)).explode("report")
+    report = reports["report"].astype("string").str.strip()
+    reports["report"] = report.str.replace(r"^\((.*)\)$", r"\1", regex=True).str.strip()
+    return reports.reset_index(drop=True)
+
+
+def _amount(value: pd.Series, thousands: pd.Series) -> pd.Series:
+    return pd.to_numeric(value, errors="coerce") * thousands.notna().map({True: 1000, False: 1})
+
+
+def parse_rates(text: pd.Series, unitless_hourly: bool = True) -> pd.DataFrame:
+    """
+    rate (range midpoint), unit and currency of the first amount in every text. Numbers without
+    a unit are taken as hourly rates unless unitless_hourly is False.
+    """
+    found = text.str.extract(RATE, flags=re.IGNORECASE)
+    low = _amount(found["low"], found["low_k"])
+    high = _amount(found["high"], found["high_k"])
+    rate = (low + high.fillna(low)) / 2
+    unit = found["unit"].str.lower().map(UNIT_ALIASES)
+
+    bare = pd.to_numeric(text.str.extract(BARE_RATE)["bare"], errors="coerce")
+    decade = text.str.extract(DECADE, flags=re.IGNORECASE)
+    decade_rate = pd.to_numeric(decade["decade"], errors="coerce") * 10 + decade["qualifier"].str.lower().map(DECADE_OFFSETS)
+    # without a unit, plausible hourly numbers and "mid 30s" are hourly rates
+    fallbacks = (bare.where(bare < MAX_BARE_HOURLY), decade_rate) if unitless_hourly else ()
+    for fallback in fallbacks:
+        missing = rate.isna() & fallback.notna()
+        rate = rate.mask(missing, fallback)
+        unit = unit.mask(missing, "hour")
+
+    currency = found["currency"].fillna(found["currency_after"]).str.upper()
+    symbol = text.str.extract(f"([{''.join(CURRENCY_SYMBOLS)}])")[0].map(CURRENCY_SYMBOLS)
+    currency = currency.fillna(symbol).fillna("CAD")
+    return pd.DataFrame({"rate": rate, "unit": unit, "currency": currency})
+
+
+def parse_terms(text: pd.Series) -> pd.Series:
+    """Co-op term number from "4th coop" or an academic term like "3A", NA otherwise"""
+    ordinal = pd.to_numeric(text.str.extract(r"(\d)(?:st|nd|rd|th)\s*co-?op", flags=re.IGNORECASE)[0], errors="coerce")
+    academic = text.str.extract(r"\b([1-4][ab])\b", flags=re.IGNORECASE)[0].str.lower().map(ACADEMIC_TERMS)
+    term = ordinal.fillna(pd.to_numeric(academic, errors="coerce"))
+    return term.where(term.between(1, 6)).astype("Int64")
+
+
+def parse_years(text: pd.Series) -> pd.Series:
+    """The latest year in a year cell ("2023/2024", "2022, 2023")"""
+    years = text.str.extractall(r"\b(20\d\d)\b")[0].astype(int)
+    return years.groupby(level=0).max().reindex(text.index).astype("Int64")
+
+
+def _split_company(company: pd.Series) -> pd.DataFrame:
+    """"Carfax (Dev)" -> Carfax, Dev. The trailing parenthesis is dropped from the name, it's a role or a term at times"""
+    parts = _clean_text(company).str.extract(r"^(?P<company>.*?)\s*(?:\((?P<note>[^()]*)\))?$")
+    parts = parts.apply(lambda column: column.str.strip().replace("", pd.NA))
+    parts["term"] = parse_terms(parts["note"].fillna(""))
+    parts["role"] = parts["note"].where(parts["note"].str.contains(ROLE_WORDS, case=False).fillna(False).astype(bool))
+    return parts
+
+
+def _failure_reasons(reports: pd.DataFrame) -> pd.Series:
+    text = reports["report"].fillna("")
+    reason = pd.Series(pd.NA, index=reports.index, dtype="string")
+    checks = [
+        (text == "", "no salary"),
+        (text.str.startswith("+"), "relative to another rate"),
+        (reports["rate"].isna() & text.str.contains("average", case=False), "relative to the co-op average"),
+        (reports["rate"].isna(), "no rate found"),
+        (reports["unit"].isna(), "no pay period"),
+        (reports["exchange_rate"].isna(), "no exchange rate for " + reports["currency"].astype("string")),
+        (reports["year"].isna(), "no year"),
+    ]
+    # the first failing check is the reason, so go through them backwards
+    for failed, message in reversed(checks):
+        reason = reason.mask(failed, message)
+    return reason
+
+
+def parse_waterloo(source, default_year: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parse the raw sheet into (salaries, failures). salaries has the SALARY_COLUMNS ingest_salaries()
+    takes, with hourly CAD salaries and benefits totalled over the term as the bonus. failures
+    has the sheet_row, company, report and reason of every report that couldn't be parsed, and
+    of benefits that didn't yield a bonus (reason UNPARSED_BENEFIT, their salary is kept).
+    Rows without a year get default_year, or fail when it isn't given.
+    """
+    sheet = read_sheet(source)
+    reports = _split_reports(sheet)
+    text = reports["report"].fillna("")
+
+    reports = reports.join(parse_rates(text))
+    reports["term"] = parse_terms(text)
+    reports["year"] = parse_years(_clean_text(reports["year_text"]).fillna("")).fillna(default_year).astype("Int64")
+    reports["exchange_rate"] = reports["currency"].map(EXCHANGE_RATES)
+    hourly = reports["rate"] * reports["exchange_rate"] / reports["unit"].map(HOURS_PER_UNIT)
+    reports["salary"] = hourly.round(2)
+
+    benefits_text = _clean_text(reports["benefits_text"]).str.replace(THOUSANDS_SEPARATOR, "", regex=True).fillna("")
+    # a benefit is never a bare hourly number, "$25" alone is a one-off
+    benefits = parse_rates(benefits_text, unitless_hourly=False)
+    # a one-off amount ("5k relocation") has no period, stipends per period count for the whole term
+    one_off = benefits_text.str.extract(ONE_OFF, flags=re.IGNORECASE)
+    benefits_amount = benefits["rate"].fillna(_amount(one_off["amount"], one_off["k"]))
+    # "4% vacation pay" can't be turned into an amount
+    benefits_amount = benefits_amount.mask(benefits_text.str.contains("%", regex=False))
+    per_term = benefits["unit"].map(PERIODS_PER_TERM).fillna(1)
+    benefits_currency = benefits["currency"].where(benefits_text.str.contains("USD|CAD", case=False), reports["currency"])
+    reports["bonus"] = (benefits_amount * per_term * benefits_currency.map(EXCHANGE_RATES)).round(2)
+
+    company = _split_company(reports["company"])
+    reports["company"] = company["company"]
+    reports["term"] = reports["term"].fillna(company["term"])
+    reports["role"] = _clean_text(reports["position"]).fillna(company["role"])
+    reports["university"] = UNIVERSITY
+
+    reports["reason"] = _failure_reasons(reports)
+    reports.loc[reports["company"].isna(), "reason"] = "no company"
+    failed = reports["reason"].notna()
+
+    salaries = reports.loc[~failed, ["company", "year", "salary", "university", "term", "bonus", "role"]]
+    failures = reports.loc[failed, ["sheet_row", "company", "report", "reason"]]
+    # once per sheet row, its reports share the benefits cell
+    unparsed = ~failed & (benefits_text != "") & reports["bonus"].isna()
+    unparsed_benefits = (
+        reports.loc[unparsed, ["sheet_row", "company"]]
+        .assign(report=benefits_text[unparsed], reason=UNPARSED_BENEFIT)
+        .drop_duplicates("sheet_row")
+    )
+    failures = pd.concat([failures, unparsed_benefits]).sort_values("sheet_row", kind="stable")
+    return salaries.reset_index(drop=True), failures.reset_index(drop=True)
+
+
+def ingest_waterloo_sheet(path: str, default_year: int | None = None) -> tuple[IngestResult, pd.DataFrame]:
+    """Parse a raw sheet and bulk load what parsed. Returns the rows inserted and updated, and the failures."""
+    salaries, failures = parse_waterloo(path, default_year)
+    result = ingest_salaries(salaries, source_name=os.path.basename(path))
+    return result, failures
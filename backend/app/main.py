@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from .middleware import setup_middleware
 from .data_loader import load_csv_data, load_universities_json, seed_roles, fix_incorrect_role
-from .routers import roles, salaries, universities, companies, admin, locations, analytics
-from .database import engine, create_db_and_tables
+from .routers import roles, salaries, universities, companies, admin, locations, analytics, search, metrics
+from .database import engine
+from .migrations import run_migrations
+from .core import university_domains
+from .core.jobs import jobs
 
 # initialize the instance 
 app = FastAPI()
@@ -15,11 +18,19 @@ app.include_router(universities.router)
 app.include_router(admin.router)
 app.include_router(roles.router)
 app.include_router(analytics.router)
+app.include_router(search.router)
+app.include_router(metrics.router)
 
 # Setup middleware
 setup_middleware(app)
 
 @app.on_event("startup")
 def on_startup(): 
-    create_db_and_tables() 
-    
+    # replaces create_all(): creates the tables and indexes, safe to run from several replicas at once
+    run_migrations(engine)
+    university_domains.prime(engine)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # running loads stop after their current chunk, which is committed
+    jobs.shutdown()
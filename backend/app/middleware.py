@@ -1,15 +1,56 @@
+import time
 from fastapi.middleware.cors import CORSMiddleware
 from .config import FRONTEND_URL
 from fastapi import FastAPI
 from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from .core.rate_limiter import limiter
+from .core.db_pool import database_timeout_handler
+from .core.metrics import metrics, route_of
+
+
+class MetricsMiddleware:
+    """
+    Records every request in core.metrics. A plain ASGI middleware rather than an
+    @app.middleware("http") one, which would buffer streamed responses and run the app in
+    another task.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        # an exception that escapes the app is answered with a 500 by the outer middleware
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = metrics.request_started(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.request_finished(method, route_of(scope), status, time.perf_counter() - started, queries)
+
 
 def setup_middleware(app: FastAPI):
     # Add rate limiting middleware
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    
+
+    # pool checkout and statement timeouts become a 503 with Retry-After
+    app.add_exception_handler(PoolTimeoutError, database_timeout_handler)
+    app.add_exception_handler(DBAPIError, database_timeout_handler)
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -17,4 +58,7 @@ def setup_middleware(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-    )
\ No newline at end of file
+    )
+
+    # added last so it is the outermost, the timings include the CORS middleware
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,51 @@
+# Schema migrations. Every module in versions/ is one migration, applied in file name order
+# and recorded in the schema_migrations table. On Postgres the whole run holds an advisory
+# lock, so replicas starting at the same time wait for each other instead of racing.
+import importlib
+import pkgutil
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select
+from sqlalchemy.engine import Engine
+from . import versions
+
+# arbitrary, but must be the same for every process migrating this database
+ADVISORY_LOCK_KEY = 7_261_524
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def available_migrations():
+    names = sorted(module.name for module in pkgutil.iter_modules(versions.__path__))
+    return [importlib.import_module(f"{versions.__name__}.{name}") for name in names]
+
+
+def run_migrations(engine: Engine):
+    is_postgres = engine.dialect.name == "postgresql"
+    with engine.connect() as connection:
+        if is_postgres:
+            connection.execute(select(func.pg_advisory_lock(ADVISORY_LOCK_KEY)))
+            connection.commit()
+        try:
+            schema_migrations.create(connection, checkfirst=True)
+            connection.commit()
+            applied = set(connection.execute(select(schema_migrations.c.version)).scalars())
+            connection.commit()
+
+            for migration in available_migrations():
+                version = migration.__name__.rsplit(".", 1)[-1]
+                if version in applied:
+                    continue
+                # each migration and its bookkeeping row commit (or roll back) together
+                with connection.begin():
+                    migration.upgrade(connection)
+                    connection.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+                print(f"Applied migration {version}")
+        finally:
+            if is_postgres:
+                connection.execute(select(func.pg_advisory_unlock(ADVISORY_LOCK_KEY)))
+                connection.commit()
@@ -0,0 +1,6 @@
+# python -m app.migrations applies pending migrations without starting the API,
+# e.g. as a release step before rolling out new replicas
+from ..database import engine
+from . import run_migrations
+
+run_migrations(engine)
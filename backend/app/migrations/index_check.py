@@ -0,0 +1,210 @@
+# python -m app.migrations.index_check
+# Requests the routes that filter, page through or group reportedsalary and pendingsalary,
+# records every SELECT their handlers (and the SqlAnalytics / sql_stats queries behind them)
+# send to the database, EXPLAINs it and fails if any of them still needs a full scan of one
+# of those tables. The statements are the ones the code builds today, so a changed query is
+# checked as it is. A GET route that reads the database without being listed in REQUESTS or
+# WHOLE_TABLE fails the check too, so a new one can't go unchecked either.
+#
+# Postgres happily seq scans a small table even when an index exists, so sequential scans
+# are disabled for the check: a Seq Scan that survives that means there is no usable index
+# for the query.
+import asyncio
+import json
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.parse import quote
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlmodel import select
+from ..auth import get_admin_user
+from ..core.analytics_engine import get_analytics, get_profile_session, get_sql_analytics
+from ..core.location_hierarchy import get_hierarchy
+from ..core.pagination import PENDING_KEY, SALARY_KEY, encode_cursor
+from ..database import async_engine, async_session, get_analytics_session, get_session
+from ..main import app
+from ..models.salary import ReportedSalary
+
+CHECKED_TABLES = {"reportedsalary", "pendingsalary"}
+
+# path (as the route declares it) and query parameters, "{company}", "{location}", "{role}"
+# and the cursors are filled in by samples()
+REQUESTS = [
+    ("/all-salaries", {}),
+    ("/all-salaries", {"cursor": "{salary_cursor}"}),
+    ("/company/all-salaries", {"company": "{company}"}),
+    ("/company/all-salaries", {"company": "{company}", "cursor": "{salary_cursor}"}),
+    ("/company/average-salary", {"company": "{company}"}),
+    ("/company/top-university", {"company": "{company}"}),
+    ("/company/top-location", {"company": "{company}"}),
+    ("/company/{company}/profile", {}),
+    ("/location/all-salaries", {"location": "{location}"}),
+    ("/location/all-salaries", {"location": "{location}", "cursor": "{salary_cursor}"}),
+    ("/location/average-salary", {"location": "{location}"}),
+    ("/location/top-university", {"location": "{location}"}),
+    ("/location/top-company", {"location": "{location}"}),
+    ("/location/{location}/profile", {}),
+    ("/analytics/salary-trends", {}),
+    ("/analytics/salary-trends", {"split_by": "company", "series": "{company}"}),
+    ("/analytics/salary-distribution", {"company": "{company}"}),
+    ("/analytics/salary-distribution", {"role": "{role}"}),
+    ("/analytics/salary-distribution", {"year_from": "2023"}),
+    ("/analytics/company-comparison", {"companies": "{company}", "distribution": "quantiles"}),
+    ("/analytics/company-comparison", {"companies": "{company}", "distribution": "histogram"}),
+    ("/admin/pending-submissions", {}),
+    ("/admin/pending-submissions", {"cursor": "{pending_cursor}"}),
+]
+
+# GET routes that read the database but are not checked: whole table aggregates and lists
+# that read every row by design, and lookups in tables other than CHECKED_TABLES
+WHOLE_TABLE = {
+    "/all-companies",
+    "/all-locations",
+    "/all-roles",
+    "/all-universities",
+    "/universities/resolve",
+    "/search/suggest",
+    "/analytics/overview",
+    "/analytics/top-companies",
+    "/analytics/top-universities",
+    "/analytics/top-locations",
+    "/analytics/top-roles",
+    "/analytics/yearly-growth",
+    "/analytics/salary-by-term",
+    "/analytics/market-insights",
+    "/admin/aliases",
+    "/admin/name-suggestions/{submission_id}",
+}
+
+# used when the table has no rows to take a sample from
+DEFAULT_SAMPLES = {"company": "Shopify", "location": "Toronto", "role": "Software Engineer"}
+
+DATABASE_DEPENDENCIES = {get_session, get_analytics_session, get_analytics, get_profile_session}
+
+
+async def samples(session):
+    """Values for the placeholders in REQUESTS, real ones where the table has them"""
+    values = {}
+    for name, default in DEFAULT_SAMPLES.items():
+        column = getattr(ReportedSalary, name)
+        value = (await session.exec(select(column).where(column != "").limit(1))).first()
+        values[name] = value or default
+    values["salary_cursor"] = encode_cursor(SimpleNamespace(year=2023, id=100), SALARY_KEY, "next")
+    values["pending_cursor"] = encode_cursor(SimpleNamespace(submitted_at=datetime(2024, 1, 1), id=100), PENDING_KEY, "next")
+    return values
+
+
+def reads_database(dependant):
+    dependencies = list(dependant.dependencies)
+    while dependencies:
+        dependency = dependencies.pop()
+        if dependency.call in DATABASE_DEPENDENCIES:
+            return True
+        dependencies.extend(dependency.dependencies)
+    return False
+
+
+def api_routes(routes):
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        elif hasattr(route, "original_router"):
+            # newer FastAPI versions keep an included router as one route
+            yield from api_routes(route.original_router.routes)
+
+
+def unchecked_routes():
+    checked = {path for path, _ in REQUESTS} | WHOLE_TABLE
+    return sorted({
+        route.path_format for route in api_routes(app.routes)
+        if "GET" in route.methods and route.path_format not in checked and reads_database(route.dependant)
+    })
+
+
+async def capture(client, path, params):
+    """The response to GET path and the SELECTs its handler ran, with their parameters"""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get(path, params=params)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return response, statements
+
+
+async def _postgres_full_scans(connection, statement, parameters):
+    await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+            scans.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+async def _sqlite_full_scans(connection, statement, parameters):
+    scans = []
+    for row in await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+        # e.g. "SCAN reportedsalary" vs "SEARCH reportedsalary USING INDEX ..."
+        words = row[-1].split()
+        if words[0] == "SCAN" and words[1] in CHECKED_TABLES and "INDEX" not in words:
+            scans.append(words[1])
+    return scans
+
+
+async def check_indexes():
+    full_scans = _postgres_full_scans if async_engine.dialect.name == "postgresql" else _sqlite_full_scans
+    failures = 0
+    for path in unchecked_routes():
+        failures += 1
+        print(f"UNCHECKED  {path}: add it to REQUESTS or WHOLE_TABLE")
+
+    async with async_session() as session:
+        values = await samples(session)
+        # the location hierarchy is read once per process, not per request
+        await get_hierarchy(session)
+
+    # straight to the SQL analytics engine, whatever ANALYTICS_ENGINE says, and past the admin login
+    app.dependency_overrides[get_analytics] = get_sql_analytics
+    app.dependency_overrides[get_profile_session] = get_analytics_session
+    app.dependency_overrides[get_admin_user] = lambda: {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://index-check") as client:
+        for path, params in REQUESTS:
+            url = path.format(**{name: quote(str(value), safe="") for name, value in values.items()})
+            params = {name: value.format(**values) for name, value in params.items()}
+            response, statements = await capture(client, url, params)
+            name = str(httpx.URL(url, params=params))
+            if response.status_code >= 500:
+                failures += 1
+                print(f"ERROR      {name}: {response.status_code}")
+                continue
+
+            scans = []
+            async with async_engine.connect() as connection:
+                for statement, parameters in statements:
+                    async with connection.begin():
+                        scans.extend(await full_scans(connection, statement, parameters))
+            if scans:
+                failures += 1
+                print(f"FULL SCAN  {name}: {', '.join(sorted(set(scans)))}")
+            else:
+                print(f"index      {name} ({len(statements)} statements)")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check_indexes()) else 0)
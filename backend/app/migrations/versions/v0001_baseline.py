@@ -0,0 +1,55 @@
+# The schema as create_all() used to build it. Tables are spelled out here instead of taken
+# from the models so that this migration keeps creating the same schema as the models change.
+# Existing databases already have these tables and are left untouched.
+from sqlalchemy import JSON, Column, DateTime, Enum, Float, Integer, MetaData, String, Table
+from sqlalchemy.dialects.postgresql import ARRAY
+
+metadata = MetaData()
+
+Table(
+    "reportedsalary", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company", String, nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("salary", Float, nullable=False),
+    Column("university", String, nullable=False),
+    Column("term", Integer),
+    Column("location", String),
+    Column("bonus", Float),
+    Column("role", String, nullable=False),
+    Column("arrangement", String)
+)
+
+Table(
+    "pendingsalary", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company", String, nullable=False),
+    Column("salary", Float, nullable=False),
+    Column("role", String, nullable=False),
+    Column("location", String, nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("university", String, nullable=False),
+    Column("bonus", Float),
+    Column("term", Integer),
+    Column("arrangement", String),
+    Column("status", Enum("PENDING", "APPROVED", "REJECTED", name="submissionstatus"), nullable=False),
+    Column("ip_address", String, nullable=False),
+    Column("submitted_at", DateTime, nullable=False)
+)
+
+Table(
+    "role", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("role_name", String, nullable=False)
+)
+
+Table(
+    "universities", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("domains", ARRAY(String).with_variant(JSON(), "sqlite"))
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
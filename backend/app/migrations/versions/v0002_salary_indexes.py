@@ -0,0 +1,37 @@
+# Secondary indexes for the filters, orderings and group-bys the routers run:
+# company/location pages (filter + keyset order), /all-salaries keyset pagination,
+# per-year analytics, role lookups and the moderation queue.
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+reportedsalary = Table(
+    "reportedsalary", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company", String),
+    Column("year", Integer),
+    Column("salary", Float),
+    Column("location", String),
+    Column("role", String)
+)
+
+pendingsalary = Table(
+    "pendingsalary", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("status", String),
+    Column("submitted_at", DateTime)
+)
+
+indexes = [
+    Index("ix_reportedsalary_company_year_id", reportedsalary.c.company, reportedsalary.c.year, reportedsalary.c.id),
+    Index("ix_reportedsalary_location_year_id", reportedsalary.c.location, reportedsalary.c.year, reportedsalary.c.id),
+    Index("ix_reportedsalary_year_id", reportedsalary.c.year, reportedsalary.c.id),
+    Index("ix_reportedsalary_year_salary", reportedsalary.c.year, reportedsalary.c.salary),
+    Index("ix_reportedsalary_role", reportedsalary.c.role),
+    Index("ix_pendingsalary_status_submitted_at", pendingsalary.c.status, pendingsalary.c.submitted_at)
+]
+
+
+def upgrade(connection):
+    for index in indexes:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,100 @@
+# Content hashes for idempotent ingest: reportedsalary.content_hash (unique, NULL for rows
+# that came through the submission form) and the ingestedsource bookkeeping table. Rows that
+# already exist are hashed so re-running a loader after upgrading doesn't duplicate them.
+# They are hashed the way a re-ingest of their source hashes its rows: names folded like the
+# alias normalizer folds them and a term of 0 like a missing one. A re-ingest also maps names
+# through the namealias table (v0004), seeded with the very replacements the old loaders
+# applied before storing, so the stored names already are the ones it maps to.
+# The fold and the hash are a copy of ingest/hashing.py as this migration was written, so the
+# migration keeps doing the same thing as that module changes.
+import hashlib
+import re
+import unicodedata
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table, bindparam, inspect, select, text, update
+import pandas as pd
+
+metadata = MetaData()
+
+reportedsalary = Table(
+    "reportedsalary", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company", String),
+    Column("year", Integer),
+    Column("salary", Float),
+    Column("term", Integer),
+    Column("university", String),
+    Column("role", String),
+    Column("content_hash", String)
+)
+
+ingestedsource = Table(
+    "ingestedsource", metadata,
+    Column("name", String, primary_key=True),
+    Column("content_hash", String, nullable=False),
+    Column("row_count", Integer, nullable=False),
+    Column("ingested_at", DateTime, nullable=False)
+)
+
+content_hash_index = Index("ux_reportedsalary_content_hash", reportedsalary.c.content_hash, unique=True)
+
+
+INVISIBLE = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+WHITESPACE = re.compile(r"\s+")
+
+
+def _fold(name: str) -> str:
+    cleaned = WHITESPACE.sub(" ", INVISIBLE.sub("", name)).strip()
+    decomposed = unicodedata.normalize("NFKD", cleaned.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _normalized_text(column: pd.Series) -> pd.Series:
+    text = column.astype("string")
+    folded = {name: _fold(name) for name in text.dropna().unique()}
+    return text.map(folded).astype("string").fillna("")
+
+
+def _normalized_number(column: pd.Series, decimals: int) -> pd.Series:
+    return column.astype("Float64").round(decimals).astype("string").fillna("")
+
+
+def _content_hashes(rows: pd.DataFrame) -> pd.Series:
+    """The hash of every row, the n-th repeat of the same content hashed with n"""
+    term = rows["term"].astype("Float64")
+    keys = _normalized_text(rows["company"])
+    for part in (
+        _normalized_number(rows["year"], 0),
+        _normalized_number(rows["salary"], 2),
+        _normalized_number(term.mask((term == 0).fillna(False)), 0),
+        _normalized_text(rows["university"]),
+        _normalized_text(rows["role"])
+    ):
+        keys = keys + "\x1f" + part
+    hashed = keys + "\x1f" + keys.groupby(keys).cumcount().astype("string")
+    return hashed.map(lambda key: hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("reportedsalary")}
+    if "content_hash" not in columns:
+        connection.execute(text("ALTER TABLE reportedsalary ADD COLUMN content_hash VARCHAR"))
+
+    # in id order so repeats are numbered in file order
+    rows = pd.DataFrame(
+        connection.execute(
+            select(reportedsalary.c.id, reportedsalary.c.company, reportedsalary.c.year, reportedsalary.c.salary,
+                   reportedsalary.c.term, reportedsalary.c.university, reportedsalary.c.role)
+            .where(reportedsalary.c.content_hash.is_(None))
+            .order_by(reportedsalary.c.id)
+        ).all(),
+        columns=["id", "company", "year", "salary", "term", "university", "role"]
+    )
+    if len(rows):
+        rows["hash"] = _content_hashes(rows)
+        connection.execute(
+            update(reportedsalary).where(reportedsalary.c.id == bindparam("row_id")).values(content_hash=bindparam("hash")),
+            [{"row_id": int(row_id), "hash": value} for row_id, value in zip(rows["id"], rows["hash"])]
+        )
+
+    content_hash_index.create(connection, checkfirst=True)
+    ingestedsource.create(connection, checkfirst=True)
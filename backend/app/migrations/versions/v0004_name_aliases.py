@@ -0,0 +1,83 @@
+# The namealias table behind app/core/aliases.py, seeded with the replacements the Concordia
+# loader used to hard-code so it keeps loading the same names. Spellings that only differed
+# in case or surrounding spaces are left out, the normalizer folds those.
+from sqlalchemy import Column, Enum, Index, Integer, MetaData, String, Table, select
+
+metadata = MetaData()
+
+namealias = Table(
+    "namealias", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", Enum("COMPANY", "LOCATION", name="namekind"), nullable=False),
+    Column("alias", String, nullable=False),
+    Column("canonical", String, nullable=False),
+    Index("ux_namealias_kind_alias", "kind", "alias", unique=True)
+)
+
+COMPANY_ALIASES = {
+    "Pratt & Whitney": "Pratt and Whitney",
+    "Pratt & Whitney Canada": "Pratt and Whitney",
+    "Pratt and Whitney Canada": "Pratt and Whitney",
+    "Airbus-ACE": "Airbus",
+    "Ibwave": "iBwave",
+    "CN National Railway (Internship)": "CN",
+    "Health systems R&A": "Healthcare Systems R&A",
+    "Intact Financial Corp": "Intact",
+    "Sun Life Financial Canada": "Sun Life Financial",
+    "Samsung Ads | AdGear": "Samsung",
+    "Tangerine Software": "Tangerine Bank",
+    "ticketmaster": "Ticker Master",
+    "ubicquia": "Ubicquia",
+    "X2O media": "X2O Media",
+}
+
+LOCATION_ALIASES = {
+    # Quebec
+    "Montreal": "Montreal, QC",
+    "Mirabel": "Mirabel, QC",
+    "West Island": "Montreal, QC",
+    "St-Laurent": "Saint-Laurent, QC",
+    "St-Bruno": "Saint-Bruno, QC",
+    "Vaudreuil Dorion": "Vaudreuil-Dorion, QC",
+    "Sorel-Tracy": "Sorel-Tracy, QC",
+    "Dorval": "Dorval, QC",
+    "South Shore": "Montreal, QC",
+    "Laval": "Laval, QC",
+    "remote": "Remote",
+    "Saint hubert": "Saint-Hubert, QC",
+    "St-Hubert": "Saint-Hubert, QC",
+    "Brossard": "Brossard, QC",
+    "Québec": "Quebec City, QC",
+    "Quebec": "Quebec City, QC",
+    "Quebec City": "Quebec City, QC",
+    "Boisbriand": "Boisbriand, QC",
+    "Contrecoeur": "Contrecoeur, QC",
+    "Amos": "Amos, QC",
+    # Ontario
+    "Toronto": "Toronto, ON",
+    "Waterloo": "Waterloo, ON",
+    "Ottawa": "Ottawa, ON",
+    # British Columbia
+    "Vancouver": "Vancouver, BC",
+    # Nova Scotia
+    "Halifax": "Halifax, NS",
+    # US
+    "New York City": "New York City, NY",
+    "Bay Area": "Bay Area, CA",
+    "San Francisco": "San Francisco, CA",
+    "San Jose": "San Jose, CA",
+    "Seattle": "Seattle, WA",
+}
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
+    existing = set(connection.execute(select(namealias.c.kind, namealias.c.alias)).all())
+    rows = [
+        {"kind": kind, "alias": alias, "canonical": canonical}
+        for kind, aliases in (("COMPANY", COMPANY_ALIASES), ("LOCATION", LOCATION_ALIASES))
+        for alias, canonical in aliases.items()
+        if (kind, alias) not in existing
+    ]
+    if rows:
+        connection.execute(namealias.insert(), rows)
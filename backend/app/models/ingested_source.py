@@ -0,0 +1,9 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+
+# One row per source file the ingest pipeline has loaded, to skip files that haven't changed
+class IngestedSource(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    content_hash: str
+    row_count: int
+    ingested_at: datetime = Field(default_factory=datetime.utcnow)
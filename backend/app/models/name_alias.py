@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from enum import Enum
+
+class NameKind(str, Enum):
+    COMPANY = "company"
+    LOCATION = "location"
+
+# Another spelling of a company or location and the name it is stored as.
+# app/core/aliases.py compiles these into the normalizer ingest, submissions and approvals go through
+class NameAliasBase(SQLModel):
+    kind: NameKind
+    alias: str = Field(min_length=1)
+    canonical: str = Field(min_length=1)
+
+class NameAlias(NameAliasBase, table=True):
+    # Managed by the migrations in app/migrations/versions, keep the two in sync
+    __table_args__ = (
+        Index("ux_namealias_kind_alias", "kind", "alias", unique=True),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
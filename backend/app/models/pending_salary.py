@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from datetime import datetime
 from enum import Enum
 
@@ -8,6 +9,11 @@ class SubmissionStatus(str, Enum):
     REJECTED = "rejected"
 
 class PendingSalary(SQLModel, table=True):
+    # Managed by the migrations in app/migrations/versions, keep the two in sync
+    __table_args__ = (
+        Index("ix_pendingsalary_status_submitted_at", "status", "submitted_at"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     company: str
     salary: float
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from ..core.pagination import SalaryPage
+
+# Response models shared by the company and location profile endpoints
+class ProfileYearData(BaseModel):
+    year: int
+    avg_salary: float
+    median_salary: float
+    p25_salary: float
+    p75_salary: float
+    count: int
+
+class ProfileTermData(BaseModel):
+    term: int
+    avg_salary: float
+    total_reports: int
+
+class SalaryProfile(BaseModel):
+    total_reports: int
+    avg_salary: float
+    median_salary: float
+    p25_salary: float
+    p75_salary: float
+    min_salary: float
+    max_salary: float
+    years: list[ProfileYearData]
+    terms: list[ProfileTermData]
+    # the first page of the matching reports, follow salaries.next_cursor on the all-salaries endpoint
+    salaries: SalaryPage
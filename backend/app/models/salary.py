@@ -1,7 +1,18 @@
 from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
 
 # Model for the Reported Salary Table
 class ReportedSalary(SQLModel, table=True):
+    # Managed by the migrations in app/migrations/versions, keep the two in sync
+    __table_args__ = (
+        Index("ix_reportedsalary_company_year_id", "company", "year", "id"),
+        Index("ix_reportedsalary_location_year_id", "location", "year", "id"),
+        Index("ix_reportedsalary_year_id", "year", "id"),
+        Index("ix_reportedsalary_year_salary", "year", "salary"),
+        Index("ix_reportedsalary_role", "role"),
+        Index("ux_reportedsalary_content_hash", "content_hash", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     company: str
     year: int
@@ -11,4 +22,6 @@ class ReportedSalary(SQLModel, table=True):
     location: str | None = None
     bonus: float | None = None
     role: str
-    arrangement: str | None = None
\ No newline at end of file
+    arrangement: str | None = None
+    # set by app/ingest for rows loaded from a source file, NULL for approved submissions
+    content_hash: str | None = Field(default=None, exclude=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel, Field
 from typing import List
-from sqlalchemy import Column, String
+from sqlalchemy import JSON, Column, String
 from sqlalchemy.dialects.postgresql import ARRAY
 
 
@@ -8,4 +8,5 @@ from sqlalchemy.dialects.postgresql import ARRAY
 class Universities(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     name: str
-    domains: List[str] = Field(sa_column=Column(ARRAY(String)))
\ No newline at end of file
+    # plain JSON on the SQLite stand-in, which has no array type
+    domains: List[str] = Field(sa_column=Column(ARRAY(String).with_variant(JSON(), "sqlite")))
\ No newline at end of file
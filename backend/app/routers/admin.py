@@ -1,43 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import datetime
 from typing import List
-from sqlmodel import Session  
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from ..auth import get_admin_user
-from ..database import get_session
+from ..database import async_engine, engine, get_session
 from ..models.pending_salary import PendingSalary, SubmissionStatus
 from ..models.salary import ReportedSalary
+from ..models.name_alias import NameAlias, NameAliasBase, NameKind
 from ..data_loader import load_waterloo_data
+from ..ingest import rehash_salaries
+from ..core.dataset import mark_dataset_changed
+from ..core.response_cache import response_cache
+from ..core.db_pool import checkout_stats, pool_status
+from ..core.pagination import PendingPage, paginate_pending
+from ..core.jobs import Job, JobInfo, jobs
+from ..core.slow_queries import SlowQuery, slow_query_log
+from ..core import aliases
+from ..core.aliases import get_normalizer, rename_to_canonical
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
-@router.get("/pending-submissions", response_model=List[PendingSalary])
+# one moderation queue page
+MAX_BATCH_SUBMISSIONS = 500
+
+# the PendingSalary columns an approval copies into ReportedSalary
+APPROVED_COLUMNS = ["company", "year", "salary", "university", "term", "location", "bonus", "role", "arrangement"]
+
+class SubmissionBatch(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SUBMISSIONS)
+
+@router.get("/pending-submissions", response_model=PendingPage)
 async def get_pending_submissions(
     request: Request,  
+    company: str | None = None,
+    submitted_from: datetime | None = None,
+    submitted_to: datetime | None = None,
+    status: SubmissionStatus = SubmissionStatus.PENDING,
+    limit: int = Query(default=50, ge=1, le=MAX_BATCH_SUBMISSIONS),
+    cursor: str | None = None,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    # oldest first, walks ix_pendingsalary_status_submitted_at
+    query = select(PendingSalary).where(PendingSalary.status == status)
+    if company:
+        query = query.where(PendingSalary.company.icontains(company.strip(), autoescape=True))
+    if submitted_from:
+        query = query.where(PendingSalary.submitted_at >= submitted_from)
+    if submitted_to:
+        query = query.where(PendingSalary.submitted_at < submitted_to)
+    submissions, next_cursor, prev_cursor = await paginate_pending(session, query, limit, cursor)
+    return PendingPage(data=submissions, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@router.post("/approve")
+async def approve_submissions(
+    request: Request,
+    batch: SubmissionBatch,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    # Flip the still pending submissions of the batch first: the UPDATE locks them, so a
+    # concurrent approval of the same ids waits and then finds nothing left to copy
+    approved = (await session.exec(
+        update(PendingSalary)
+        .where(PendingSalary.id.in_(batch.ids), PendingSalary.status == SubmissionStatus.PENDING)
+        .values(status=SubmissionStatus.APPROVED)
+        .returning(PendingSalary.id, PendingSalary.company, PendingSalary.location)
+    )).all()
+    approved_ids = [row.id for row in approved]
+
+    if approved_ids:
+        # then copy them over in one INSERT ... SELECT, with aliases added since they were submitted applied
+        normalizer = await get_normalizer(session)
+        copied = {column: getattr(PendingSalary, column) for column in APPROVED_COLUMNS}
+        copied["company"] = normalizer.normalize_column(NameKind.COMPANY, PendingSalary.company, {row.company for row in approved})
+        copied["location"] = normalizer.normalize_column(NameKind.LOCATION, PendingSalary.location, {row.location for row in approved})
+        await session.exec(insert(ReportedSalary).from_select(
+            APPROVED_COLUMNS,
+            select(*copied.values()).where(PendingSalary.id.in_(approved_ids)).order_by(PendingSalary.id)
+        ))
+    await session.commit()
+
+    if approved_ids:
+        await mark_dataset_changed()
+    return {
+        "message": f"{len(approved_ids)} submissions approved",
+        "approved": sorted(approved_ids),
+        # unknown ids and submissions that were already moderated
+        "skipped": sorted(set(batch.ids) - set(approved_ids))
+    }
+
+@router.post("/reject")
+async def reject_submissions(
+    request: Request,
+    batch: SubmissionBatch,
     admin: dict = Depends(get_admin_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    return session.query(PendingSalary).filter(
-        PendingSalary.status == SubmissionStatus.PENDING
-    ).all()
+    rejected = (await session.exec(
+        update(PendingSalary)
+        .where(PendingSalary.id.in_(batch.ids), PendingSalary.status == SubmissionStatus.PENDING)
+        .values(status=SubmissionStatus.REJECTED)
+        .returning(PendingSalary.id)
+    )).scalars().all()
+    await session.commit()
+    return {
+        "message": f"{len(rejected)} submissions rejected",
+        "rejected": sorted(rejected),
+        "skipped": sorted(set(batch.ids) - set(rejected))
+    }
 
 @router.post("/approve/{submission_id}")
 async def approve_submission(
     request: Request, 
     submission_id: int,
     admin: dict = Depends(get_admin_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    pending = session.get(PendingSalary, submission_id)
+    pending = await session.get(PendingSalary, submission_id)
     if not pending:
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    # Create approved salary entry
+    # Create approved salary entry, with aliases added since it was submitted applied
     approved_salary = ReportedSalary(**pending.dict(exclude={'id', 'status', 'ip_address', 'submitted_at'}))
+    normalizer = await get_normalizer(session)
+    approved_salary.company = normalizer.normalize(NameKind.COMPANY, approved_salary.company)
+    approved_salary.location = normalizer.normalize(NameKind.LOCATION, approved_salary.location)
     session.add(approved_salary)
     
     # Update pending status
     pending.status = SubmissionStatus.APPROVED
-    session.commit()
+    await session.commit()
+    
+    # Refresh the cached counts and analytics now that the salary is public
+    await mark_dataset_changed(added=approved_salary)
     
     return {"message": "Submission approved"}
 
@@ -46,24 +146,170 @@ async def reject_submission(
     request: Request, 
     submission_id: int,
     admin: dict = Depends(get_admin_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    pending = session.get(PendingSalary, submission_id)
+    pending = await session.get(PendingSalary, submission_id)
     if not pending:
         raise HTTPException(status_code=404, detail="Submission not found")
     
     # Update pending status to rejected
     pending.status = SubmissionStatus.REJECTED
-    session.commit()
+    await session.commit()
     
     return {"message": "Submission rejected"}
 
-@router.get("populate-db")
-async def populate_db(request: Request, 
-                      admin: dict = Depends(get_admin_user),
-                      session: Session = Depends(get_session)):
-    load_waterloo_data()
+@router.get("/name-suggestions/{submission_id}")
+async def get_name_suggestions(
+    request: Request,
+    submission_id: int,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    # existing names a submission's company and location look like, to add as aliases before approving
+    pending = await session.get(PendingSalary, submission_id)
+    if not pending:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    normalizer = await get_normalizer(session)
+    return {
+        kind.value: [
+            {"name": name, "similarity": similarity}
+            for name, similarity in normalizer.suggest(kind, value)
+        ]
+        for kind, value in ((NameKind.COMPANY, pending.company), (NameKind.LOCATION, pending.location))
+    }
+
+@router.get("/aliases", response_model=List[NameAlias])
+async def get_aliases(
+    request: Request,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    return (await session.exec(select(NameAlias).order_by(NameAlias.kind, NameAlias.canonical, NameAlias.alias))).all()
 
+@router.post("/aliases")
+async def add_alias(
+    request: Request,
+    alias: NameAliasBase,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    alias_name, canonical = aliases.clean(alias.alias), aliases.clean(alias.canonical)
+    existing = (await session.exec(
+        select(NameAlias).where(NameAlias.kind == alias.kind, NameAlias.alias == alias_name)
+    )).first()
+    if existing:
+        existing.canonical = canonical
+    else:
+        session.add(NameAlias(kind=alias.kind, alias=alias_name, canonical=canonical))
+    await session.flush()
+
+    # salaries already stored under the alias move to the canonical name in the same transaction
+    renamed = await rename_to_canonical(session, await aliases.AliasNormalizer.load(session))
+    if renamed and alias.kind == NameKind.COMPANY:
+        # content hashes are computed from the stored company, re-ingests must still match the renamed rows
+        await session.run_sync(lambda sync_session: rehash_salaries(sync_session.connection(), [canonical]))
+    await session.commit()
+
+    aliases.clear()
+    if renamed:
+        await mark_dataset_changed()
+    return {"message": f"Alias saved, {renamed} salaries renamed"}
+
+@router.delete("/aliases/{alias_id}")
+async def delete_alias(
+    request: Request,
+    alias_id: int,
+    admin: dict = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    alias = await session.get(NameAlias, alias_id)
+    if not alias:
+        raise HTTPException(status_code=404, detail="Alias not found")
+    await session.delete(alias)
+    await session.commit()
+    aliases.clear()
+    return {"message": "Alias deleted"}
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    request: Request,
+    admin: dict = Depends(get_admin_user)
+):
+    return response_cache.stats()
+
+@router.get("/pool-stats")
+async def get_pool_stats(
+    request: Request,
+    admin: dict = Depends(get_admin_user)
+):
+    return {
+        "requests": {**pool_status(async_engine), **checkout_stats.snapshot()},
+        "loaders": pool_status(engine)
+    }
 
+@router.get("/slow-queries", response_model=List[SlowQuery])
+async def get_slow_queries(
+    request: Request,
+    route: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    admin: dict = Depends(get_admin_user)
+):
+    # newest first, a plan still being captured shows up as pending
+    entries = slow_query_log.entries()
+    if route:
+        entries = [entry for entry in entries if entry.route == route]
+    return entries[:limit]
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(
+    request: Request,
+    admin: dict = Depends(get_admin_user)
+):
+    return {"message": f"Cleared {slow_query_log.clear()} slow queries"}
 
+def _populate(job: Job):
+    return load_waterloo_data(progress=lambda rows, written: job.report(rows, result=written))
+
+async def _populate_finished(job: Job):
+    # chunks commit as they go, a cancelled or failed load may still have written rows
+    if job.result:
+        await mark_dataset_changed()
+
+@router.post("/populate-db", response_model=JobInfo, status_code=202)
+async def populate_db(request: Request, 
+                      admin: dict = Depends(get_admin_user)):
+    # the loader is blocking pandas + sync engine code, it runs as a job, poll /admin/jobs/{id}
+    return jobs.submit("populate-db", _populate, on_finished=_populate_finished).info()
 
+@router.get("/jobs", response_model=List[JobInfo])
+async def get_jobs(
+    request: Request,
+    admin: dict = Depends(get_admin_user)
+):
+    return [job.info() for job in jobs.jobs()]
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(
+    request: Request,
+    job_id: str,
+    admin: dict = Depends(get_admin_user)
+):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.info()
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(
+    request: Request,
+    job_id: str,
+    admin: dict = Depends(get_admin_user)
+):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.cancel():
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    # it stops after the chunk it is writing, poll the job to see it cancelled
+    return job.info()
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import select, Session, func, desc, asc, case
-from typing import List, Dict, Any
-from ..models.salary import ReportedSalary
-from ..database import get_session
+import math
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Literal
+from ..core.analytics_engine import get_analytics
+from ..core.response_cache import ANALYTICS_CACHE_CONTROL, cached_route
 from pydantic import BaseModel
-import statistics
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=cached_route(ANALYTICS_CACHE_CONTROL))
+
+# $0-$15, $15-$20, ... $45-$50 and $50+
+DEFAULT_DISTRIBUTION_EDGES = [0, 15, 20, 25, 30, 35, 40, 45, 50]
+MAX_DISTRIBUTION_BUCKETS = 100
+MAX_COMPARISON_COMPANIES = 10
 
 class SalaryTrendData(BaseModel):
     year: int
+    series: str | None = None
     avg_salary: float
     median_salary: float
+    p25_salary: float
+    p75_salary: float
     count: int
 
 class CompanyStatsData(BaseModel):
@@ -63,226 +70,95 @@ class SalaryByTermData(BaseModel):
     avg_salary: float
     total_reports: int
 
+def bucket_label(edges, i):
+    if i + 1 < len(edges):
+        return f"${edges[i]:g}-${edges[i + 1]:g}"
+    return f"${edges[i]:g}+"
+
 @router.get("/overview", response_model=AnalyticsOverview)
-def get_analytics_overview(session: Session = Depends(get_session)):
+async def get_analytics_overview(analytics = Depends(get_analytics)):
     """Get overall analytics overview with key metrics"""
-    
-    total_reports = session.exec(select(func.count()).select_from(ReportedSalary)).one()
-    
-    avg_salary = session.exec(select(func.avg(ReportedSalary.salary))).one() or 0.0
-    
-    all_salaries = session.exec(select(ReportedSalary.salary).order_by(ReportedSalary.salary)).all()
-    median_salary = statistics.median(all_salaries) if all_salaries else 0.0
-    
-    top_paying_company = session.exec(
-        select(ReportedSalary.company, func.avg(ReportedSalary.salary))
-        .group_by(ReportedSalary.company)
-        .having(func.count(ReportedSalary.id) >= 3)
-        .order_by(func.avg(ReportedSalary.salary).desc())
-        .limit(1)
-    ).first()
-    
-    most_reported_company = session.exec(
-        select(ReportedSalary.company, func.count(ReportedSalary.id))
-        .group_by(ReportedSalary.company)
-        .order_by(func.count(ReportedSalary.id).desc())
-        .limit(1)
-    ).first()
-    
-    total_companies = session.exec(select(func.count(func.distinct(ReportedSalary.company)))).one()
-    total_universities = session.exec(select(func.count(func.distinct(ReportedSalary.university)))).one()
-    total_locations = session.exec(select(func.count(func.distinct(ReportedSalary.location)))).one()
-    
-    return AnalyticsOverview(
-        total_reports=total_reports,
-        avg_salary=round(avg_salary, 2),
-        median_salary=round(median_salary, 2),
-        top_paying_company=top_paying_company[0] if top_paying_company else "N/A",
-        top_paying_company_avg=round(top_paying_company[1], 2) if top_paying_company else 0.0,
-        most_reported_company=most_reported_company[0] if most_reported_company else "N/A",
-        most_reported_company_count=most_reported_company[1] if most_reported_company else 0,
-        total_companies=total_companies,
-        total_universities=total_universities,
-        total_locations=total_locations
-    )
+    return await analytics.overview()
 
 @router.get("/salary-trends", response_model=List[SalaryTrendData])
-def get_salary_trends(session: Session = Depends(get_session)):
-    """Get salary trends over years"""
-    
-    yearly_data = session.exec(
-        select(
-            ReportedSalary.year,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id)
-        )
-        .group_by(ReportedSalary.year)
-        .order_by(ReportedSalary.year)
-    ).all()
-    
-    result = []
-    for year, avg_salary, count in yearly_data:
-        year_salaries = session.exec(
-            select(ReportedSalary.salary)
-            .where(ReportedSalary.year == year)
-            .order_by(ReportedSalary.salary)
-        ).all()
-        
-        median_salary = statistics.median(year_salaries) if year_salaries else 0.0
-        
-        result.append(SalaryTrendData(
-            year=year,
-            avg_salary=round(avg_salary, 2),
-            median_salary=round(median_salary, 2),
-            count=count
-        ))
-    
-    return result
+async def get_salary_trends(
+    split_by: Literal["company", "location", "role"] | None = None,
+    series: List[str] | None = Query(default=None, max_length=50),
+    series_limit: int = Query(default=10, ge=1, le=50),
+    analytics = Depends(get_analytics)
+):
+    """
+    Get salary trends over years. With split_by, returns one series per company/location/role:
+    the values passed as (repeated) series parameters, or the series_limit most reported ones.
+    """
+    return await analytics.salary_trends(split_by, series, series_limit)
 
 @router.get("/top-companies", response_model=List[CompanyStatsData])
-def get_top_companies(limit: int = 15, session: Session = Depends(get_session)):
+async def get_top_companies(limit: int = 15, analytics = Depends(get_analytics)):
     """Get top companies by average salary with minimum report count"""
-    
-    company_stats = session.exec(
-        select(
-            ReportedSalary.company,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id),
-            func.min(ReportedSalary.salary),
-            func.max(ReportedSalary.salary)
-        )
-        .group_by(ReportedSalary.company)
-        .having(func.count(ReportedSalary.id) >= 2)
-        .order_by(func.avg(ReportedSalary.salary).desc())
-        .limit(limit)
-    ).all()
-    
-    return [
-        CompanyStatsData(
-            company=company,
-            avg_salary=round(avg_salary, 2),
-            total_reports=count,
-            salary_range_min=round(min_salary, 2),
-            salary_range_max=round(max_salary, 2)
-        )
-        for company, avg_salary, count, min_salary, max_salary in company_stats
-    ]
+    return await analytics.top_groups("company", min_reports=2, limit=limit)
 
 @router.get("/top-universities", response_model=List[UniversityStatsData])
-def get_top_universities(limit: int = 10, session: Session = Depends(get_session)):
+async def get_top_universities(limit: int = 10, analytics = Depends(get_analytics)):
     """Get top universities by average salary"""
-    
-    university_stats = session.exec(
-        select(
-            ReportedSalary.university,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id)
-        )
-        .group_by(ReportedSalary.university)
-        .having(func.count(ReportedSalary.id) >= 3)
-        .order_by(func.avg(ReportedSalary.salary).desc())
-        .limit(limit)
-    ).all()
-    
-    return [
-        UniversityStatsData(
-            university=university,
-            avg_salary=round(avg_salary, 2),
-            total_reports=count
-        )
-        for university, avg_salary, count in university_stats
-    ]
+    return await analytics.top_groups("university", min_reports=3, limit=limit)
 
 @router.get("/top-locations", response_model=List[LocationStatsData])
-def get_top_locations(limit: int = 10, session: Session = Depends(get_session)):
+async def get_top_locations(limit: int = 10, analytics = Depends(get_analytics)):
     """Get top locations by average salary"""
-    
-    location_stats = session.exec(
-        select(
-            ReportedSalary.location,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id)
-        )
-        .where(ReportedSalary.location.is_not(None))
-        .where(ReportedSalary.location != "")
-        .group_by(ReportedSalary.location)
-        .having(func.count(ReportedSalary.id) >= 2)
-        .order_by(func.avg(ReportedSalary.salary).desc())
-        .limit(limit)
-    ).all()
-    
-    return [
-        LocationStatsData(
-            location=location,
-            avg_salary=round(avg_salary, 2),
-            total_reports=count
-        )
-        for location, avg_salary, count in location_stats
-    ]
+    return await analytics.top_groups("location", min_reports=2, limit=limit)
 
 @router.get("/top-roles", response_model=List[RoleStatsData])
-def get_top_roles(limit: int = 10, session: Session = Depends(get_session)):
+async def get_top_roles(limit: int = 10, analytics = Depends(get_analytics)):
     """Get top roles by average salary"""
-    
-    role_stats = session.exec(
-        select(
-            ReportedSalary.role,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id)
-        )
-        .group_by(ReportedSalary.role)
-        .having(func.count(ReportedSalary.id) >= 2)
-        .order_by(func.avg(ReportedSalary.salary).desc())
-        .limit(limit)
-    ).all()
-    
-    return [
-        RoleStatsData(
-            role=role,
-            avg_salary=round(avg_salary, 2),
-            total_reports=count
-        )
-        for role, avg_salary, count in role_stats
-    ]
+    return await analytics.top_groups("role", min_reports=2, limit=limit)
 
 @router.get("/salary-distribution", response_model=List[SalaryDistributionData])
-def get_salary_distribution(session: Session = Depends(get_session)):
-    """Get salary distribution across different ranges"""
+async def get_salary_distribution(
+    bucket_width: float | None = Query(default=None, gt=0),
+    upper: float = Query(default=50, gt=0),
+    edges: List[float] | None = Query(default=None),
+    company: str | None = None,
+    location: str | None = None,
+    role: str | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    analytics = Depends(get_analytics)
+):
+    """
+    Get salary distribution across different ranges. Buckets are either the given (repeated)
+    edges or bucket_width wide from 0 to upper, the last bucket is always open ended.
+    """
+    # inf would never end a bucket (or int() it), nan sorts and compares as nothing
+    if not math.isfinite(upper) or (bucket_width is not None and not math.isfinite(bucket_width)):
+        raise HTTPException(status_code=400, detail="upper and bucket_width must be finite")
+    if edges and not all(math.isfinite(edge) for edge in edges):
+        raise HTTPException(status_code=400, detail="edges must be finite")
+
+    if edges:
+        edges = sorted(set(edges))
+    elif bucket_width:
+        # counted before the edges are built, a tiny bucket_width would ask for billions of them
+        buckets = upper // bucket_width + 1
+        if buckets > MAX_DISTRIBUTION_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_DISTRIBUTION_BUCKETS} buckets are allowed")
+        edges = [i * bucket_width for i in range(int(buckets))]
+    else:
+        edges = DEFAULT_DISTRIBUTION_EDGES
     
-    ranges = [
-        ("$0-$15", 0, 15),
-        ("$15-$20", 15, 20),
-        ("$20-$25", 20, 25),
-        ("$25-$30", 25, 30),
-        ("$30-$35", 30, 35),
-        ("$35-$40", 35, 40),
-        ("$40-$45", 40, 45),
-        ("$45-$50", 45, 50),
-        ("$50+", 50, 999)
-    ]
+    if len(edges) > MAX_DISTRIBUTION_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DISTRIBUTION_BUCKETS} buckets are allowed")
     
-    total_reports = session.exec(select(func.count()).select_from(ReportedSalary)).one()
+    counts, total_reports = await analytics.salary_histogram(
+        edges, company=company, location=location, role=role, year_from=year_from, year_to=year_to
+    )
     
     result = []
-    for range_label, min_val, max_val in ranges:
-        if max_val == 999:
-            count = session.exec(
-                select(func.count())
-                .select_from(ReportedSalary)
-                .where(ReportedSalary.salary >= min_val)
-            ).one()
-        else:
-            count = session.exec(
-                select(func.count())
-                .select_from(ReportedSalary)
-                .where(ReportedSalary.salary >= min_val)
-                .where(ReportedSalary.salary < max_val)
-            ).one()
-        
+    for i, count in enumerate(counts):
         percentage = (count / total_reports * 100) if total_reports > 0 else 0
         
         result.append(SalaryDistributionData(
-            salary_range=range_label,
+            salary_range=bucket_label(edges, i),
             count=count,
             percentage=round(percentage, 1)
         ))
@@ -290,48 +166,50 @@ def get_salary_distribution(session: Session = Depends(get_session)):
     return result
 
 @router.get("/company-comparison")
-def get_company_comparison(companies: str, session: Session = Depends(get_session)):
-    """Compare multiple companies (comma-separated company names)"""
-    
-    company_list = [company.strip() for company in companies.split(",")]
-    
-    result = {}
-    for company in company_list:
-        company_data = session.exec(
-            select(ReportedSalary)
-            .where(ReportedSalary.company == company)
-        ).all()
+async def get_company_comparison(
+    companies: str,
+    distribution: Literal["quantiles", "histogram"] | None = None,
+    points: int = Query(default=11, ge=2, le=101),
+    bucket_width: float = Query(default=5, gt=0),
+    analytics = Depends(get_analytics)
+):
+    """
+    Compare multiple companies (comma-separated company names). distribution=quantiles adds
+    `points` evenly spaced salary quantiles per company, distribution=histogram adds counts
+    over bucket_width wide buckets shared by all the companies.
+    """
+    
+    company_list = list(dict.fromkeys(company.strip() for company in companies.split(",") if company.strip()))
+    if len(company_list) > MAX_COMPARISON_COMPANIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARISON_COMPANIES} companies can be compared")
+    
+    quantile_points = tuple(i / (points - 1) for i in range(points)) if distribution == "quantiles" else ()
+    stats = await analytics.company_comparison(company_list, quantile_points)
+    result = {company: stats[company] for company in company_list if company in stats}
+    
+    if distribution == "histogram" and result:
+        low = min(stats["min_salary"] for stats in result.values())
+        high = max(stats["max_salary"] for stats in result.values())
+        # widen the buckets rather than return more of them than the distribution chart allows
+        bucket_width = max(bucket_width, (high - low) / MAX_DISTRIBUTION_BUCKETS)
+        start = (low // bucket_width) * bucket_width
+        edges = [start + i * bucket_width for i in range(min(int((high - start) // bucket_width) + 1, MAX_DISTRIBUTION_BUCKETS))]
         
-        if company_data:
-            salaries = [record.salary for record in company_data]
-            result[company] = {
-                "avg_salary": round(statistics.mean(salaries), 2),
-                "median_salary": round(statistics.median(salaries), 2),
-                "min_salary": round(min(salaries), 2),
-                "max_salary": round(max(salaries), 2),
-                "total_reports": len(salaries),
-                "salary_data": salaries
-            }
+        for company, counts in (await analytics.company_histograms(list(result), edges)).items():
+            result[company]["salary_histogram"] = [
+                {"salary_range": bucket_label(edges, i), "count": count} for i, count in enumerate(counts)
+            ]
     
     return result
 
 @router.get("/yearly-growth", response_model=List[YearlyGrowthData])
-def get_yearly_growth(session: Session = Depends(get_session)):
+async def get_yearly_growth(analytics = Depends(get_analytics)):
     """Get year-over-year growth in salary submissions"""
     
-    yearly_counts = session.exec(
-        select(
-            ReportedSalary.year,
-            func.count(ReportedSalary.id)
-        )
-        .group_by(ReportedSalary.year)
-        .order_by(ReportedSalary.year)
-    ).all()
-    
     result = []
     prev_count = None
     
-    for year, count in yearly_counts:
+    for year, count in await analytics.yearly_counts():
         if prev_count is not None:
             growth_rate = ((count - prev_count) / prev_count) * 100
         else:
@@ -348,89 +226,11 @@ def get_yearly_growth(session: Session = Depends(get_session)):
     return result
 
 @router.get("/salary-by-term", response_model=List[SalaryByTermData])
-def get_salary_by_term(session: Session = Depends(get_session)):
+async def get_salary_by_term(analytics = Depends(get_analytics)):
     """Get average salary by work term"""
-    
-    term_data = session.exec(
-        select(
-            ReportedSalary.term,
-            func.avg(ReportedSalary.salary),
-            func.count(ReportedSalary.id)
-        )
-        .where(ReportedSalary.term.is_not(None))
-        .group_by(ReportedSalary.term)
-        .order_by(ReportedSalary.term)
-    ).all()
-    
-    return [
-        SalaryByTermData(
-            term=term,
-            avg_salary=round(avg_salary, 2),
-            total_reports=count
-        )
-        for term, avg_salary, count in term_data
-    ]
+    return await analytics.salary_by_term()
 
 @router.get("/market-insights")
-def get_market_insights(session: Session = Depends(get_session)):
+async def get_market_insights(analytics = Depends(get_analytics)):
     """Get comprehensive market insights and statistics"""
-    
-    total_reports = session.exec(select(func.count()).select_from(ReportedSalary)).one()
-    
-    all_salaries = session.exec(select(ReportedSalary.salary).order_by(ReportedSalary.salary)).all()
-    
-    if all_salaries:
-        percentile_25 = statistics.quantiles(all_salaries, n=4)[0]
-        percentile_75 = statistics.quantiles(all_salaries, n=4)[2]
-        percentile_90 = statistics.quantiles(all_salaries, n=10)[8]
-    else:
-        percentile_25 = percentile_75 = percentile_90 = 0.0
-    
-    current_year = 2024
-    recent_avg = session.exec(
-        select(func.avg(ReportedSalary.salary))
-        .where(ReportedSalary.year >= current_year - 1)
-    ).one() or 0.0
-    
-    older_avg = session.exec(
-        select(func.avg(ReportedSalary.salary))
-        .where(ReportedSalary.year < current_year - 1)
-    ).one() or 0.0
-    
-    most_common_role = session.exec(
-        select(ReportedSalary.role, func.count(ReportedSalary.id))
-        .group_by(ReportedSalary.role)
-        .order_by(func.count(ReportedSalary.id).desc())
-        .limit(1)
-    ).first()
-    
-    top_location_by_count = session.exec(
-        select(ReportedSalary.location, func.count(ReportedSalary.id))
-        .where(ReportedSalary.location.is_not(None))
-        .where(ReportedSalary.location != "")
-        .group_by(ReportedSalary.location)
-        .order_by(func.count(ReportedSalary.id).desc())
-        .limit(1)
-    ).first()
-    
-    return {
-        "total_reports": total_reports,
-        "salary_percentiles": {
-            "25th": round(percentile_25, 2),
-            "75th": round(percentile_75, 2),
-            "90th": round(percentile_90, 2)
-        },
-        "recent_vs_older": {
-            "recent_avg": round(recent_avg, 2),
-            "older_avg": round(older_avg, 2),
-            "improvement": round(((recent_avg - older_avg) / older_avg * 100), 1) if older_avg > 0 else 0.0
-        },
-        "most_common_role": {
-            "role": most_common_role[0] if most_common_role else "N/A",
-            "count": most_common_role[1] if most_common_role else 0
-        },
-        "top_location_by_opportunities": {
-            "location": top_location_by_count[0] if top_location_by_count else "N/A",
-            "count": top_location_by_count[1] if top_location_by_count else 0
-        }
-    }
+    return await analytics.market_insights()
@@ -1,51 +1,79 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import select, Session, desc, func
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from ..models.salary import ReportedSalary
+from ..models.profile import SalaryProfile
 from ..database import get_session
+from ..core.response_cache import PAGE_CACHE_CONTROL, cached_route
+from ..core.analytics_engine import get_analytics, get_profile_session
+from ..core.pagination import SalaryPage, paginate_salaries
+from ..core.salary_counts import count_salaries
 
-router = APIRouter()
+router = APIRouter(route_class=cached_route(PAGE_CACHE_CONTROL))
+
+class CompanyProfile(SalaryProfile):
+    company: str
+    top_university: str | None = None
+    top_location: str | None = None
 
 @router.get("/all-companies", response_model=list[str])
-def read_companies(session: Session = Depends(get_session)):
+async def read_companies(session: AsyncSession = Depends(get_session)):
     # return only the unique company names
-    companies = session.exec(select(ReportedSalary.company).distinct()).all()
+    companies = (await session.exec(select(ReportedSalary.company).distinct())).all()
     return companies
 
 @router.get("/all-locations", response_model=list[str])
-def read_locations(session: Session = Depends(get_session)):
+async def read_locations(session: AsyncSession = Depends(get_session)):
     # return only the unique locations
-    locations = session.exec(select(ReportedSalary.location).distinct()).all()
+    locations = (await session.exec(select(ReportedSalary.location).distinct())).all()
     return locations
 
-@router.get("/company/all-salaries", response_model=list[ReportedSalary])
-def get_company(company: str, session: Session = Depends(get_session)):
-    companyData = session.exec(select(ReportedSalary).where(ReportedSalary.company == company).order_by(desc(ReportedSalary.year))).all()
-    return companyData
+@router.get("/company/all-salaries", response_model=SalaryPage)
+async def get_company(company: str, session: AsyncSession = Depends(get_session), cursor: str | None = None, limit: int = Query(default=20, le=100)):
+    query = select(ReportedSalary).where(ReportedSalary.company == company)
+    companyData, next_cursor, prev_cursor = await paginate_salaries(session, query, limit, cursor)
+    return SalaryPage(data=companyData, total=await count_salaries(session, company=company), next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 @router.get("/company/average-salary")
-def get_company_average(company: str, session: Session = Depends(get_session)):
-    companyAverage = session.exec(select(func.avg(ReportedSalary.salary)).where(ReportedSalary.company == company)).first()
+async def get_company_average(company: str, session: AsyncSession = Depends(get_session)):
+    companyAverage = (await session.exec(select(func.avg(ReportedSalary.salary)).where(ReportedSalary.company == company))).first()
     return companyAverage if companyAverage is not None else 0.0
     
 @router.get("/company/top-university")
-def get_company_top_university(company: str, session: Session = Depends(get_session)):
-    top_university = session.exec(
+async def get_company_top_university(company: str, session: AsyncSession = Depends(get_session)):
+    top_university = (await session.exec(
         select(ReportedSalary.university, func.count(ReportedSalary.university))
         .where(ReportedSalary.company == company)
         .group_by(ReportedSalary.university)
         .order_by(func.count(ReportedSalary.university).desc())
         .limit(1)
-    ).first()
-    return {top_university[0]}
+    )).first()
+    return top_university[0] if top_university else None
 
 @router.get("/company/top-location")
-def get_company_top_location(company: str, session: Session = Depends(get_session)):
-    top_location = session.exec(
+async def get_company_top_location(company: str, session: AsyncSession = Depends(get_session)):
+    top_location = (await session.exec(
         select(ReportedSalary.location, func.count(ReportedSalary.location))
         .where(ReportedSalary.company == company)
         .group_by(ReportedSalary.location)
         .order_by(func.count(ReportedSalary.location).desc())
         .limit(1)
-    ).first()
-    return {top_location[0]}
\ No newline at end of file
+    )).first()
+    return top_location[0] if top_location else None
+
+@router.get("/company/{company:path}/profile", response_model=CompanyProfile)
+async def get_company_profile(
+    company: str,
+    limit: int = Query(default=20, le=100),
+    session: AsyncSession = Depends(get_profile_session),
+    analytics = Depends(get_analytics)
+):
+    """Everything the company page shows in one call: stats, year series, terms and the first page of reports"""
+    profile = await analytics.profile("company", [company], top_columns=("university", "location"))
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    query = select(ReportedSalary).where(ReportedSalary.company == company)
+    companyData, next_cursor, _ = await paginate_salaries(session, query, limit)
+    salaries = SalaryPage(data=companyData, total=profile["total_reports"], next_cursor=next_cursor)
+    return CompanyProfile(company=company, salaries=salaries, **profile)
@@ -1,46 +1,102 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import select, Session, desc, func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal
 from ..models.salary import ReportedSalary
+from ..models.profile import SalaryProfile
 from ..database import get_session
+from ..core.response_cache import PAGE_CACHE_CONTROL, cached_route
+from ..core.analytics_engine import get_analytics, get_profile_session
+from ..core.location_hierarchy import get_hierarchy
+from ..core.pagination import SalaryPage, paginate_salaries
+from ..core.salary_counts import count_salaries
 
-router = APIRouter()
+router = APIRouter(route_class=cached_route(PAGE_CACHE_CONTROL))
+
+class LocationProfile(SalaryProfile):
+    location: str
+    level: str
+    # the reported locations the profile covers, more than one for province and country rollups
+    locations: list[str]
+    top_university: str | None = None
+    top_company: str | None = None
+
+async def resolve_locations(session: AsyncSession, location: str, level: str):
+    resolved = (await get_hierarchy(session)).resolve(location, level)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return resolved
 
 @router.get("/all-locations", response_model=list[str])
-def read_locations(session: Session = Depends(get_session)):
+async def read_locations(session: AsyncSession = Depends(get_session)):
     # return only the unique locations
-    locations = session.exec(select(ReportedSalary.location).distinct()).all()
+    locations = (await session.exec(select(ReportedSalary.location).distinct())).all()
     return locations
 
-@router.get("/location/all-salaries", response_model=list[ReportedSalary])
-def get_location(location: str, session: Session = Depends(get_session)):
-    locationData = session.exec(select(ReportedSalary).where(ReportedSalary.location == location).order_by(desc(ReportedSalary.year))).all()
-    return locationData
+@router.get("/location/all-salaries", response_model=SalaryPage)
+async def get_location(
+    location: str,
+    session: AsyncSession = Depends(get_session),
+    level: Literal["city", "province", "country"] = "city",
+    cursor: str | None = None,
+    limit: int = Query(default=20, le=100)
+):
+    if level == "city":
+        query = select(ReportedSalary).where(ReportedSalary.location == location)
+        total = await count_salaries(session, location=location)
+    else:
+        _, locations = await resolve_locations(session, location, level)
+        query = select(ReportedSalary).where(ReportedSalary.location.in_(locations))
+        total = await count_salaries(session, location=tuple(locations))
+    locationData, next_cursor, prev_cursor = await paginate_salaries(session, query, limit, cursor)
+    return SalaryPage(data=locationData, total=total, next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 @router.get("/location/average-salary")
-def get_location_average(location: str, session: Session = Depends(get_session)):
-    locationAverage = session.exec(select(func.avg(ReportedSalary.salary)).where(ReportedSalary.location == location)).first()
+async def get_location_average(location: str, session: AsyncSession = Depends(get_session)):
+    locationAverage = (await session.exec(select(func.avg(ReportedSalary.salary)).where(ReportedSalary.location == location))).first()
     return locationAverage if locationAverage is not None else 0.0
     
 @router.get("/location/top-university")
-def get_location_top_university(location: str, session: Session = Depends(get_session)):
-    top_university = session.exec(
+async def get_location_top_university(location: str, session: AsyncSession = Depends(get_session)):
+    top_university = (await session.exec(
         select(ReportedSalary.university, func.count(ReportedSalary.university))
         .where(ReportedSalary.location == location)
         .group_by(ReportedSalary.university)
         .order_by(func.count(ReportedSalary.university).desc())
         .limit(1)
-    ).first()
-    return {top_university[0]}
+    )).first()
+    return top_university[0] if top_university else None
 
 @router.get("/location/top-company")
-def get_location_top_location(location: str, session: Session = Depends(get_session)):
-    top_location = session.exec(
+async def get_location_top_location(location: str, session: AsyncSession = Depends(get_session)):
+    top_location = (await session.exec(
         select(ReportedSalary.company, func.count(ReportedSalary.company))
         .where(ReportedSalary.location == location)
         .group_by(ReportedSalary.company)
         .order_by(func.count(ReportedSalary.company).desc())
         .limit(1)
-    ).first()
-    return {top_location[0]}
+    )).first()
+    return top_location[0] if top_location else None
+
+@router.get("/location/{location:path}/profile", response_model=LocationProfile)
+async def get_location_profile(
+    location: str,
+    level: Literal["city", "province", "country"] = "city",
+    limit: int = Query(default=20, le=100),
+    session: AsyncSession = Depends(get_profile_session),
+    analytics = Depends(get_analytics)
+):
+    """
+    Everything the location page shows in one call. level rolls a city up to its province
+    (e.g. every "..., ON") or country, location can also name the province or country itself.
+    """
+    label, locations = await resolve_locations(session, location, level)
+    profile = await analytics.profile("location", locations, top_columns=("university", "company"))
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    query = select(ReportedSalary).where(ReportedSalary.location.in_(locations))
+    locationData, next_cursor, _ = await paginate_salaries(session, query, limit)
+    salaries = SalaryPage(data=locationData, total=profile["total_reports"], next_cursor=next_cursor)
+    return LocationProfile(location=label, level=level, locations=locations, salaries=salaries, **profile)
+
 
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from ..auth import get_metrics_scraper
+from ..core.metrics import CONTENT_TYPE, metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(scraper: None = Depends(get_metrics_scraper)):
+    # Prometheus text exposition format, see core/metrics.py
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
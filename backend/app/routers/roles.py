@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from ..database import get_session
+from ..core.response_cache import REFERENCE_CACHE_CONTROL, cached_route
 from ..models.roles import Role
 
-router = APIRouter()
+router = APIRouter(route_class=cached_route(REFERENCE_CACHE_CONTROL))
 
 @router.get("/all-roles", response_model=list[str])
-def read_roles(session: Session = Depends(get_session)):
-    all_roles = session.exec(select(Role.role_name).distinct()).all()
+async def read_roles(session: AsyncSession = Depends(get_session)):
+    all_roles = (await session.exec(select(Role.role_name).distinct())).all()
     return all_roles
 
 
@@ -1,24 +1,26 @@
 from fastapi import APIRouter, Depends, Request, HTTPException, Query
-from sqlmodel import select, Session, desc, func
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from pydantic import BaseModel
 from ..models.salary import ReportedSalary
 from ..database import get_session
 from ..models.pending_salary import PendingSalary, SubmissionStatus
+from ..models.name_alias import NameKind
 from ..core.rate_limiter import limiter
+from ..core.pagination import SalaryPage, paginate_salaries
+from ..core.salary_counts import count_salaries
+from ..core.aliases import get_normalizer
+from ..core.response_cache import PAGE_CACHE_CONTROL, cached_route
 
-router = APIRouter()
-
-class SalaryResponse(BaseModel):
-    data: list[ReportedSalary]
-    total: int
+# submissions are POSTs and always reach the handler, only the salary list is cached
+router = APIRouter(route_class=cached_route(PAGE_CACHE_CONTROL))
 
 @router.post("/submit-salary")
 @limiter.limit("5/hour")  # 5 submissions per hour per IP
 async def submit_salary(
     request: Request,
     salary_data: ReportedSalary,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         # Modify the location to remove content after the last comma
@@ -26,6 +28,11 @@ async def submit_salary(
             last_comma_index = salary_data.location.rfind(',')
             salary_data.location = salary_data.location[:last_comma_index].strip()
 
+        # store known companies and locations under the spelling the rest of the data uses
+        normalizer = await get_normalizer(session)
+        salary_data.company = normalizer.normalize(NameKind.COMPANY, salary_data.company)
+        salary_data.location = normalizer.normalize(NameKind.LOCATION, salary_data.location)
+
         # Now actually create the pending submission
         pending_salary = PendingSalary(
             **salary_data.dict(),
@@ -34,27 +41,33 @@ async def submit_salary(
         )
         
         session.add(pending_salary)
-        session.commit()
+        await session.commit()
         
         return {"message": "Submission received and pending review", "id": pending_salary.id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-# TODO: Make this endpoing work with limit and offset and sync this with front-end pagination for efficiency
-@router.get("/all-salaries", response_model=SalaryResponse)
-def read_salaries(session: Session = Depends(get_session), offset: int = 0, limit: int = Query(default=20, le=20)):
-    # Get total count
-    total = session.exec(select(func.count()).select_from(ReportedSalary)).one()
+@router.get("/all-salaries", response_model=SalaryPage)
+async def read_salaries(
+    session: AsyncSession = Depends(get_session),
+    cursor: str | None = None,
+    offset: int = 0,
+    limit: int = Query(default=20, le=20)
+):
+    # Prefer the next_cursor/prev_cursor of the previous response, offset is only kept for old clients
+    total = await count_salaries(session)
     
-    # Get paginated data
-    salaries = session.exec(
-        select(ReportedSalary)
-        .offset(offset)
-        .limit(limit)
-        .order_by(desc(ReportedSalary.year))
-    ).all()
+    if offset and not cursor:
+        salaries = (await session.exec(
+            select(ReportedSalary)
+            .order_by(desc(ReportedSalary.year), desc(ReportedSalary.id))
+            .offset(offset)
+            .limit(limit)
+        )).all()
+        return SalaryPage(data=salaries, total=total)
     
-    return SalaryResponse(data=salaries, total=total)
+    salaries, next_cursor, prev_cursor = await paginate_salaries(session, select(ReportedSalary), limit, cursor)
+    return SalaryPage(data=salaries, total=total, next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 
 # # TODO: Find a better fix for this
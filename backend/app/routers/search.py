@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List
+from pydantic import BaseModel
+from ..database import get_session
+from ..core.search_index import SuggestionType, get_index
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+class Suggestion(BaseModel):
+    type: SuggestionType
+    value: str
+    count: int
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest(
+    q: str = Query(max_length=100),
+    type: List[SuggestionType] = Query(default=list(SuggestionType)),
+    limit: int = Query(default=8, ge=1, le=20),
+    session: AsyncSession = Depends(get_session)
+):
+    # typeahead for the search bar and the submission form, answered from the in-memory index
+    index = await get_index(session)
+    return [Suggestion(type=kind, value=name, count=count) for kind, name, count in index.suggest(q, type, limit)]
@@ -1,12 +1,46 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import select, Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, List
+from pydantic import BaseModel, Field
 from ..models.university import Universities
 from ..database import get_session
+from ..core.response_cache import REFERENCE_CACHE_CONTROL, cached_route
+from ..core.university_domains import get_resolver
 
-router = APIRouter()
+router = APIRouter(route_class=cached_route(REFERENCE_CACHE_CONTROL))
+
+# one moderation queue page worth of submitter domains
+MAX_BATCH_DOMAINS = 500
+
+class ResolvedDomain(BaseModel):
+    domain: str
+    matched_domain: str
+    university: str
+
+class DomainBatch(BaseModel):
+    domains: List[str] = Field(max_length=MAX_BATCH_DOMAINS)
 
 @router.get("/all-universities", response_model=List[str])
-def read_universities(session: Session = Depends(get_session)):
-    universities = session.exec(select(Universities.name)).all()
-    return universities
\ No newline at end of file
+async def read_universities(session: AsyncSession = Depends(get_session)):
+    universities = (await session.exec(select(Universities.name))).all()
+    return universities
+
+@router.get("/universities/resolve", response_model=ResolvedDomain)
+async def resolve_domain(domain: str, session: AsyncSession = Depends(get_session)):
+    # domain may be a full email address, subdomains resolve through their parent domain
+    resolved = (await get_resolver(session)).resolve(domain)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="No university uses this domain")
+    matched_domain, university = resolved
+    return ResolvedDomain(domain=domain, matched_domain=matched_domain, university=university)
+
+@router.post("/universities/resolve", response_model=Dict[str, str | None])
+async def resolve_domains(batch: DomainBatch, session: AsyncSession = Depends(get_session)):
+    # the university of every domain (or email address), null for unknown ones
+    resolver = await get_resolver(session)
+    universities = {}
+    for domain in batch.domains:
+        resolved = resolver.resolve(domain)
+        universities[domain] = resolved[1] if resolved else None
+    return universities
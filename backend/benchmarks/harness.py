@@ -0,0 +1,285 @@
+# Latency and throughput of every router, against whatever DATABASE_URL points at (a local
+# Postgres, or a SQLite file as the stand-in, filled with python -m benchmarks.synthetic):
+#
+#   python -m benchmarks.harness [--requests 300] [--concurrency 8] [--router analytics ...]
+#                                [--url http://localhost:8000] [--no-cache]
+#                                [--out results.json] [--compare baseline.json]
+#
+# By default the app runs in this process behind an ASGI transport, so the numbers are the
+# app's own cost without a network or a server in between, and the rate limiter is off.
+# With --url the requests go to a running server instead (which must use the same database,
+# the request parameters are sampled from it) and the admin routes are skipped, the admin
+# login is limited to 2/minute.
+#
+# Companies, locations and search prefixes are drawn per request with the seed, weighted by
+# report count, so popular pages come up as often as they would for real users and the
+# response cache sees a realistic mix (--no-cache turns it off). Results are written as JSON,
+# --compare prints the change against an earlier run and exits with 1 when an endpoint's p99
+# or throughput got worse by more than --threshold.
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# {company}, {location}, {prefix}, {domain} and {cursor} are filled in per request
+ENDPOINTS = {
+    "salaries": ["/all-salaries?limit=20", "/all-salaries?limit=20&cursor={cursor}"],
+    "companies": [
+        "/all-companies",
+        "/company/all-salaries?company={company}",
+        "/company/average-salary?company={company}",
+        "/company/top-university?company={company}",
+        "/company/top-location?company={company}",
+        "/company/{company}/profile",
+    ],
+    "locations": [
+        "/all-locations",
+        "/location/all-salaries?location={location}",
+        "/location/average-salary?location={location}",
+        "/location/top-university?location={location}",
+        "/location/top-company?location={location}",
+        "/location/{location}/profile",
+        "/location/{location}/profile?level=province",
+    ],
+    "roles": ["/all-roles"],
+    "universities": ["/all-universities", "/universities/resolve?domain={domain}"],
+    "analytics": [
+        "/analytics/overview",
+        "/analytics/salary-trends",
+        "/analytics/salary-trends?split_by=company",
+        "/analytics/top-companies",
+        "/analytics/top-universities",
+        "/analytics/top-locations",
+        "/analytics/top-roles",
+        "/analytics/salary-distribution?company={company}",
+        "/analytics/company-comparison?companies={company},{company}",
+        "/analytics/yearly-growth",
+        "/analytics/salary-by-term",
+        "/analytics/market-insights",
+    ],
+    "search": ["/search/suggest?q={prefix}"],
+    "admin": [
+        "/admin/pending-submissions",
+        "/admin/aliases",
+        "/admin/cache-stats",
+        "/admin/pool-stats",
+        "/admin/jobs",
+    ],
+}
+# statuses that are a correct answer for some of the sampled parameters (an unknown domain)
+EXPECTED_STATUSES = {200, 404}
+
+
+class Parameters:
+    """Weighted samples of the values the endpoint templates take, read from the database"""
+
+    def __init__(self, seed: int, companies, locations, domains, cursor):
+        self.random = random.Random(seed)
+        self.companies, self.company_weights = zip(*companies) if companies else (("Shopify",), (1,))
+        self.locations, self.location_weights = zip(*locations) if locations else (("Toronto, ON",), (1,))
+        self.domains = domains or ["uwaterloo.ca"]
+        self.cursor = cursor
+
+    @classmethod
+    async def load(cls, seed: int):
+        from sqlmodel import func, select
+        from app.database import async_session
+        from app.core.pagination import SALARY_KEY, encode_cursor
+        from app.models.salary import ReportedSalary
+        from app.models.university import Universities
+
+        async with async_session() as session:
+            companies = (await session.exec(
+                select(ReportedSalary.company, func.count()).group_by(ReportedSalary.company)
+            )).all()
+            locations = (await session.exec(
+                select(ReportedSalary.location, func.count()).where(ReportedSalary.location.is_not(None)).group_by(ReportedSalary.location)
+            )).all()
+            domains = [domain for row in (await session.exec(select(Universities.domains))).all() for domain in row or ()]
+            # a cursor a few pages in, /all-salaries?cursor= then pages from there
+            row = (await session.exec(
+                select(ReportedSalary).order_by(ReportedSalary.year.desc(), ReportedSalary.id.desc()).offset(100).limit(1)
+            )).first()
+            rows = (await session.exec(select(func.count()).select_from(ReportedSalary))).one()
+        cursor = encode_cursor(row, SALARY_KEY, "next") if row else ""
+        return cls(seed, companies, locations, domains, cursor), rows
+
+    def fill(self, template: str) -> str:
+        values = {
+            "company": lambda: self.random.choices(self.companies, self.company_weights)[0],
+            "location": lambda: self.random.choices(self.locations, self.location_weights)[0],
+            "prefix": lambda: self.random.choices(self.companies, self.company_weights)[0][:self.random.randint(1, 4)],
+            "domain": lambda: self.random.choice(self.domains),
+            "cursor": lambda: self.cursor,
+        }
+        url = template
+        for name, value in values.items():
+            while "{" + name + "}" in url:
+                url = url.replace("{" + name + "}", quote(value(), safe=""), 1)
+        return url
+
+
+async def run_endpoint(client, template: str, parameters: Parameters, requests: int, concurrency: int, warmup: int, headers):
+    for _ in range(warmup):
+        await client.get(parameters.fill(template), headers=headers)
+
+    urls = [parameters.fill(template) for _ in range(requests)]
+    latencies = []
+    statuses = {}
+    queue = iter(urls)
+
+    async def worker():
+        for url in queue:
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status not in EXPECTED_STATUSES),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "mean_ms": round(float(np.mean(latencies)) * 1000, 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(args):
+    import httpx
+    from sqlalchemy.engine import make_url
+    from app.config import ANALYTICS_ENGINE, DATABASE_URL, correct_password, correct_username
+
+    routers = args.router or list(ENDPOINTS)
+    if args.url and "admin" in routers:
+        routers.remove("admin")
+    credentials = base64.b64encode(f"{correct_username}:{correct_password}".encode()).decode()
+    admin_headers = {"Authorization": f"Basic {credentials}"}
+
+    parameters, rows = await Parameters.load(args.seed)
+    results = {}
+
+    async def run(client):
+        for router in routers:
+            for template in ENDPOINTS[router]:
+                headers = admin_headers if router == "admin" else None
+                result = await run_endpoint(client, template, parameters, args.requests, args.concurrency, args.warmup, headers)
+                results[template] = {"router": router, **result}
+                print(f"{template:<60}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                      f"{result['rps']:>9.1f}{result['errors']:>7}")
+
+    print(f"{'endpoint':<60}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>7}")
+    cache_stats = None
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            await run(client)
+    else:
+        from app.main import app
+        from app.core.rate_limiter import limiter
+        from app.core.response_cache import response_cache
+        limiter.enabled = False
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=30) as client:
+                await run(client)
+        cache_stats = response_cache.stats()
+
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "target": args.url or "in-process",
+            "database": make_url(DATABASE_URL).get_backend_name(),
+            "rows": rows,
+            "analytics_engine": ANALYTICS_ENGINE,
+            "response_cache": not args.no_cache,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "cache_stats": cache_stats,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print the change of every endpoint in both runs, True if any of them regressed"""
+    regressed = False
+    for key in ("target", "database", "rows", "analytics_engine", "response_cache", "concurrency"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"note: {key} was {baseline['meta'].get(key)}, now {current['meta'].get(key)}")
+    print(f"\n{'endpoint':<60}{'p50':>9}{'p99':>9}{'req/s':>9}")
+    for template, result in current["results"].items():
+        before = baseline["results"].get(template)
+        if before is None:
+            continue
+        changes = {
+            key: result[key] / before[key] - 1 if before[key] else 0.0
+            for key in ("p50_ms", "p99_ms", "rps")
+        }
+        worse = changes["p99_ms"] > threshold or changes["rps"] < -threshold
+        regressed |= worse
+        print(f"{template:<60}{changes['p50_ms']:>+9.0%}{changes['p99_ms']:>+9.0%}{changes['rps']:>+9.0%}"
+              f"{'  REGRESSED' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.harness")
+    parser.add_argument("--requests", type=int, default=300, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per endpoint first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--router", action="append", choices=list(ENDPOINTS), help="only these routers (repeatable)")
+    parser.add_argument("--url", help="benchmark a running server instead of the app in this process")
+    parser.add_argument("--no-cache", action="store_true", help="turn the response cache off (in-process only)")
+    parser.add_argument("--out", help=f"where to write the results, a timestamped file in {RESULTS_DIR} by default")
+    parser.add_argument("--compare", help="an earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="the relative change --compare flags")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        # read by app.config on import
+        os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+
+    report = asyncio.run(benchmark(args))
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['meta']['database']}-{report['meta']['rows']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            if compare(json.load(file), report, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# What a rate limit check costs per request with each storage:
+#
+#   python -m benchmarks.rate_limit [--checks 20000] [--resp resp://host:6379/0]
+#
+# Times the sliding window counter hit() slowapi makes before a limited handler runs, for
+# a mix of fresh keys (one hit per client) and hot keys (the same client over and over).
+# The Redis protocol storage runs against the in-process stand-in unless --resp is given.
+import argparse
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+# registers the sqlite:// and resp:// storages
+from app.core import rate_limit_storage
+from .resp_standin import RespStandIn
+
+
+def time_checks(uri: str, checks: int, clients: int):
+    storage = storage_from_string(uri)
+    storage.reset()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    # high enough that every hit is accepted and writes its counter
+    item = parse(f"{checks}/hour")
+    timings = []
+    for check in range(checks):
+        started = time.perf_counter()
+        limiter.hit(item, f"10.0.{check % clients // 256}.{check % clients % 256}")
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rate_limit")
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--resp", help="a Redis protocol server to use instead of the in-process stand-in")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        storages = {
+            "memory": "memory://",
+            "sqlite (file)": f"sqlite:///{os.path.join(directory, 'ratelimit.db')}",
+            "resp": args.resp or stack.enter_context(RespStandIn()).uri,
+        }
+        if os.path.isdir("/dev/shm"):
+            shm = stack.enter_context(tempfile.TemporaryDirectory(dir="/dev/shm"))
+            storages["sqlite (/dev/shm)"] = f"sqlite:///{os.path.join(shm, 'ratelimit.db')}"
+
+        print(f"{'storage':<20}{'clients':>10}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+        for name, uri in storages.items():
+            for clients in (args.checks, 10):
+                result = time_checks(uri, args.checks, clients)
+                print(f"{name:<20}{clients:>10}{result['mean_us']:>10.1f}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
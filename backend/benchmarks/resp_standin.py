@@ -0,0 +1,128 @@
+# An in-process stand-in for a Redis server, enough of the protocol for RespStorage
+# (app/core/rate_limit_storage.py) to run against without a real server:
+#
+#   with RespStandIn() as server:
+#       storage = storage_from_string(server.uri)
+#
+# Keys live in a dict guarded by one lock, expiry is checked when a key is read.
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # replies to a pipeline go out one by one, don't let them wait on the client's ACKs
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            try:
+                reply = self.server.standin.execute(command)
+            except Exception as error:
+                reply = error
+            self.wfile.write(_encode(reply))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        arguments = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            arguments.append(self.rfile.read(length + 2)[:-2].decode())
+        return arguments
+
+
+def _encode(reply) -> bytes:
+    if isinstance(reply, Exception):
+        return f"-ERR {reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, bool):
+        return b"+OK\r\n"
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, list):
+        return f"*{len(reply)}\r\n".encode() + b"".join(_encode(item) for item in reply)
+    data = str(reply).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RespStandIn:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.data = {}
+        # key -> expiry in epoch milliseconds
+        self.expiries = {}
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.standin = self
+        self.thread = None
+
+    @property
+    def uri(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"resp://{host}:{port}/0"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _live(self, key: str) -> bool:
+        expires_at = self.expiries.get(key)
+        if expires_at is not None and expires_at <= time.time() * 1000:
+            self.data.pop(key, None)
+            self.expiries.pop(key, None)
+        return key in self.data
+
+    def execute(self, command):
+        name, arguments = command[0].upper(), command[1:]
+        with self.lock:
+            if name == "PING":
+                return "PONG"
+            if name in ("SELECT", "AUTH"):
+                return True
+            if name == "GET":
+                return self.data[arguments[0]] if self._live(arguments[0]) else None
+            if name in ("INCRBY", "DECRBY"):
+                key, amount = arguments[0], int(arguments[1])
+                value = (int(self.data[key]) if self._live(key) else 0) + (amount if name == "INCRBY" else -amount)
+                self.data[key] = str(value)
+                return value
+            if name in ("PEXPIRE", "PEXPIREAT"):
+                key, value = arguments[0], int(arguments[1])
+                if not self._live(key):
+                    return 0
+                self.expiries[key] = value if name == "PEXPIREAT" else time.time() * 1000 + value
+                return 1
+            if name == "PTTL":
+                key = arguments[0]
+                if not self._live(key):
+                    return -2
+                if key not in self.expiries:
+                    return -1
+                return int(self.expiries[key] - time.time() * 1000)
+            if name == "DEL":
+                deleted = sum(1 for key in arguments if self._live(key))
+                for key in arguments:
+                    self.data.pop(key, None)
+                    self.expiries.pop(key, None)
+                return deleted
+            if name == "SCAN":
+                # everything in one page
+                pattern = arguments[arguments.index("MATCH") + 1] if "MATCH" in arguments else "*"
+                return ["0", [key for key in list(self.data) if self._live(key) and fnmatch.fnmatchcase(key, pattern)]]
+        raise ValueError(f"unknown command '{name}'")
@@ -0,0 +1,163 @@
+# Synthetic ReportedSalary rows for load tests, shaped like the real data but at any size:
+#
+#   python -m benchmarks.synthetic --rows 1000000 [--seed 0] [--csv out.csv]
+#
+# loads the rows into DATABASE_URL through data_loader (or writes them to a CSV instead).
+# Companies are Zipf distributed (a few show up everywhere, most have a handful of reports),
+# every company has a home city most of its reports come from, and salaries grow with the
+# role, the company, the year and the co-op term. The same rows, seed and chunk size always
+# give the same data.
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+# the well known names get the top ranks, generated ones fill the long tail
+COMPANIES = [
+    "Shopify", "Google", "Amazon", "Microsoft", "RBC", "TD", "Genetec", "Ubisoft", "Morgan Stanley",
+    "Pratt & Whitney Canada", "CAE", "Bombardier", "Hydro-Québec", "Desjardins", "Intact", "Bell",
+    "Rogers", "Telus", "Wealthsimple", "Cohere", "Meta", "Apple", "Nvidia", "AMD", "Intel",
+    "Qualcomm", "Tesla", "Stripe", "Databricks", "Snowflake", "Datadog", "Coinbase", "Jane Street",
+    "Citadel", "Hudson River Trading", "Uber", "Lyft", "Airbnb", "Salesforce", "Oracle", "IBM", "SAP",
+    "Ericsson", "Nokia", "Ciena", "Kinaxis", "OpenText", "BlackBerry", "Sun Life", "Manulife",
+    "CIBC", "BMO", "National Bank", "Scotiabank", "EA", "Autodesk", "Adobe", "Cisco", "Dell",
+    "Matrox", "Lightspeed", "Coveo", "Nuvei", "Mila", "Element AI", "Behaviour Interactive",
+]
+TAIL_PREFIXES = ["Nova", "Maple", "North", "Blue", "Quantum", "Pixel", "Aurora", "Summit", "Cedar", "Polar"]
+TAIL_SUFFIXES = ["Labs", "Systems", "Technologies", "Software", "Analytics", "Robotics", "Health", "Capital"]
+# the Zipf exponent, about what the real company counts follow
+ZIPF_EXPONENT = 1.1
+
+# (location, weight, pay multiplier), US offers pay more
+LOCATIONS = [
+    ("Montreal, QC", 20, 1.0), ("Toronto, ON", 22, 1.05), ("Waterloo, ON", 10, 1.0),
+    ("Ottawa, ON", 7, 1.0), ("Vancouver, BC", 9, 1.05), ("Calgary, AB", 4, 1.0),
+    ("Quebec City, QC", 3, 0.95), ("Saint-Laurent, QC", 2, 0.95), ("Halifax, NS", 1, 0.9),
+    ("Remote", 6, 1.0), ("Canada", 4, 1.0), ("Bay Area, CA", 4, 1.7), ("San Francisco, CA", 2, 1.7),
+    ("Seattle, WA", 3, 1.6), ("New York City, NY", 3, 1.6), ("Austin, TX", 1, 1.4),
+]
+# how many reports come from the company's home city rather than anywhere
+HOME_SHARE = 0.7
+
+# (role, weight, median hourly CAD in the first term)
+ROLES = [
+    ("Unreported", 30, 24.0), ("Software Developer", 15, 28.0), ("Software Engineer", 15, 30.0),
+    ("Data Scientist", 5, 29.0), ("Business Analyst", 5, 22.0), ("Product Manager", 3, 27.0),
+    ("Designer", 3, 23.0), ("Mechanical Engineer", 4, 23.0), ("Electrical Engineer", 4, 24.0),
+    ("Civil Engineer", 2, 21.0), ("Chemical Engineer", 2, 22.0), ("Finance", 4, 23.0),
+    ("Consulting", 2, 24.0), ("Marketing", 2, 19.0), ("Operations", 2, 20.0), ("IT", 2, 20.0),
+]
+UNIVERSITIES = [
+    ("University of Waterloo", 30), ("Concordia University", 15), ("McGill University", 12),
+    ("University of Toronto", 14), ("University of British Columbia", 8), ("McMaster University", 5),
+    ("Queen's University", 4), ("Western University", 3), ("Polytechnique Montréal", 3),
+    ("École de technologie supérieure", 3), ("University of Ottawa", 3), ("Carleton University", 3),
+]
+ARRANGEMENTS = [("Hybrid", 45), ("In-Office", 35), (None, 20)]
+YEARS = np.arange(2015, 2026)
+# reports per year grow as the site gets known
+YEAR_WEIGHTS = np.linspace(1, 6, len(YEARS))
+TERM_WEIGHTS = np.array([18, 20, 19, 17, 14, 12], dtype=float)
+
+YEARLY_GROWTH = 1.03
+TERM_RAISE = 0.04
+BONUS_SHARE = 0.35
+
+
+def _probabilities(weights) -> np.ndarray:
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+def _companies(count: int, rng: np.random.Generator):
+    """count company names by rank, with a home city index and a pay multiplier each"""
+    names = list(COMPANIES[:count])
+    for index in range(count - len(names)):
+        prefix, suffix = TAIL_PREFIXES[index % len(TAIL_PREFIXES)], TAIL_SUFFIXES[index // len(TAIL_PREFIXES) % len(TAIL_SUFFIXES)]
+        names.append(f"{prefix} {suffix} {index // (len(TAIL_PREFIXES) * len(TAIL_SUFFIXES)) + 1}")
+    homes = rng.choice(len(LOCATIONS), size=count, p=_probabilities([weight for _, weight, _ in LOCATIONS]))
+    pay = rng.lognormal(0, 0.2, size=count)
+    return np.array(names, dtype=object), homes, pay
+
+
+def generate_salaries(rows: int, seed: int = 0, chunk_size: int = 100_000, companies: int | None = None):
+    """
+    Yield DataFrames of at most chunk_size rows with the SALARY_COLUMNS ingest_salaries()
+    takes, rows in total. companies defaults to one per 20 rows (at least the named ones).
+    """
+    rng = np.random.default_rng(seed)
+    companies = companies or max(len(COMPANIES), rows // 20)
+    names, homes, company_pay = _companies(companies, rng)
+    company_p = _probabilities(1 / np.arange(1, companies + 1) ** ZIPF_EXPONENT)
+    location_names = np.array([name for name, _, _ in LOCATIONS], dtype=object)
+    location_p = _probabilities([weight for _, weight, _ in LOCATIONS])
+    location_pay = np.array([pay for _, _, pay in LOCATIONS])
+    role_names = np.array([name for name, _, _ in ROLES], dtype=object)
+    role_pay = np.array([pay for _, _, pay in ROLES])
+    role_p = _probabilities([weight for _, weight, _ in ROLES])
+    university_names = np.array([name for name, _ in UNIVERSITIES], dtype=object)
+    university_p = _probabilities([weight for _, weight in UNIVERSITIES])
+    arrangement_names = np.array([name for name, _ in ARRANGEMENTS], dtype=object)
+    arrangement_p = _probabilities([weight for _, weight in ARRANGEMENTS])
+
+    for start in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - start)
+        # its own stream per chunk, so chunks don't depend on how much the previous ones drew
+        chunk_rng = np.random.default_rng([seed, start])
+        company = chunk_rng.choice(companies, size=size, p=company_p)
+        location = np.where(
+            chunk_rng.random(size) < HOME_SHARE, homes[company], chunk_rng.choice(len(LOCATIONS), size=size, p=location_p)
+        )
+        role = chunk_rng.choice(len(ROLES), size=size, p=role_p)
+        year = chunk_rng.choice(YEARS, size=size, p=_probabilities(YEAR_WEIGHTS))
+        term = chunk_rng.choice(np.arange(1, 7), size=size, p=_probabilities(TERM_WEIGHTS))
+
+        salary = (
+            role_pay[role] * company_pay[company] * location_pay[location]
+            * YEARLY_GROWTH ** (year - YEARS[0]) * (1 + TERM_RAISE * (term - 1))
+            * chunk_rng.lognormal(0, 0.12, size=size)
+        )
+        bonus = np.where(chunk_rng.random(size) < BONUS_SHARE, np.round(chunk_rng.lognormal(7.6, 0.6, size=size), -2), 0.0)
+        arrangement = chunk_rng.choice(arrangement_names, size=size, p=arrangement_p)
+        location_name = location_names[location]
+        arrangement[location_name == "Remote"] = "Remote"
+
+        yield pd.DataFrame({
+            "company": names[company],
+            "year": year,
+            "salary": salary.round(2),
+            "university": chunk_rng.choice(university_names, size=size, p=university_p),
+            "term": term,
+            "location": location_name,
+            "bonus": bonus,
+            "role": role_names[role],
+            "arrangement": arrangement,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--companies", type=int, help="distinct companies, one per 20 rows by default")
+    parser.add_argument("--csv", help="write the rows to this CSV instead of loading them")
+    args = parser.parse_args()
+
+    chunks = generate_salaries(args.rows, args.seed, args.chunk_size, args.companies)
+    started = time.perf_counter()
+    if args.csv:
+        for index, chunk in enumerate(chunks):
+            chunk.to_csv(args.csv, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        print(f"{args.rows} rows written to {args.csv} in {time.perf_counter() - started:.1f}s")
+        return
+
+    from app.data_loader import load_generated_data
+    inserted = load_generated_data(
+        chunks, progress=lambda rows, written: print(f"{rows}/{args.rows} rows, {written} written")
+    )
+    print(f"{inserted} rows loaded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# app.config reads these on import, the tests never touch a real database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("FRONTEND_URL", "http://localhost:3000")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "admin")
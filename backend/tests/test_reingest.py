@@ -0,0 +1,82 @@
+# The content hashes v0003 backfills must match the ones a re-ingest computes. The bundled
+# CSVs are loaded into the scratch database the way the original loaders stored them (before
+# content hashes existed), upgraded and loaded again through the ingest pipeline: the second
+# load must not add a row.
+import os
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import func, insert, select
+from app.database import engine
+from app.data_loader import load_csv_data, load_waterloo_data
+from app.migrations import available_migrations, run_migrations, schema_migrations
+from app.migrations.versions import v0001_baseline
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+BASELINE_VERSIONS = {"v0001_baseline", "v0002_salary_indexes"}
+
+# the spellings the original Concordia loader replaced, exact matches after stripping.
+# Locations take no part in the content hash, the loader's location replacements are left out.
+BASELINE_COMPANY_REPLACEMENTS = {
+    "Pratt & Whitney": "Pratt and Whitney",
+    "Pratt & Whitney Canada": "Pratt and Whitney",
+    "Pratt and Whitney Canada": "Pratt and Whitney",
+    "Pratt & whitney canada": "Pratt and Whitney",
+    "Airbus-ACE": "Airbus",
+    "Ibwave": "iBwave",
+    "CN National Railway (Internship)": "CN",
+    "Health systems R&A": "Healthcare Systems R&A",
+    "Intact Financial Corp": "Intact",
+    "Sun Life Financial Canada": "Sun Life Financial",
+    "Samsung Ads | AdGear": "Samsung",
+    "Tangerine Software": "Tangerine Bank",
+    "ticketmaster": "Ticker Master",
+    "ubicquia": "Ubicquia",
+    "X2O media": "X2O Media",
+}
+
+
+def baseline_rows() -> pd.DataFrame:
+    """ReportedSalary rows as the original load_csv_data() and load_waterloo_data() stored them"""
+    concordia = pd.read_csv(os.path.join(DATA_DIR, "ConcordiaResponses.csv")).drop(columns=["Timestamp"])
+    concordia["term"] = concordia["term"].str.extract(r"(\d+)").astype(int)
+    concordia["university"] = "Concordia University"
+    concordia["role"] = "Unreported"
+    concordia["company"] = concordia["company"].str.strip().replace(BASELINE_COMPANY_REPLACEMENTS)
+    concordia["location"] = concordia["location"].str.strip()
+
+    waterloo = pd.read_csv(os.path.join(DATA_DIR, "CleanWaterloo.csv"))
+    waterloo["salary"] = pd.to_numeric(waterloo["salary"], errors="coerce")
+    waterloo["bonus"] = pd.to_numeric(waterloo["bonus"], errors="coerce")
+    waterloo = waterloo.dropna(subset=["salary"])
+    # fillna(0) and then 0 stored as NULL
+    waterloo["term"] = pd.to_numeric(waterloo["term"], errors="coerce").fillna(0).astype("Int64")
+    waterloo["term"] = waterloo["term"].mask(waterloo["term"] == 0)
+    waterloo["location"] = waterloo["location"].fillna("Canada")
+
+    rows = pd.concat([concordia, waterloo], ignore_index=True)
+    rows = rows[["company", "year", "salary", "university", "term", "location", "bonus", "role", "arrangement"]]
+    return rows.astype(object).where(rows.notna(), None)
+
+
+def count_salaries(table) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_reingest_after_upgrading_adds_no_rows():
+    # the table as the baseline created it, without content_hash
+    table = v0001_baseline.metadata.tables["reportedsalary"]
+    with engine.begin() as connection:
+        schema_migrations.create(connection)
+        for migration in available_migrations():
+            version = migration.__name__.rsplit(".", 1)[-1]
+            if version in BASELINE_VERSIONS:
+                migration.upgrade(connection)
+                connection.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+        connection.execute(insert(table), baseline_rows().to_dict(orient="records"))
+    run_migrations(engine)
+    upgraded = count_salaries(table)
+
+    load_csv_data(os.path.join(DATA_DIR, "ConcordiaResponses.csv"))
+    load_waterloo_data(csv_file=os.path.join(DATA_DIR, "CleanWaterloo.csv"))
+    assert count_salaries(table) == upgraded
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.analytics_engine import get_analytics
+from app.routers.analytics import MAX_DISTRIBUTION_BUCKETS, router
+
+
+class StubAnalytics:
+    def __init__(self):
+        self.edges = None
+
+    async def salary_histogram(self, edges, **filters):
+        self.edges = edges
+        return [0] * len(edges), 0
+
+
+@pytest.fixture
+def analytics():
+    return StubAnalytics()
+
+
+@pytest.fixture
+def client(analytics):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_analytics] = lambda: analytics
+    return TestClient(app)
+
+
+def test_bucket_width(client, analytics):
+    response = client.get("/analytics/salary-distribution?bucket_width=10&upper=50")
+    assert response.status_code == 200
+    assert analytics.edges == [0, 10, 20, 30, 40, 50]
+    assert [bucket["salary_range"] for bucket in response.json()][-1] == "$50+"
+
+
+def test_tiny_bucket_width_is_rejected_before_building_edges(client, analytics):
+    response = client.get("/analytics/salary-distribution?bucket_width=0.0000001")
+    assert response.status_code == 400
+    assert analytics.edges is None
+
+
+def test_most_buckets_allowed(client, analytics):
+    upper = MAX_DISTRIBUTION_BUCKETS - 1
+    assert client.get(f"/analytics/salary-distribution?bucket_width=1&upper={upper}").status_code == 200
+    assert len(analytics.edges) == MAX_DISTRIBUTION_BUCKETS
+    assert client.get(f"/analytics/salary-distribution?bucket_width=1&upper={upper + 1}").status_code == 400
+
+
+@pytest.mark.parametrize("query", ["bucket_width=5&upper=inf", "upper=inf", "bucket_width=inf"])
+def test_infinite_upper_and_bucket_width_are_rejected(client, analytics, query):
+    assert client.get(f"/analytics/salary-distribution?{query}").status_code == 400
+    assert analytics.edges is None
+
+
+@pytest.mark.parametrize("query", ["upper=nan", "bucket_width=nan"])
+def test_nan_upper_and_bucket_width_are_rejected(client, analytics, query):
+    # nan fails the gt=0 validation already
+    assert client.get(f"/analytics/salary-distribution?{query}").status_code == 422
+    assert analytics.edges is None
+
+
+@pytest.mark.parametrize("edge", ["nan", "inf", "-inf"])
+def test_non_finite_edges_are_rejected(client, analytics, edge):
+    response = client.get(f"/analytics/salary-distribution?edges=0&edges={edge}&edges=20")
+    assert response.status_code == 400
+    assert analytics.edges is None
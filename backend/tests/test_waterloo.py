@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from app.ingest.waterloo import SHEET_COLUMNS, UNPARSED_BENEFIT, parse_waterloo
+
+
+def sheet(*rows):
+    """A raw sheet of (company, salary, benefits) rows, all from 2024"""
+    columns = list(SHEET_COLUMNS)
+    return pd.DataFrame(
+        [{columns[0]: company, columns[1]: salary, columns[2]: benefits, columns[3]: "2024", columns[4]: None}
+         for company, salary, benefits in rows],
+        dtype="string"
+    )
+
+
+def bonus(benefits):
+    salaries, failures = parse_waterloo(sheet(("Acme", "30/hr", benefits)))
+    assert len(salaries) == 1
+    return salaries["bonus"].iloc[0], failures
+
+
+@pytest.mark.parametrize("benefits, expected", [
+    ("$1000 signing bonus", 1000),
+    ("5k relocation", 5000),
+    ("~4k relocation (onsite)", 4000),
+    ("2000 CAD signing bonus (1st coop)", 2000),
+    ("$1,500 signing bonus", 1500),
+    ("500/mo housing", 2000),
+    ("14/hr housing", 8960),
+])
+def test_benefit_amounts(benefits, expected):
+    amount, failures = bonus(benefits)
+    assert amount == expected
+    assert failures.empty
+
+
+@pytest.mark.parametrize("benefits", [
+    # a count, not dollars
+    "4 days PTO",
+    # per a period that isn't a unit the term can be totalled over
+    "$25/day lunch",
+    "700 housing stipend",
+    "4% vacation pay",
+    "Flights included",
+])
+def test_benefits_without_an_amount_are_reported_not_guessed(benefits):
+    amount, failures = bonus(benefits)
+    assert pd.isna(amount)
+    assert failures[["report", "reason"]].values.tolist() == [[benefits, UNPARSED_BENEFIT]]
+
+
+def test_unparsed_benefit_is_reported_once_per_sheet_row():
+    salaries, failures = parse_waterloo(sheet(("Acme", "30/hr, 35/hr (2nd coop)", "4 days PTO")))
+    assert len(salaries) == 2
+    assert failures["reason"].tolist() == [UNPARSED_BENEFIT]
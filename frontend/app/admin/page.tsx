@@ -28,22 +28,40 @@ interface PendingSalary {
   submitted_at: string;
 }
 
+interface PendingPage {
+  data: PendingSalary[];
+  next_cursor: string | null;
+  prev_cursor: string | null;
+}
+
+const PAGE_SIZE = 100;
+
 export default function AdminPage() {
   const [pendingSalaries, setPendingSalaries] = useState<PendingSalary[]>([]);
   const [credentials, setCredentials] = useState({ username: '', password: '' });
   const [isLoggedIn, setIsLoggedIn] = useState(false);
+  const [companyFilter, setCompanyFilter] = useState('');
+  const [cursors, setCursors] = useState<{ next: string | null; prev: string | null }>({ next: null, prev: null });
+  const [pageCursor, setPageCursor] = useState<string | null>(null);
+  const [selected, setSelected] = useState<Set<number>>(new Set());
 
-  const fetchPendingSalaries = async () => {
+  const fetchPendingSalaries = async (cursor: string | null = pageCursor) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (companyFilter.trim()) params.set('company', companyFilter.trim());
+    if (cursor) params.set('cursor', cursor);
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/admin/pending-submissions`, {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/admin/pending-submissions?${params}`, {
         headers: {
           'Authorization': 'Basic ' + btoa(`${credentials.username}:${credentials.password}`)
         }
       });
       
       if (response.ok) {
-        const data = await response.json();
-        setPendingSalaries(data);
+        const page: PendingPage = await response.json();
+        setPendingSalaries(page.data);
+        setCursors({ next: page.next_cursor, prev: page.prev_cursor });
+        setPageCursor(cursor);
+        setSelected(new Set());
         setIsLoggedIn(true);
       } else {
         if (response.status === 429) {
@@ -88,6 +106,43 @@ export default function AdminPage() {
     }
   };
 
+  const handleBatch = async (action: 'approve' | 'reject') => {
+    if (selected.size === 0) return;
+    try {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/admin/${action}`, {
+        method: 'POST',
+        headers: {
+          'Authorization': 'Basic ' + btoa(`${credentials.username}:${credentials.password}`),
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ ids: Array.from(selected) })
+      });
+      if (response.ok) {
+        const result = await response.json();
+        toast.success(result.message);
+        fetchPendingSalaries();
+      } else {
+        toast.error(`Failed to ${action} submissions`);
+      }
+    } catch (error) {
+      toast.error("Failed to connect to server");
+    }
+  };
+
+  const toggleSelected = (id: number) => {
+    setSelected(prev => {
+      const next = new Set(prev);
+      if (next.has(id)) {
+        next.delete(id);
+      } else {
+        next.add(id);
+      }
+      return next;
+    });
+  };
+
+  const allSelected = pendingSalaries.length > 0 && selected.size === pendingSalaries.length;
+
   return (
     <div className="min-h-screen py-10">
       <div className="text-center mb-10">
@@ -109,7 +164,7 @@ export default function AdminPage() {
               className="w-full p-2 border rounded"
             />
             <Button 
-              onClick={fetchPendingSalaries}
+              onClick={() => fetchPendingSalaries(null)}
               className="w-full"
             >
               {isLoggedIn ? 'Refresh Submissions' : 'Login'}
@@ -121,9 +176,41 @@ export default function AdminPage() {
       {/* Pending Submissions Table - Only shown when logged in */}
       {isLoggedIn && (
         <div className="container mx-auto">
+          <div className="flex flex-wrap items-center gap-2 mb-4">
+            <input
+              type="text"
+              placeholder="Filter by company"
+              value={companyFilter}
+              onChange={(e) => setCompanyFilter(e.target.value)}
+              onKeyDown={(e) => { if (e.key === 'Enter') fetchPendingSalaries(null); }}
+              className="p-2 border rounded"
+            />
+            <Button variant="outline" onClick={() => fetchPendingSalaries(null)}>Filter</Button>
+            <Button onClick={() => handleBatch('approve')} disabled={selected.size === 0}>
+              Approve selected ({selected.size})
+            </Button>
+            <Button variant="destructive" onClick={() => handleBatch('reject')} disabled={selected.size === 0}>
+              Reject selected ({selected.size})
+            </Button>
+            <div className="ml-auto flex gap-2">
+              <Button variant="outline" onClick={() => fetchPendingSalaries(cursors.prev)} disabled={!cursors.prev}>
+                Previous
+              </Button>
+              <Button variant="outline" onClick={() => fetchPendingSalaries(cursors.next)} disabled={!cursors.next}>
+                Next
+              </Button>
+            </div>
+          </div>
           <Table>
             <TableHeader>
               <TableRow>
+                <TableHead>
+                  <input
+                    type="checkbox"
+                    checked={allSelected}
+                    onChange={() => setSelected(allSelected ? new Set() : new Set(pendingSalaries.map((salary) => salary.id)))}
+                  />
+                </TableHead>
                 <TableHead>Company</TableHead>
                 <TableHead>Salary</TableHead>
                 <TableHead>Role</TableHead>
@@ -142,6 +229,13 @@ export default function AdminPage() {
             <TableBody>
               {pendingSalaries.map((salary) => (
                 <TableRow key={salary.id}>
+                  <TableCell>
+                    <input
+                      type="checkbox"
+                      checked={selected.has(salary.id)}
+                      onChange={() => toggleSelected(salary.id)}
+                    />
+                  </TableCell>
                   <TableCell>{salary.company}</TableCell>
                   <TableCell>${salary.salary}/hr</TableCell>
                   <TableCell>{salary.role}</TableCell>
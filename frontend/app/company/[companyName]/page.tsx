@@ -5,21 +5,29 @@ import {
   CardHeader,
   CardTitle,
 } from "@/components/ui/card";
-import { CompanyTable } from "@/components/custom/companyTable";
+import { CompanyTable, type Salary } from "@/components/custom/companyTable";
 import { useParams } from "next/navigation";
 import { useEffect, useState } from "react";
 import { Button } from "@/components/ui/button"
 import { useRouter } from "next/navigation"
+import { toast } from "sonner"
 import { Building2, DollarSign, GraduationCap, MapPin, ArrowLeft, TrendingUp } from "lucide-react";
 
 
+// reports per request, the profile's first page and every page loaded after it
+const SALARY_PAGE_SIZE = 20;
+
 export default function Company() {
   const router = useRouter()
 
   const params = useParams();
   const { companyName } = params;
   const [decodedCompanyName, setDecodedCompanyName] = useState("");
-  const [companyRecords, setCompanyRecords] = useState([]);
+  const [companyRecords, setCompanyRecords] = useState<Salary[]>([]);
+  // cursor of the next page of reports, null once every report is loaded
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [totalReports, setTotalReports] = useState(0);
   const [averageSalary, setAverageSalary] = useState(0.0);
   const [topUniversity, setTopUniversity] = useState("");
   const [topLocation, setTopLocation] = useState("");
@@ -52,29 +60,19 @@ export default function Company() {
         setLoading(true); 
         setError(null); 
 
-        const [allSalariesRes, averageSalariesRes, topLocationRes, topUniversityRes] = await Promise.all([
-          fetch(`${BACKEND_URL}/company/all-salaries?company=${decodedCompanyName}`),
-          fetch(`${BACKEND_URL}/company/average-salary?company=${decodedCompanyName}`),
-          fetch(`${BACKEND_URL}/company/top-location?company=${decodedCompanyName}`),
-          fetch(`${BACKEND_URL}/company/top-university?company=${decodedCompanyName}`),
-        ]);
-
-        // Check if any response failed and immediately throw an error
-        if (!allSalariesRes.ok || !averageSalariesRes.ok || !topLocationRes.ok || !topUniversityRes.ok) {
+        const profileRes = await fetch(`${BACKEND_URL}/company/${encodeURIComponent(decodedCompanyName)}/profile?limit=${SALARY_PAGE_SIZE}`);
+        if (!profileRes.ok) {
           throw new Error("Company not found or data unavailable");
         }
+        const profile = await profileRes.json();
 
-        const [salariesData, averageSalaryData, topLocationData, topUniversityData] = await Promise.all([
-          allSalariesRes.json(),
-          averageSalariesRes.json(),
-          topLocationRes.json(),
-          topUniversityRes.json(),
-        ]);
-
-        setCompanyRecords(salariesData);
-        setAverageSalary(averageSalaryData);
-        setTopLocation(topLocationData);
-        setTopUniversity(topUniversityData);
+        // the profile carries the first page of reports, later pages load on demand
+        setCompanyRecords(profile.salaries.data);
+        setNextCursor(profile.salaries.next_cursor);
+        setTotalReports(profile.total_reports);
+        setAverageSalary(profile.avg_salary);
+        setTopLocation(profile.top_location ?? "");
+        setTopUniversity(profile.top_university ?? "");
       } catch (error: unknown) {
         console.error("Error fetching company data:", error);
         setError(error instanceof Error ? error.message : "An error occurred while fetching data");
@@ -86,6 +84,26 @@ export default function Company() {
     fetchCompanyData(decodedCompanyName);
   }, [decodedCompanyName]);
 
+  // Appends the next page of reports when the user asks for more
+  const loadMoreSalaries = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const res = await fetch(`${BACKEND_URL}/company/all-salaries?company=${encodeURIComponent(decodedCompanyName)}&limit=${SALARY_PAGE_SIZE}&cursor=${encodeURIComponent(nextCursor)}`);
+      if (!res.ok) {
+        throw new Error("Failed to fetch salaries");
+      }
+      const page = await res.json();
+      setCompanyRecords((records) => [...records, ...page.data]);
+      setNextCursor(page.next_cursor);
+    } catch (error: unknown) {
+      console.error("Error fetching more salaries:", error);
+      toast.error("Couldn't load more salary reports, please try again");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gradient-to-br from-slate-50 via-white to-blue-50">
@@ -248,6 +266,22 @@ export default function Company() {
             <p className="text-gray-600">Individual salary data from students</p>
           </div>
           <CompanyTable companyRecords={companyRecords} />
+          {nextCursor && (
+            <div className="mt-6 flex flex-col items-center gap-2">
+              <div className="text-sm text-gray-600">
+                <span className="font-semibold">{companyRecords.length}</span> of{' '}
+                <span className="font-semibold">{totalReports}</span> reports loaded
+              </div>
+              <Button
+                onClick={loadMoreSalaries}
+                disabled={loadingMore}
+                variant="outline"
+                className="hover:bg-blue-50 border-blue-200 text-blue-600"
+              >
+                {loadingMore ? "Loading..." : "Load more reports"}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </div>
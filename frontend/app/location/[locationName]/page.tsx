@@ -5,21 +5,29 @@ import {
   CardHeader,
   CardTitle,
 } from "@/components/ui/card";
-import { LocationTable } from "@/components/custom/locationTable";
+import { LocationTable, type Salary } from "@/components/custom/locationTable";
 import { useParams } from "next/navigation";
 import { useEffect, useState } from "react";
 import { Button } from "@/components/ui/button"
 import { useRouter } from "next/navigation"
+import { toast } from "sonner"
 import { MapPin, DollarSign, GraduationCap, Building2, ArrowLeft } from "lucide-react";
 
 
+// reports per request, the profile's first page and every page loaded after it
+const SALARY_PAGE_SIZE = 20;
+
 export default function Location() {
   const router = useRouter()
 
   const params = useParams();
   const { locationName } = params;
   const [decodedLocationName, setDecodedLocationName] = useState("");
-  const [locationRecords, setLocationRecords] = useState([]);
+  const [locationRecords, setLocationRecords] = useState<Salary[]>([]);
+  // cursor of the next page of reports, null once every report is loaded
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [totalReports, setTotalReports] = useState(0);
   const [averageSalary, setAverageSalary] = useState(0.0);
   const [topUniversity, setTopUniversity] = useState("");
   const [topCompany, setTopCompany] = useState("");
@@ -52,29 +60,19 @@ export default function Location() {
         setLoading(true); 
         setError(null); 
 
-        const [allSalariesRes, averageSalariesRes, topCompanyRes, topUniversityRes] = await Promise.all([
-          fetch(`${BACKEND_URL}/location/all-salaries?location=${decodedLocationName}`),
-          fetch(`${BACKEND_URL}/location/average-salary?location=${decodedLocationName}`),
-          fetch(`${BACKEND_URL}/location/top-company?location=${decodedLocationName}`),
-          fetch(`${BACKEND_URL}/location/top-university?location=${decodedLocationName}`),
-        ]);
-
-        // Check if any response failed and immediately throw an error
-        if (!allSalariesRes.ok || !averageSalariesRes.ok || !topCompanyRes.ok || !topUniversityRes.ok) {
+        const profileRes = await fetch(`${BACKEND_URL}/location/${encodeURIComponent(decodedLocationName)}/profile?limit=${SALARY_PAGE_SIZE}`);
+        if (!profileRes.ok) {
           throw new Error("Location not found or data unavailable");
         }
+        const profile = await profileRes.json();
 
-        const [salariesData, averageSalaryData, topCompanyData, topUniversityData] = await Promise.all([
-          allSalariesRes.json(),
-          averageSalariesRes.json(),
-          topCompanyRes.json(),
-          topUniversityRes.json(),
-        ]);
-
-        setLocationRecords(salariesData);
-        setAverageSalary(averageSalaryData);
-        setTopCompany(topCompanyData);
-        setTopUniversity(topUniversityData);
+        // the profile carries the first page of reports, later pages load on demand
+        setLocationRecords(profile.salaries.data);
+        setNextCursor(profile.salaries.next_cursor);
+        setTotalReports(profile.total_reports);
+        setAverageSalary(profile.avg_salary);
+        setTopCompany(profile.top_company ?? "");
+        setTopUniversity(profile.top_university ?? "");
       } catch (error: unknown) {
         console.error("Error fetching location data:", error);
         setError(error instanceof Error ? error.message : "An error occurred while fetching data");
@@ -86,6 +84,26 @@ export default function Location() {
     fetchLocationData(decodedLocationName);
   }, [decodedLocationName]);
 
+  // Appends the next page of reports when the user asks for more
+  const loadMoreSalaries = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const res = await fetch(`${BACKEND_URL}/location/all-salaries?location=${encodeURIComponent(decodedLocationName)}&limit=${SALARY_PAGE_SIZE}&cursor=${encodeURIComponent(nextCursor)}`);
+      if (!res.ok) {
+        throw new Error("Failed to fetch salaries");
+      }
+      const page = await res.json();
+      setLocationRecords((records) => [...records, ...page.data]);
+      setNextCursor(page.next_cursor);
+    } catch (error: unknown) {
+      console.error("Error fetching more salaries:", error);
+      toast.error("Couldn't load more salary reports, please try again");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gradient-to-br from-slate-50 via-white to-blue-50">
@@ -248,6 +266,22 @@ export default function Location() {
             <p className="text-gray-600">Individual salary data from students in this location</p>
           </div>
           <LocationTable locationRecords={locationRecords} />
+          {nextCursor && (
+            <div className="mt-6 flex flex-col items-center gap-2">
+              <div className="text-sm text-gray-600">
+                <span className="font-semibold">{locationRecords.length}</span> of{' '}
+                <span className="font-semibold">{totalReports}</span> reports loaded
+              </div>
+              <Button
+                onClick={loadMoreSalaries}
+                disabled={loadingMore}
+                variant="outline"
+                className="hover:bg-blue-50 border-blue-200 text-blue-600"
+              >
+                {loadingMore ? "Loading..." : "Load more reports"}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -16,7 +16,8 @@ interface CompanyComparisonData {
     min_salary: number;
     max_salary: number;
     total_reports: number;
-    salary_data: number[];
+    salary_quantiles?: number[];
+    salary_histogram?: { salary_range: string; count: number }[];
   };
 }
 
@@ -243,6 +243,8 @@ export function CompanyTable({ companyRecords }: { companyRecords: Salary[] }) {
     onSortingChange: setSorting,
     onColumnFiltersChange: setColumnFilters,
     getCoreRowModel: getCoreRowModel(),
+    // the page appends reports as they load, stay on the page being read
+    autoResetPageIndex: false,
     getPaginationRowModel: getPaginationRowModel(),
     getSortedRowModel: getSortedRowModel(),
     getFilteredRowModel: getFilteredRowModel(),
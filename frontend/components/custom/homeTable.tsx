@@ -231,6 +231,8 @@ export function HomeTable() {
     pageSize: 12,
   });
   const [totalRows, setTotalRows] = React.useState(0);
+  // cursor for every page we have reached so far, the first page has none
+  const pageCursors = React.useRef<(string | null)[]>([null]);
 
   const [data, setData] = React.useState<Salary[]>([]);
   const [loading, setLoading] = React.useState(true);
@@ -239,12 +241,14 @@ export function HomeTable() {
   React.useEffect(() => {
     const fetchCompanies = async () => {
       try {
-        const offset = pageIndex * pageSize;
-        const response = await fetch(`${BACKEND_URL}/all-salaries?offset=${offset}&limit=${pageSize}`);
+        const cursor = pageCursors.current[pageIndex];
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+        const response = await fetch(`${BACKEND_URL}/all-salaries?limit=${pageSize}${cursorParam}`);
         if (!response.ok) {
           throw new Error("Failed to fetch companies");
         }
         const response_data = await response.json();
+        pageCursors.current[pageIndex + 1] = response_data.next_cursor;
         setData(response_data.data || response_data);
         setTotalRows(response_data.total || response_data.length);
       } catch (error) {
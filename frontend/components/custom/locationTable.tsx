@@ -221,6 +221,8 @@ export function LocationTable({ locationRecords }: { locationRecords: Salary[] }
     onSortingChange: setSorting,
     onColumnFiltersChange: setColumnFilters,
     getCoreRowModel: getCoreRowModel(),
+    // the page appends reports as they load, stay on the page being read
+    autoResetPageIndex: false,
     getPaginationRowModel: getPaginationRowModel(),
     getSortedRowModel: getSortedRowModel(),
     getFilteredRowModel: getFilteredRowModel(),
@@ -10,7 +10,6 @@ import {
   FormMessage,
 } from "@/components/ui/form"
 import { Input } from "@/components/ui/input"
-import useFetchFieldData from "@/hooks/useFetchFieldData"
 import { zodResolver } from "@hookform/resolvers/zod"
 import { useForm } from "react-hook-form"
 import { z } from "zod"
@@ -53,10 +52,6 @@ const formSchema = z.object({
 
 export function SalaryForm() {
   const [isSubmitting, setIsSubmitting] = useState(false);
-  // Fetch Data from backend
-  const {data: companies} = useFetchFieldData('all-companies');
-  const {data: universities} = useFetchFieldData('all-universities');
-  const {data: roles} = useFetchFieldData('all-roles');
   
   // Defining the form 
   const form = useForm<z.infer<typeof formSchema>>({
@@ -123,7 +118,7 @@ export function SalaryForm() {
               <FormLabel>Company*</FormLabel>
               <FormControl>
                 <SuggestionInput 
-                  suggestions={companies || []}
+                  suggestType="company"
                   value={field.value}
                   onChange={field.onChange}
                   placeholder="Company"
@@ -144,7 +139,7 @@ export function SalaryForm() {
               <FormLabel>Internship Role* </FormLabel>
               <FormControl>
                 <SuggestionInput 
-                  suggestions={roles || []}
+                  suggestType="role"
                   value={field.value}
                   onChange={field.onChange}
                   placeholder="Role"
@@ -221,7 +216,7 @@ export function SalaryForm() {
               <FormLabel>University*</FormLabel>
               <FormControl>
               <SuggestionInput 
-                  suggestions={universities || []}
+                  suggestType="university"
                   value={field.value}
                   onChange={field.onChange}
                   placeholder="University"
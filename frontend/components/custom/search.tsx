@@ -1,6 +1,6 @@
 'use client';
 
-import React, { useEffect, useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { Input } from '../ui/input';
 import { useRouter } from 'next/navigation';
 import { Search as SearchIcon, Building, MapPin } from 'lucide-react';
@@ -10,68 +10,50 @@ interface Suggestion {
   value: string;
 }
 
+interface SuggestResult {
+  type: "company" | "location";
+  value: string;
+  count: number;
+}
+
 const Search: React.FC = () => {
   const [searchTerm, setSearchTerm] = useState<string>('');
   const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
-  const [companies, setCompanies] = useState<string[]>([]);
-  const [locations, setLocations] = useState<string[]>([]);
+  const latestQuery = useRef<string>('');
   const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL;
 
-  useEffect(() => {
-    const fetchCompanies = async () => {
-      try {
-        const response = await fetch(`${BACKEND_URL}/all-companies`);
-        if (!response.ok) {
-          throw new Error("Failed to fetch companies");
-        }
-        const data: string[] = await response.json();
-        setCompanies(data);
-      } catch (error) {
-        console.error("Error fetching companies: ", error);
-      }
-    };
-
-    const fetchLocations = async () => {
-      try {
-        const response = await fetch(`${BACKEND_URL}/all-locations`);
-        if (!response.ok) {
-          throw new Error("Failed to fetch locations");
-        }
-        const data: string[] = await response.json();
-        setLocations(data);
-      } catch (error) {
-        console.error("Error fetching locations: ", error);
-      }
-    };
-
-    fetchCompanies();
-    fetchLocations();
-  }, []);
-
   // Handle input change
-  const handleInputChange = (event: React.ChangeEvent<HTMLInputElement>) => {
+  const handleInputChange = async (event: React.ChangeEvent<HTMLInputElement>) => {
     const value = event.target.value;
     setSearchTerm(value);
+    latestQuery.current = value;
 
-    // Filter suggestions based on input
-    if (value) {
-      const filteredCompanies: Suggestion[] = companies
-        .filter((company) => company.toLowerCase().startsWith(value.toLowerCase()))
-        .map((company) => ({ type: "Company", value: company }));
-
-      const filteredLocations: Suggestion[] = locations
-        .filter((location) => location.toLowerCase().startsWith(value.toLowerCase()))
-        .map((location) => ({ type: "Location", value: location }));
-
-      const combinedSuggestions: Suggestion[] = [...filteredCompanies, ...filteredLocations];
+    if (!value.trim()) {
+      setSuggestions([]);
+      return;
+    }
 
+    // The backend ranks companies and locations by number of reports and returns the top 6
+    try {
+      const params = new URLSearchParams({ q: value, limit: "6" });
+      params.append("type", "company");
+      params.append("type", "location");
+      const response = await fetch(`${BACKEND_URL}/search/suggest?${params}`);
+      if (!response.ok) {
+        throw new Error("Failed to fetch suggestions");
+      }
+      const data: SuggestResult[] = await response.json();
+      // a slower response for an earlier keystroke must not replace newer suggestions
+      if (latestQuery.current !== value) {
+        return;
+      }
       setSuggestions(
-        combinedSuggestions.length > 0
-          ? combinedSuggestions.slice(0, 6) // Limit to 6 results
+        data.length > 0
+          ? data.map((result): Suggestion => ({ type: result.type === "company" ? "Company" : "Location", value: result.value }))
           : [{ type: "No results", value: `No results for: ${value}` }]
       );
-    } else {
-      setSuggestions([]);
+    } catch (error) {
+      console.error("Error fetching suggestions: ", error);
     }
   };
 
@@ -2,17 +2,21 @@ import React, {useState, useRef, useEffect} from 'react';
 import { Input } from '../ui/input';
 
 interface SuggestionInputProps{
-    suggestions: string[],
+    suggestions?: string[],
+    // looked up on /search/suggest as the user types instead of filtering suggestions
+    suggestType?: "company" | "location" | "university" | "role";
     value: string;
     onChange: (value: string) => void;
     placeholder: string;
     type?: string;
 }
 
-const SuggestionInput = ({suggestions, value, onChange, placeholder, type="text"}: SuggestionInputProps) => {
+const SuggestionInput = ({suggestions = [], suggestType, value, onChange, placeholder, type="text"}: SuggestionInputProps) => {
     const [showSuggestions, setShowSuggestions] = useState<boolean>(false);
     const [filteredSuggestions, setFilteredSuggestions] = useState<string[]>([]);
     const containerRef = useRef<HTMLDivElement>(null);
+    const latestInput = useRef<string>("");
+    const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL;
 
     useEffect(() => {
         // Function to handle clicks outside the component
@@ -28,13 +32,35 @@ const SuggestionInput = ({suggestions, value, onChange, placeholder, type="text"
         };
     }, []);
 
-    const handleInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const fetchSuggestions = async (inputValue: string) => {
+        try {
+            const params = new URLSearchParams({ q: inputValue, type: suggestType as string, limit: "10" });
+            const response = await fetch(`${BACKEND_URL}/search/suggest?${params}`);
+            if (!response.ok) {
+                throw new Error("Failed to fetch suggestions");
+            }
+            const data: { value: string }[] = await response.json();
+            return data.map((suggestion) => suggestion.value);
+        } catch (error) {
+            console.error("Error fetching suggestions: ", error);
+            return [];
+        }
+    }
+
+    const handleInputChange = async (e: React.ChangeEvent<HTMLInputElement>) => {
         const inputValue = e.target.value;
         onChange(inputValue);
+        latestInput.current = inputValue;
 
         // Filter suggestions
         if (inputValue){
-            const filtered = suggestions.filter(suggestion => suggestion.toLowerCase().startsWith(inputValue.toLowerCase()));
+            const filtered = suggestType ?
+                await fetchSuggestions(inputValue) :
+                suggestions.filter(suggestion => suggestion.toLowerCase().startsWith(inputValue.toLowerCase()));
+            // ignore the answer to an earlier keystroke
+            if (latestInput.current !== inputValue) {
+                return;
+            }
             setFilteredSuggestions(filtered.length > 0 ? filtered : 
                 placeholder === "Company" || placeholder === "Role" ? 
                     [`${inputValue}`] : 